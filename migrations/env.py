@@ -96,6 +96,18 @@ def run_migrations_online():
 
     connectable = get_engine()
 
+    # FULLTEXT indexes only exist on MySQL and the FTS5 tables only on
+    # SQLite; keep autogenerate from adding or dropping either elsewhere.
+    def include_object(object, name, type_, reflected, compare_to):
+        if type_ == 'table' and reflected and '_fts' in name:
+            return False
+        if type_ == 'index' and name and name.startswith('ft_'):
+            return connectable.dialect.name in ('mysql', 'mariadb')
+        return True
+
+    if conf_args.get("include_object") is None:
+        conf_args["include_object"] = include_object
+
     with connectable.connect() as connection:
         context.configure(
             connection=connection,
@@ -0,0 +1,54 @@
+"""full text search
+
+Revision ID: 3f1d7b2c9a64
+Revises: e38bc1850a09
+Create Date: 2026-10-18 19:02:11.415208
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from website.search import FTS_TABLES, SQLITE_FTS_DDL
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1d7b2c9a64'
+down_revision = 'e38bc1850a09'
+branch_labels = None
+depends_on = None
+
+
+# MySQL gets FULLTEXT indexes; SQLite (local/test) gets external-content FTS5
+# tables that triggers keep in step with the base tables (DDL shared with
+# website.search).
+FULLTEXT_INDEXES = [
+    ('ft_community_search', 'community', ['community_name', 'description']),
+    ('ft_professional_search', 'professional', ['first_name', 'last_name', 'email', 'linkedin_id']),
+    ('ft_career_name', 'career', ['career_name']),
+]
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect in ('mysql', 'mariadb'):
+        for name, table, columns in FULLTEXT_INDEXES:
+            op.create_index(name, table, columns, mysql_prefix='FULLTEXT')
+
+    elif dialect == 'sqlite':
+        for statement in SQLITE_FTS_DDL:
+            op.execute(statement)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect in ('mysql', 'mariadb'):
+        for name, table, columns in reversed(FULLTEXT_INDEXES):
+            op.drop_index(name, table_name=table)
+
+    elif dialect == 'sqlite':
+        for fts in reversed(list(FTS_TABLES)):
+            for suffix in ('ai', 'ad', 'au'):
+                op.execute(f"DROP TRIGGER IF EXISTS {fts}_{suffix}")
+            op.execute(f"DROP TABLE IF EXISTS {fts}")
@@ -0,0 +1,51 @@
+"""backfill daily user stats
+
+Revision ID: 48ac676d5988
+Revises: a9f66a8d0c41
+Create Date: 2026-10-18 19:30:18.631191
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '48ac676d5988'
+down_revision = 'a9f66a8d0c41'
+branch_labels = None
+depends_on = None
+
+
+# Seed the rollup from the user table, as `flask backfill-user-stats` does:
+# sign-ups by reg_date, and each user's last_login as one active day and
+# one login (past logins are not stored).  Dates that already have a row --
+# counted live since the table was created -- are left alone.
+user = sa.table('user', sa.column('reg_date', sa.DateTime), sa.column('last_login', sa.DateTime))
+daily_user_stats = sa.table(
+    'daily_user_stats',
+    sa.column('stat_date', sa.Date), sa.column('signups', sa.Integer),
+    sa.column('active_users', sa.Integer), sa.column('logins', sa.Integer),
+)
+
+
+def upgrade():
+    events = sa.union_all(
+        sa.select(sa.func.date(user.c.reg_date).label('day'), sa.literal(1).label('signup'),
+                  sa.literal(0).label('login'))
+        .where(user.c.reg_date.isnot(None)),
+        sa.select(sa.func.date(user.c.last_login), sa.literal(0), sa.literal(1))
+        .where(user.c.last_login.isnot(None)),
+    ).subquery('events')
+    tracked = sa.select(daily_user_stats.c.stat_date).scalar_subquery()
+    days = (
+        sa.select(events.c.day, sa.func.sum(events.c.signup), sa.func.sum(events.c.login),
+                  sa.func.sum(events.c.login))
+        .where(events.c.day.notin_(tracked))
+        .group_by(events.c.day)
+    )
+    op.execute(daily_user_stats.insert().from_select(['stat_date', 'signups', 'active_users', 'logins'], days))
+
+
+def downgrade():
+    # The backfilled rows cannot be told apart from live ones; keep them.
+    pass
@@ -0,0 +1,46 @@
+"""catalog version
+
+Revision ID: 5c1e9a7d3b20
+Revises: 48ac676d5988
+Create Date: 2026-10-18 21:04:52.118305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c1e9a7d3b20'
+down_revision = '48ac676d5988'
+branch_labels = None
+depends_on = None
+
+
+# Existing changes keep their change_id as their version, and the counter
+# starts from the newest of them.
+catalog_change = sa.table('catalog_change', sa.column('change_id', sa.Integer), sa.column('version', sa.Integer))
+catalog_version = sa.table('catalog_version', sa.column('id', sa.Integer), sa.column('version', sa.Integer))
+
+
+def upgrade():
+    op.create_table('catalog_version',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.add_column('catalog_change', sa.Column('version', sa.Integer(), nullable=True))
+    op.execute(catalog_change.update().values(version=catalog_change.c.change_id))
+    op.execute(catalog_version.insert().from_select(
+        ['id', 'version'],
+        sa.select(sa.literal(1), sa.func.coalesce(sa.func.max(catalog_change.c.change_id), 0)),
+    ))
+    with op.batch_alter_table('catalog_change', schema=None) as batch_op:
+        batch_op.alter_column('version', existing_type=sa.Integer(), nullable=False)
+        batch_op.create_index(batch_op.f('ix_catalog_change_version'), ['version'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('catalog_change', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_catalog_change_version'))
+        batch_op.drop_column('version')
+    op.drop_table('catalog_version')
@@ -0,0 +1,56 @@
+import os
+import tempfile
+
+import pytest
+
+# website/__init__.py builds the app when it is imported, from these
+_db_dir = tempfile.mkdtemp(prefix='pathway-tests-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_db_dir, 'test.sqlite')}"
+os.environ['AUTOCOMPLETE_PRELOAD'] = '0'
+
+from flask_migrate import upgrade  # noqa: E402
+
+from website import app as flask_app  # noqa: E402
+from website import autocomplete, catalog, choices, metrics, pagecache, recommender, rollup  # noqa: E402
+from website.models import db  # noqa: E402
+
+MIGRATIONS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+
+
+@pytest.fixture(scope='session')
+def app():
+    flask_app.config.update(TESTING=True, WTF_CSRF_ENABLED=False, RATELIMIT_ENABLED=False)
+    with flask_app.app_context():
+        upgrade(directory=MIGRATIONS)
+    return flask_app
+
+
+@pytest.fixture(autouse=True)
+def clean(app):
+    """Empty every table and drop what the process built from them after each test."""
+    yield
+    rollup._take()
+    with app.app_context():
+        db.session.remove()
+        with db.engine.begin() as conn:
+            for table in reversed(db.metadata.sorted_tables):
+                conn.execute(table.delete())
+    catalog.reset()
+    choices.clear_cache()
+    autocomplete.reset_index()
+    recommender.reset_index()
+    pagecache._clear()
+    metrics.clear_cache()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def admin_client(app):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['admin'] = 'admin@example.com'
+    return client
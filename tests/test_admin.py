@@ -0,0 +1,61 @@
+import re
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from website.models import db, Career
+
+CAREER_SELECT = re.compile(r'^\s*SELECT\b.*\bFROM career\b', re.IGNORECASE | re.DOTALL)
+
+
+@pytest.fixture
+def csrf(app):
+    # The dashboard template renders the forms' CSRF tokens
+    app.config['WTF_CSRF_ENABLED'] = True
+    yield
+    app.config['WTF_CSRF_ENABLED'] = False
+
+
+@contextmanager
+def career_selects(app):
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if CAREER_SELECT.match(statement):
+            statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+
+
+def test_dashboard_loads_career_choices_once(app, admin_client, csrf):
+    with app.app_context():
+        db.session.add_all([
+            Career(career_name='Data Scientist', description='data', demand_level='High'),
+            Career(career_name='Nurse', description='care', demand_level='Medium'),
+        ])
+        db.session.commit()
+
+    with career_selects(app) as cold:
+        assert admin_client.get('/admin/dashboard/').status_code == 200
+    assert len(cold) <= 1, cold
+
+    with career_selects(app) as warm:
+        assert admin_client.get('/admin/dashboard/').status_code == 200
+    assert warm == []
+
+    with app.app_context():
+        db.session.execute(db.select(Career).filter_by(career_name='Nurse')).scalar_one().career_name = 'Midwife'
+        db.session.commit()
+
+    with career_selects(app) as edited:
+        response = admin_client.get('/admin/dashboard/')
+    assert response.status_code == 200
+    assert len(edited) == 1
+    assert b'Midwife' in response.data
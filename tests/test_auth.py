@@ -0,0 +1,68 @@
+import time
+
+import pytest
+
+from website import otp, passwords
+from website.models import db, User
+
+EMAIL = 'reset@example.com'
+
+
+@pytest.fixture
+def user(app):
+    with app.app_context():
+        db.session.add(User(full_name='Reset', email=EMAIL, password_hash=passwords.hash_password('old-password')))
+        db.session.commit()
+
+
+def verify_email(client, app):
+    with app.app_context():
+        code = otp.issue(EMAIL)
+    with client.session_transaction() as session:
+        session['reset_email'] = EMAIL
+    return client.post('/resetotp', data={'email': code})
+
+
+def test_password_reset_flow(client, app, user):
+    response = verify_email(client, app)
+    assert response.headers['Location'].endswith('/resetpassword')
+    assert client.get('/resetpassword').status_code == 200
+
+    response = client.post('/resetpassword', data={'password': 'new-password', 'confirm_password': 'new-password'})
+    assert response.headers['Location'].endswith('/sign-in')
+    with client.session_transaction() as session:
+        assert 'reset_verified' not in session
+    with app.app_context():
+        stored = db.session.execute(db.select(User.password_hash).filter_by(email=EMAIL)).scalar_one()
+        assert passwords.verify(stored, 'new-password')[0]
+
+    # The verification is used up
+    assert client.get('/resetpassword').headers['Location'].endswith('/reset-email')
+
+
+def test_reset_password_needs_a_verified_email(client, user):
+    response = client.post('/resetpassword', data={'password': 'new-password', 'confirm_password': 'new-password'})
+    assert response.status_code == 302
+    assert response.headers['Location'].endswith('/reset-email')
+
+
+def test_verification_expires(client, app, user):
+    verify_email(client, app)
+    with client.session_transaction() as session:
+        session['reset_verified'] = dict(session['reset_verified'], until=time.time() - 1)
+    assert client.get('/resetpassword').headers['Location'].endswith('/reset-email')
+    with client.session_transaction() as session:
+        assert 'reset_verified' not in session
+
+
+def test_reset_signs_out_and_rotates_the_session(client, app, user):
+    verify_email(client, app)
+    with client.session_transaction() as session:
+        session['user_id'] = 1
+    before = client.get_cookie(app.config['SESSION_COOKIE_NAME'])
+
+    client.post('/resetpassword', data={'password': 'new-password', 'confirm_password': 'new-password'})
+    with client.session_transaction() as session:
+        assert 'user_id' not in session
+    after = client.get_cookie(app.config['SESSION_COOKIE_NAME'])
+    assert after.value != before.value
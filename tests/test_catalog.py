@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from website import catalog
+from website.models import db, CatalogChange, Career
+
+
+@pytest.fixture
+def deltas(app):
+    """A registered listener that records the deltas and resets it gets."""
+    seen = {'changes': [], 'resets': 0, 'fail': False}
+
+    def listener(changes):
+        if seen['fail']:
+            raise RuntimeError('cannot patch')
+        seen['changes'].append(dict(changes))
+
+    def reset():
+        seen['resets'] += 1
+
+    catalog.on_change(listener, reset=reset)
+    yield seen
+    catalog._listeners.remove((listener, reset))
+
+
+def add_career(name):
+    career = Career(career_name=name, description=name, demand_level='High')
+    db.session.add(career)
+    db.session.commit()
+    return career
+
+
+def versions():
+    return db.session.execute(db.select(CatalogChange.version).order_by(CatalogChange.version)).scalars().all()
+
+
+def test_each_transaction_takes_the_next_version(app):
+    with app.app_context():
+        add_career('Nurse')
+        add_career('Pilot')
+
+        # Several flushes, one transaction: one version
+        db.session.add(Career(career_name='Chef', description='food', demand_level='Low'))
+        db.session.flush()
+        db.session.add(Career(career_name='Baker', description='bread', demand_level='Low'))
+        db.session.commit()
+
+        assert catalog._latest_version() == 3
+        assert versions() == [1, 2, 3, 3]
+
+
+def test_rolled_back_writer_gives_its_version_back(app):
+    with app.app_context():
+        add_career('Nurse')
+        db.session.add(Career(career_name='Pilot', description='air', demand_level='High'))
+        db.session.flush()
+        db.session.rollback()
+        add_career('Chef')
+
+        assert versions() == [1, 2]
+
+
+def test_sync_hands_deltas_to_listeners(app, deltas):
+    with app.app_context():
+        assert catalog.current_version() == 0
+        nurse = add_career('Nurse')
+        pilot = add_career('Pilot')
+
+        catalog.sync(force=True)
+        assert deltas['changes'] == [{'career': {nurse.career_id, pilot.career_id}}]
+        assert catalog.current_version() == 2
+
+
+def test_pruned_versions_reset_the_listeners(app, deltas):
+    with app.app_context():
+        catalog.current_version()
+        add_career('Nurse')
+        add_career('Pilot')
+        db.session.execute(db.update(CatalogChange).where(CatalogChange.version == 1)
+                           .values(changed_at=datetime.utcnow() - timedelta(days=2)))
+        db.session.commit()
+        assert catalog.prune(retention=86400) == 1
+
+        catalog.sync(force=True)
+        assert deltas['changes'] == []
+        assert deltas['resets'] == 1
+        assert catalog.current_version() == 2
+
+
+def test_failing_listener_is_reset_and_the_version_moves_on(app, deltas):
+    with app.app_context():
+        catalog.current_version()
+        add_career('Nurse')
+        deltas['fail'] = True
+
+        catalog.sync(force=True)
+        assert deltas['resets'] == 1
+        assert catalog.current_version() == 1
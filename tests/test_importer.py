@@ -0,0 +1,122 @@
+import io
+
+from website.importer import import_catalog
+from website.models import db, Career, Professional
+
+HEADER = 'career_name,description,demand_level,average_salary\n'
+
+
+def careers_csv(*lines):
+    return io.StringIO(HEADER + ''.join(line + '\n' for line in lines))
+
+
+def add_career(name, description='An existing career'):
+    db.session.add(Career(career_name=name, description=description, demand_level='High'))
+    db.session.commit()
+
+
+def careers():
+    return {name: description for name, description in
+            db.session.execute(db.select(Career.career_name, Career.description))}
+
+
+def test_new_rows_are_inserted(app):
+    with app.app_context():
+        summary = import_catalog('careers', careers_csv(
+            'Nurse,Cares for patients,High,250000',
+            'Pilot,Flies the aircraft,Medium,',
+        ), 'csv', chunk_size=1)
+
+        assert (summary['read'], summary['inserted'], summary['duplicates'], summary['invalid']) == (2, 2, 0, 0)
+        assert careers() == {'Nurse': 'Cares for patients', 'Pilot': 'Flies the aircraft'}
+
+
+def test_existing_rows_are_skipped(app):
+    with app.app_context():
+        add_career('Nurse')
+        summary = import_catalog('careers', careers_csv('Nurse,Cares for patients,High,'), 'csv')
+
+        assert (summary['inserted'], summary['updated'], summary['duplicates']) == (0, 0, 1)
+        assert summary['problems'] == ["line 2: career_name 'Nurse' already exists"]
+        assert careers() == {'Nurse': 'An existing career'}
+
+
+def test_existing_rows_are_updated(app):
+    with app.app_context():
+        add_career('Nurse')
+        summary = import_catalog('careers', careers_csv('Nurse,Cares for patients,High,'), 'csv',
+                                 on_duplicate='update')
+
+        assert (summary['inserted'], summary['updated'], summary['duplicates']) == (0, 1, 0)
+        assert careers() == {'Nurse': 'Cares for patients'}
+
+
+def test_case_variant_of_an_existing_row_is_a_duplicate(app):
+    with app.app_context():
+        add_career('Data Analyst')
+        summary = import_catalog('careers', careers_csv('data analyst,Reads the numbers,High,'), 'csv')
+
+        assert (summary['inserted'], summary['duplicates']) == (0, 1)
+        assert careers() == {'Data Analyst': 'An existing career'}
+
+
+def test_case_variant_of_an_existing_row_is_updated(app):
+    with app.app_context():
+        add_career('Data Analyst')
+        summary = import_catalog('careers', careers_csv('DATA ANALYST,Reads the numbers,High,'), 'csv',
+                                 on_duplicate='update')
+
+        assert (summary['inserted'], summary['updated']) == (0, 1)
+        assert careers() == {'DATA ANALYST': 'Reads the numbers'}
+
+
+def test_duplicates_within_the_file_keep_the_first_row(app):
+    with app.app_context():
+        summary = import_catalog('careers', careers_csv(
+            'Nurse,Cares for patients,High,',
+            'NURSE,Cares for patients again,High,',
+            'Pilot,Flies the aircraft,Medium,',
+            'Nurse,Cares for patients once more,High,',
+        ), 'csv', chunk_size=2)
+
+        assert (summary['inserted'], summary['duplicates']) == (2, 2)
+        assert summary['problems'] == [
+            "line 3: duplicate career_name 'NURSE' earlier in the file",
+            "line 5: duplicate career_name 'Nurse' earlier in the file",
+        ]
+        assert careers() == {'Nurse': 'Cares for patients', 'Pilot': 'Flies the aircraft'}
+
+
+def test_professional_clash_on_a_second_unique_column(app):
+    with app.app_context():
+        add_career('Engineer')
+        db.session.add(Professional(first_name='Ada', last_name='Lovelace', email='ada@example.com',
+                                    linkedin_id='In-Ada', career_id=1))
+        db.session.commit()
+        stream = io.StringIO(
+            '{"first_name": "Grace", "last_name": "Hopper", "email": "grace@example.com", "linkedin_id": "in-ada",'
+            ' "career_name": "engineer"}\n'
+        )
+        summary = import_catalog('professionals', stream, 'jsonl', on_duplicate='update')
+
+        assert (summary['inserted'], summary['updated'], summary['duplicates']) == (0, 0, 1)
+        assert summary['problems'] == ["line 1: linkedin_id 'in-ada' already exists"]
+
+
+def test_bad_rows_are_reported_and_the_rest_imported(app):
+    with app.app_context():
+        stream = io.StringIO(
+            '{"career_name": "Nurse", "description": "Cares for patients", "demand_level": "High"}\n'
+            'not json\n'
+            '\n'
+            '["a", "list"]\n'
+            '{"career_name": "Pilot", "description": "Flies", "demand_level": "High"}\n'
+            '{"career_name": "Chef", "description": "Cooks the food", "demand_level": "Sometimes"}\n'
+        )
+        summary = import_catalog('careers', stream, 'jsonl')
+
+        assert (summary['read'], summary['inserted'], summary['invalid']) == (5, 1, 4)
+        assert summary['problems'][:2] == ['line 2: could not be parsed', 'line 4: could not be parsed']
+        assert summary['problems'][2].startswith('line 5: description:')
+        assert summary['problems'][3].startswith('line 6: demand_level:')
+        assert careers() == {'Nurse': 'Cares for patients'}
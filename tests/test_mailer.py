@@ -0,0 +1,208 @@
+import socket
+import time
+from unittest import mock
+
+import pytest
+from flask_mail import Message
+
+from website import mail, mailer
+
+controller = pytest.importorskip('aiosmtpd.controller')
+
+
+class Relay:
+    """aiosmtpd handler: records each delivery and the connection it came over."""
+
+    def __init__(self):
+        self.received = []      # (client address, recipient)
+        self.refuse = set()     # recipients answered with 550
+        self.defer = {}         # recipient -> number of 451 answers left
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address in self.refuse:
+            return '550 Mailbox unavailable'
+        if self.defer.get(address):
+            self.defer[address] -= 1
+            return '451 Try again later'
+        envelope.rcpt_tos.append(address)
+        return '250 OK'
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received += [(session.peer, rcpt) for rcpt in envelope.rcpt_tos]
+        return '250 Message accepted for delivery'
+
+    @property
+    def recipients(self):
+        return sorted(rcpt for _, rcpt in self.received)
+
+    @property
+    def connections(self):
+        return len({peer for peer, _ in self.received})
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_relay(handler, port):
+    relay = controller.Controller(handler, hostname='127.0.0.1', port=port)
+    relay.start()
+    return relay
+
+
+def message(i):
+    return Message(f'Reset code {i}', sender='noreply@example.com', recipients=[f'user{i}@example.com'], body='123456')
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+@pytest.fixture
+def port(app):
+    """Point Flask-Mail at a local port, with fast retries."""
+    port = free_port()
+    keys = ('MAIL_SERVER', 'MAIL_PORT', 'MAIL_USE_TLS', 'MAIL_USE_SSL', 'MAIL_USERNAME', 'MAIL_SUPPRESS_SEND',
+            'MAIL_QUEUE_BATCH', 'MAIL_QUEUE_RETRIES', 'MAIL_QUEUE_BACKOFF')
+    previous = {key: app.config[key] for key in keys if key in app.config}
+    app.config.update(MAIL_SERVER='127.0.0.1', MAIL_PORT=port, MAIL_USE_TLS=False, MAIL_USE_SSL=False,
+                      MAIL_USERNAME=None, MAIL_SUPPRESS_SEND=False,
+                      MAIL_QUEUE_BATCH=20, MAIL_QUEUE_RETRIES=3, MAIL_QUEUE_BACKOFF=0.05)
+    mail.init_app(app)
+    yield port
+    for key in keys:
+        app.config.pop(key, None)
+    app.config.update(previous)
+    mail.init_app(app)
+
+
+@pytest.fixture
+def relay(port):
+    handler = Relay()
+    server = start_relay(handler, port)
+    yield handler
+    server.stop()
+
+
+@pytest.fixture
+def mail_queue(monkeypatch):
+    queue = mailer.MailQueue()
+    monkeypatch.setattr(mailer, '_mail_queue', queue)
+    return queue
+
+
+def send_batch(app, queue, messages):
+    """Queue ``messages`` before the worker starts, so they go out as one batch."""
+    with app.app_context():
+        with mock.patch.object(queue, '_start'):
+            for m in messages:
+                mailer.send(m)
+        queue._start(app)
+    assert queue.join(timeout=10)
+
+
+def test_queued_mail_arrives_over_one_connection(app, relay, mail_queue):
+    send_batch(app, mail_queue, [message(i) for i in range(5)])
+
+    assert relay.recipients == [f'user{i}@example.com' for i in range(5)]
+    assert relay.connections == 1
+    assert mail_queue.stats() == {'queued': 5, 'sent': 5, 'retried': 0, 'failed': 0, 'connections': 1,
+                                  'delayed': 0, 'depth': 0, 'workers': 1}
+
+
+def test_batches_are_capped_at_mail_queue_batch(app, relay, mail_queue):
+    app.config['MAIL_QUEUE_BATCH'] = 2
+    send_batch(app, mail_queue, [message(i) for i in range(5)])
+
+    assert relay.recipients == [f'user{i}@example.com' for i in range(5)]
+    assert relay.connections == 3
+
+
+def test_worker_sends_mail_as_it_is_queued(app, relay, mail_queue):
+    with app.test_request_context():
+        for i in range(5):
+            mailer.send(message(i))
+    assert mail_queue.join(timeout=10)
+
+    assert relay.recipients == [f'user{i}@example.com' for i in range(5)]
+    assert relay.connections <= 2   # the first message may leave before the rest are queued
+
+
+def test_refused_connection_is_retried_with_backoff(app, port, mail_queue):
+    app.config['MAIL_QUEUE_RETRIES'] = 6
+    attempts = []
+    connect = mail.connect
+
+    def timed_connect():
+        attempts.append(time.monotonic())
+        return connect()
+
+    with mock.patch.object(mail, 'connect', timed_connect), app.app_context():
+        mailer.send(message(1))
+        # Nothing listens on the port yet: wait for two refused attempts
+        assert wait_for(lambda: len(attempts) >= 2)
+        handler = Relay()
+        server = start_relay(handler, port)
+        try:
+            assert mail_queue.join(timeout=10)
+        finally:
+            server.stop()
+
+    assert handler.recipients == ['user1@example.com']
+    assert attempts[1] - attempts[0] >= 0.05
+    assert attempts[2] - attempts[1] >= 0.1                 # MAIL_QUEUE_BACKOFF, doubled
+    assert mail_queue.counters['retried'] == len(attempts) - 1
+    assert mail_queue.counters['failed'] == 0
+
+
+def test_deferred_message_does_not_hold_up_the_queue(app, relay, mail_queue):
+    app.config['MAIL_QUEUE_BACKOFF'] = 1.0
+    relay.defer['user1@example.com'] = 1
+    started = time.monotonic()
+    with app.app_context():
+        with mock.patch.object(mail_queue, '_start'):
+            for i in range(1, 4):
+                mailer.send(message(i))
+        mail_queue._start(app)
+
+    # The others go out on a fresh connection while user1 waits its turn
+    assert wait_for(lambda: relay.recipients == ['user2@example.com', 'user3@example.com'])
+    assert time.monotonic() - started < 1.0
+    assert mail_queue.stats()['delayed'] == 1
+
+    assert mail_queue.join(timeout=10)
+    assert relay.recipients == [f'user{i}@example.com' for i in range(1, 4)]
+    assert mail_queue.counters['retried'] == 1
+
+
+def test_message_is_dropped_after_max_retries(app, relay, mail_queue):
+    relay.refuse = {'user2@example.com'}
+    send_batch(app, mail_queue, [message(i) for i in range(1, 4)])
+
+    assert relay.recipients == ['user1@example.com', 'user3@example.com']
+    assert mail_queue.counters['failed'] == 1
+    assert mail_queue.counters['retried'] == 2     # MAIL_QUEUE_RETRIES = 3 attempts
+    assert mail_queue.counters['sent'] == 2
+
+
+def test_metrics_endpoint_reports_counters(app, admin_client, relay, mail_queue):
+    relay.refuse = {'user1@example.com'}
+    send_batch(app, mail_queue, [message(1), message(2)])
+
+    response = admin_client.get('/admin/metrics/mail')
+    assert response.status_code == 200
+    # user1 is refused on three connections, user2 goes out on the second
+    assert response.get_json() == {
+        'queued': 2, 'sent': 1, 'retried': 2, 'failed': 1, 'connections': 4, 'delayed': 0, 'depth': 0, 'workers': 1,
+    }
+
+
+def test_metrics_endpoint_requires_admin(client):
+    assert client.get('/admin/metrics/mail').status_code == 302
@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta
+
+from website import otp
+from website.models import db, PasswordResetOtp, User
+
+EMAIL = 'reset@example.com'
+
+
+def wrong(code):
+    return f'{(int(code) + 1) % 1_000_000:06d}'
+
+
+def test_code_is_used_once(app):
+    with app.app_context():
+        code = otp.issue(EMAIL)
+        assert otp.verify(EMAIL, code) == otp.VALID
+        assert otp.verify(EMAIL, code) == otp.EXPIRED
+
+
+def test_code_locks_after_max_attempts(app):
+    with app.app_context():
+        code = otp.issue(EMAIL)
+        results = [otp.verify(EMAIL, wrong(code)) for _ in range(app.config['OTP_MAX_ATTEMPTS'])]
+        assert results == [otp.INVALID] * (app.config['OTP_MAX_ATTEMPTS'] - 1) + [otp.LOCKED]
+        assert otp.verify(EMAIL, code) == otp.LOCKED
+
+
+def test_new_code_does_not_reset_the_lockout(app):
+    max_attempts = app.config['OTP_MAX_ATTEMPTS']
+    with app.app_context():
+        code = otp.issue(EMAIL)
+        for _ in range(max_attempts - 1):
+            assert otp.verify(EMAIL, wrong(code)) == otp.INVALID
+
+        code = otp.issue(EMAIL)
+        assert db.session.get(PasswordResetOtp, EMAIL).attempts == max_attempts - 1
+        assert otp.verify(EMAIL, wrong(code)) == otp.LOCKED
+
+        # Locked: no new code is issued, and the last one is refused
+        assert otp.issue(EMAIL) is None
+        assert otp.verify(EMAIL, code) == otp.LOCKED
+
+
+def test_lockout_ends_when_the_code_expires(app):
+    with app.app_context():
+        code = otp.issue(EMAIL)
+        for _ in range(app.config['OTP_MAX_ATTEMPTS']):
+            otp.verify(EMAIL, wrong(code))
+        db.session.execute(db.update(PasswordResetOtp).values(expires_at=datetime.utcnow() - timedelta(seconds=1)))
+        db.session.commit()
+        assert otp.sweep() == 1
+
+        code = otp.issue(EMAIL)
+        assert otp.verify(EMAIL, code) == otp.VALID
+
+
+def test_successful_code_resets_the_count(app):
+    with app.app_context():
+        code = otp.issue(EMAIL)
+        otp.verify(EMAIL, wrong(code))
+        assert otp.verify(EMAIL, code) == otp.VALID
+
+        otp.issue(EMAIL)
+        assert db.session.get(PasswordResetOtp, EMAIL).attempts == 0
+
+
+def test_reset_page_refuses_a_locked_email(client, app):
+    with app.app_context():
+        db.session.add(User(full_name='Reset', email=EMAIL, password_hash='x'))
+        db.session.commit()
+        code = otp.issue(EMAIL)
+        for _ in range(app.config['OTP_MAX_ATTEMPTS']):
+            otp.verify(EMAIL, wrong(code))
+
+    response = client.post('/reset-email', data={'email': EMAIL}, follow_redirects=True)
+    assert b'Too many incorrect attempts' in response.data
+    with client.session_transaction() as session:
+        assert 'reset_email' not in session
+
+
+def test_concurrent_guesses_are_counted(app):
+    with app.app_context():
+        code = otp.issue(EMAIL)
+        # This request has loaded the row when the others' guesses land
+        loaded = db.session.get(PasswordResetOtp, EMAIL)
+        assert loaded.attempts == 0
+        with db.engine.begin() as other:
+            other.execute(db.update(PasswordResetOtp).values(attempts=app.config['OTP_MAX_ATTEMPTS'] - 1))
+
+        assert otp.verify(EMAIL, wrong(code)) == otp.LOCKED
+        db.session.expire_all()
+        assert db.session.get(PasswordResetOtp, EMAIL).attempts == app.config['OTP_MAX_ATTEMPTS']
@@ -0,0 +1,162 @@
+import math
+import random
+from collections import Counter
+
+import pytest
+
+from website import recommender
+from website.recommender import RecommendationIndex, TfidfIndex, career_text
+
+CATALOG = [
+    (3, 'Data Analyst', 'Reads data and builds reports for the business', ['SQL', 'Excel']),
+    (5, 'Data Engineer', 'Builds data pipelines and keeps the warehouse loaded', ['SQL', 'Python']),
+    (8, 'Nurse A', 'Cares for patients on the ward', ['Empathy']),
+    (9, 'Nurse B', 'Cares for patients on the ward', ['Empathy']),
+    (12, 'Software Developer', 'Writes and tests software in Python and C#', ['Python', 'Git']),
+    (20, 'Chef', 'Cooks food for the restaurant and plans the menu', []),
+]
+
+KEYWORD_SETS = [
+    ['data'],                       # two careers tie; the earlier one wins
+    ['python', 'sql'],
+    ['nurse', 'patients'],          # identical texts apart from the name
+    ['dat', 'eng'],                 # substrings of terms
+    ['python', 'python', 'chef'],   # a repeated keyword counts twice
+    ['c#', 'software'],
+    ['astronaut'],                  # nothing matches
+    [],
+]
+
+
+def linear_scores(rows, keywords):
+    """The dashboard's original scan: one substring test per keyword per career."""
+    return [
+        (career_id, sum(1 for keyword in keywords if keyword in career_text(name, description, skills)))
+        for career_id, name, description, skills in rows
+    ]
+
+
+def linear_best(rows, keywords):
+    best_id, best_score = rows[0][0], 0
+    for career_id, score in linear_scores(rows, keywords):
+        if score > best_score:
+            best_id, best_score = career_id, score
+    return best_id, best_score
+
+
+def linear_ranking(rows, keywords):
+    ranked = sorted(enumerate(linear_scores(rows, keywords)), key=lambda item: (-item[1][1], item[0]))
+    return [pair for _, pair in ranked if pair[1]]
+
+
+def random_catalog(rng, size):
+    vocabulary = [''.join(rng.choice('abcdef') for _ in range(rng.randint(2, 5))) for _ in range(40)]
+    rows = [
+        (career_id, f'{rng.choice(vocabulary)} {career_id}',
+         ' '.join(rng.choice(vocabulary) for _ in range(rng.randint(1, 8))),
+         [rng.choice(vocabulary) for _ in range(rng.randint(0, 3))])
+        for career_id in sorted(rng.sample(range(1, 1000), size))
+    ]
+    keyword_sets = [
+        [rng.choice(vocabulary)[:rng.randint(1, 5)] for _ in range(rng.randint(1, 4))]
+        for _ in range(50)
+    ]
+    return rows, keyword_sets
+
+
+@pytest.mark.parametrize('keywords', KEYWORD_SETS)
+def test_keyword_top_1_matches_the_linear_scan(keywords):
+    index = RecommendationIndex.from_rows(CATALOG)
+    assert index.top_k(keywords, 1) == [linear_best(CATALOG, keywords)]
+    assert index.best(keywords) == linear_best(CATALOG, keywords)
+
+
+def test_keyword_ties_and_fallback_go_to_the_first_career():
+    index = RecommendationIndex.from_rows(CATALOG)
+    assert index.top_k(['data'], 1) == [(3, 1)]
+    assert index.top_k(['patients'], 1) == [(8, 1)]
+    assert index.top_k(['astronaut'], 1) == [(3, 0)]
+    assert RecommendationIndex.from_rows([]).top_k(['data'], 1) == []
+
+
+def test_keyword_top_k_matches_the_linear_scan_on_a_random_catalog():
+    rows, keyword_sets = random_catalog(random.Random(7), 60)
+    index = RecommendationIndex.from_rows(rows)
+    for keywords in keyword_sets:
+        assert index.top_k(keywords, 1) == [linear_best(rows, keywords)]
+        assert index.top_k(keywords, 5) == (linear_ranking(rows, keywords)[:5] or [(rows[0][0], 0)])
+
+
+def test_patched_keyword_index_matches_a_fresh_scan():
+    rng = random.Random(11)
+    rows, keyword_sets = random_catalog(rng, 60)
+    changed, _ = random_catalog(rng, 10)
+    removed = {rows[0][0], rows[30][0]}
+    index = RecommendationIndex.from_rows(rows).apply(changed, removed)
+
+    current = {row[0]: row for row in rows if row[0] not in removed}
+    current.update((row[0], row) for row in changed)
+    current = [current[career_id] for career_id in sorted(current)]
+    for keywords in keyword_sets:
+        assert index.top_k(keywords, 1) == [linear_best(current, keywords)]
+
+
+# -------------------------------------
+# TF-IDF
+# -------------------------------------
+
+def cosine_ranking(rows, keywords):
+    """TF-IDF cosine scores computed term by term, without numpy."""
+    documents = [Counter(TfidfIndex.tokenize(career_text(*row[1:]))) for row in rows]
+    frequency = Counter(term for document in documents for term in document)
+    idf = {term: math.log((1 + len(rows)) / (1 + count)) + 1 for term, count in frequency.items()}
+
+    def unit(counts):
+        vector = {term: count * idf[term] for term, count in counts.items() if term in idf}
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        return {term: weight / norm for term, weight in vector.items()} if norm else {}
+
+    query = unit(Counter(TfidfIndex.tokenize(' '.join(keywords))))
+    scores = [
+        (row[0], sum(weight * document.get(term, 0) for term, weight in query.items()))
+        for row, document in zip(rows, map(unit, documents))
+    ]
+    ranked = sorted(enumerate(scores), key=lambda item: (-item[1][1], item[0]))
+    return [pair for _, pair in ranked if pair[1] > 0]
+
+
+def assert_same_ranking(actual, expected):
+    assert [career_id for career_id, _ in actual] == [career_id for career_id, _ in expected]
+    assert [score for _, score in actual] == pytest.approx([score for _, score in expected], abs=1e-5)
+
+
+@pytest.fixture
+def tfidf():
+    if recommender.np is None:
+        pytest.skip('numpy and scipy are not installed')
+    return TfidfIndex.from_rows(CATALOG)
+
+
+@pytest.mark.parametrize('keywords', KEYWORD_SETS)
+def test_tfidf_matches_the_reference_cosine(tfidf, keywords):
+    expected = cosine_ranking(CATALOG, keywords)
+    assert_same_ranking(tfidf.top_k(keywords, 1), expected[:1])
+    assert_same_ranking(tfidf.top_k(keywords, len(CATALOG)), expected)
+
+
+def test_tfidf_ties_go_to_the_first_career_and_no_match_ranks_nothing(tfidf):
+    assert [career_id for career_id, _ in tfidf.top_k(['patients'], 2)] == [8, 9]
+    assert tfidf.top_k(['astronaut'], 1) == []
+    assert tfidf.top_k_batch([['data'], ['astronaut']], 1)[1] == []
+
+
+def test_patched_tfidf_index_matches_a_fresh_build(tfidf):
+    changed = [(9, 'Midwife', 'Delivers babies and cares for mothers', ['Empathy']),
+               (15, 'Data Scientist', 'Builds models from data in Python', ['Python', 'Statistics'])]
+    patched = tfidf.apply(changed, removed_ids={20})
+
+    # apply() moves the changed careers to the end of the catalog order
+    current = [row for row in CATALOG if row[0] not in (9, 20)] + changed
+    for keywords in KEYWORD_SETS + [['babies'], ['statistics', 'data']]:
+        expected = cosine_ranking(current, keywords)
+        assert_same_ranking(patched.top_k(keywords, len(current)), expected)
@@ -0,0 +1,71 @@
+from types import SimpleNamespace
+
+import pytest
+
+from website import pagecache, ratelimit
+
+fakeredis = pytest.importorskip('fakeredis')
+
+URL = 'redis://cache.example:6379/0'
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """Point both modules' redis clients at one in-process fake server."""
+    server = fakeredis.FakeServer()
+    fake = SimpleNamespace(Redis=SimpleNamespace(from_url=lambda url: fakeredis.FakeRedis(server=server)))
+    monkeypatch.setattr(ratelimit, 'redis', fake)
+    monkeypatch.setattr(pagecache, 'redis', fake)
+    return server
+
+
+@pytest.fixture
+def redis_config(app, server):
+    keys = ('RATELIMIT_ENABLED', 'RATELIMIT_STORAGE_URL', 'RATELIMIT_PER_IP', 'PAGE_CACHE_URL')
+    previous = {key: app.config[key] for key in keys}
+    app.config.update(RATELIMIT_ENABLED=True, RATELIMIT_STORAGE_URL=URL, RATELIMIT_PER_IP='2/minute',
+                      PAGE_CACHE_URL=URL)
+    ratelimit._backend['instance'] = pagecache._backend['instance'] = None
+    yield
+    app.config.update(previous)
+    ratelimit._backend['instance'] = pagecache._backend['instance'] = None
+
+
+def test_token_bucket_is_shared_by_workers(server):
+    first, second = ratelimit.RedisBackend(URL), ratelimit.RedisBackend(URL)
+    assert first.hit('sign-in:ip:1.2.3.4', 2, 2 / 60) == 0
+    assert second.hit('sign-in:ip:1.2.3.4', 2, 2 / 60) == 0
+    assert first.hit('sign-in:ip:1.2.3.4', 2, 2 / 60) == pytest.approx(30, abs=1)
+    assert second.hit('sign-in:ip:5.6.7.8', 2, 2 / 60) == 0
+
+
+def test_bucket_expires_once_refilled(server):
+    backend = ratelimit.RedisBackend(URL)
+    backend.hit('reset-otp:ip:1.2.3.4', 5, 5 / 60)
+    assert 1 <= backend._client.ttl('ratelimit:reset-otp:ip:1.2.3.4') <= 13
+
+
+def test_limited_view_answers_429(client, redis_config):
+    statuses = [client.post('/resetotp', data={'email': '123456'}).status_code for _ in range(3)]
+    assert 429 not in statuses[:2]
+    assert statuses[2] == 429
+
+
+def test_page_cache_entry_expires(server):
+    backend = pagecache.RedisBackend(URL)
+    backend.set('v1:guest:/?', b'text/html\n<p>hi</p>', 300)
+    assert backend.get('v1:guest:/?') == b'text/html\n<p>hi</p>'
+    assert 0 < backend._client.ttl('page:v1:guest:/?') <= 300
+    assert backend.get('v1:guest:/about?') is None
+
+
+def test_public_page_is_served_from_redis(client, redis_config, server):
+    first = client.get('/about')
+    assert first.status_code == 200
+    keys = fakeredis.FakeRedis(server=server).keys('page:*')
+    assert len(keys) == 1
+
+    second = client.get('/about')
+    assert second.status_code == 200
+    assert second.data == first.data
+    assert second.content_type == first.content_type
@@ -0,0 +1,98 @@
+import base64
+import json
+
+import pytest
+
+from website.models import db, Career, Community, Professional
+
+
+def cursor(key):
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip('=')
+
+
+@pytest.fixture
+def directory(app):
+    with app.app_context():
+        career = Career(career_name='Data Scientist', description='data', demand_level='High')
+        db.session.add(career)
+        db.session.flush()
+        for i in range(5):
+            db.session.add(Community(community_name=f'Data club {i}', description='data people',
+                                     career_id=career.career_id))
+            db.session.add(Professional(first_name=f'Ada{i}', last_name='Data', email=f'ada{i}@example.com',
+                                        linkedin_id=f'ada{i}', career_id=career.career_id))
+        db.session.commit()
+
+
+ENDPOINTS = ['/search_communities', '/search_professionals']
+BACKENDS = ['autocomplete', 'fts5', 'like']
+
+MALFORMED = [
+    'not-base64!',
+    cursor({'a': 1}),           # not a list
+    cursor([]),
+    cursor(['x']),              # wrong type for an id
+    cursor([{}]),
+    cursor([True]),             # bool is not an id
+    cursor([2 ** 70]),          # out of BIGINT range
+    cursor([1, 2, 3, 4]),       # too long for every key
+]
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(app, request):
+    previous = app.config['SEARCH_BACKEND']
+    app.config['SEARCH_BACKEND'] = request.param
+    yield request.param
+    app.config['SEARCH_BACKEND'] = previous
+
+
+@pytest.mark.parametrize('endpoint', ENDPOINTS)
+@pytest.mark.parametrize('query', ['', 'data'])
+@pytest.mark.parametrize('bad', MALFORMED)
+def test_malformed_cursor_is_400(client, directory, backend, endpoint, query, bad):
+    response = client.get(endpoint, query_string={'q': query, 'cursor': bad})
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize('endpoint', ENDPOINTS)
+def test_cursor_of_another_backend_is_400(client, directory, app, endpoint):
+    # [score, name, id] from the typeahead index is not a [score, id] key
+    app.config['SEARCH_BACKEND'] = 'fts5'
+    try:
+        response = client.get(endpoint, query_string={'q': 'data', 'cursor': cursor([0, 'Data club 1', 2])})
+    finally:
+        app.config['SEARCH_BACKEND'] = 'autocomplete'
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize('endpoint', ENDPOINTS)
+@pytest.mark.parametrize('query', ['', 'data'])
+def test_pages_follow_their_cursors(client, directory, backend, endpoint, query):
+    seen, next_cursor = [], None
+    while True:
+        params = {'q': query, 'limit': 2}
+        if next_cursor:
+            params['cursor'] = next_cursor
+        response = client.get(endpoint, query_string=params)
+        assert response.status_code == 200
+        body = response.get_json()
+        seen += body['results']
+        next_cursor = body['next_cursor']
+        if next_cursor is None:
+            break
+    assert len(seen) == 5
+    assert len({json.dumps(row, sort_keys=True) for row in seen}) == 5
+
+
+@pytest.mark.parametrize('bad', [cursor(['x', 1]), cursor([1]), cursor([{}, 1]), cursor([1.5, 1])])
+def test_admin_table_rejects_malformed_cursor(admin_client, directory, bad):
+    response = admin_client.get('/admin/data/careers', query_string={'cursor': bad})
+    assert response.status_code == 400
+
+
+def test_admin_table_follows_its_cursor(admin_client, directory):
+    first = admin_client.get('/admin/data/professionals', query_string={'sort': 'email', 'limit': 3}).get_json()
+    rest = admin_client.get('/admin/data/professionals',
+                            query_string={'sort': 'email', 'limit': 3, 'cursor': first['next_cursor']}).get_json()
+    assert [row['email'] for row in first['results'] + rest['results']] == [f'ada{i}@example.com' for i in range(5)]
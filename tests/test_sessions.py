@@ -0,0 +1,103 @@
+from contextlib import contextmanager
+from datetime import datetime
+
+from sqlalchemy import event
+
+from website import sessions
+from website.models import db
+
+
+@contextmanager
+def statements(app):
+    seen = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        seen.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        yield seen
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+
+def session_reads(seen):
+    return [s for s in seen if 'FROM web_session' in s]
+
+
+def signed_in(app, client, **data):
+    with client.session_transaction() as session:
+        session.update(user_id=1, **data)
+    return client.get_cookie(app.config['SESSION_COOKIE_NAME']).value
+
+
+def test_cookie_names_the_data_version(app, client):
+    cookie = signed_in(app, client)
+    sid, _, version = cookie.partition('.')
+    with app.app_context():
+        payload, _ = sessions.SqlAlchemyStore().load(sid)
+    assert version == sessions.data_version(payload)
+
+
+def test_page_cache_hit_for_signed_in_visitor_runs_no_sql(app, client):
+    signed_in(app, client)
+    assert client.get('/about').status_code == 200
+
+    with statements(app) as seen:
+        response = client.get('/about')
+    assert response.status_code == 200
+    assert seen == []
+    assert 'Cookie' in response.vary
+
+
+def test_unchanged_session_is_read_from_the_store_once(app, client):
+    sid = signed_in(app, client).partition('.')[0]
+    app.session_interface.cache.discard(sid)
+
+    with statements(app) as seen:
+        for _ in range(3):
+            client.get('/about')
+    assert len(session_reads(seen)) == 1
+
+
+def test_session_is_not_read_by_requests_that_do_not_use_it(app, client):
+    signed_in(app, client)
+    with statements(app) as seen:
+        response = client.get('/search_communities', query_string={'q': 'data'})
+    assert response.status_code == 200
+    assert session_reads(seen) == []
+    assert 'Cookie' not in response.vary
+    assert response.headers.get('Set-Cookie') is None
+
+
+def test_session_changed_by_another_worker_is_read_afresh(app, client):
+    cookie = signed_in(app, client)
+    sid = cookie.partition('.')[0]
+
+    # Another worker signs the visitor out; its response carries the new version
+    with app.app_context():
+        payload = app.session_interface.serializer.dumps({'reset_email': 'a@example.com'})
+        sessions.SqlAlchemyStore().save(sid, payload, datetime.utcnow() + app.permanent_session_lifetime)
+    client.set_cookie(app.config['SESSION_COOKIE_NAME'], f'{sid}.{sessions.data_version(payload)}')
+
+    with client.session_transaction() as session:
+        assert 'user_id' not in session
+        assert session['reset_email'] == 'a@example.com'
+
+
+def test_cookie_without_a_version_is_upgraded(app, client):
+    cookie = signed_in(app, client)
+    sid, _, version = cookie.partition('.')
+    client.set_cookie(app.config['SESSION_COOKIE_NAME'], sid)
+
+    client.get('/about')
+    assert client.get_cookie(app.config['SESSION_COOKIE_NAME']).value == cookie
+
+
+def test_write_hands_out_the_new_version(app, client):
+    cookie = signed_in(app, client)
+    client.get('/logout/')
+    new_cookie = client.get_cookie(app.config['SESSION_COOKIE_NAME'])
+    assert new_cookie is None or new_cookie.value != cookie
@@ -0,0 +1,54 @@
+import pytest
+
+from website.models import db, User
+
+PROFILE_FORMS = [
+    ('/question2', {'currentlevel': 'BSc'}, 'education_level', 'BSc', '/question3'),
+    ('/question4', {'careergoal': 'Data work'}, 'career_goal', 'Data work', '/question5'),
+    ('/save-strengths', {'strengths': 'Numbers'}, 'strength', 'Numbers', '/dashboard'),
+]
+
+
+@pytest.fixture
+def user_id(app):
+    with app.app_context():
+        user = User(full_name='Quiz Taker', email='quiz@example.com', password_hash='x')
+        db.session.add(user)
+        db.session.commit()
+        return user.user_id
+
+
+def stored(app, user_id, column):
+    with app.app_context():
+        return getattr(db.session.get(User, user_id), column)
+
+
+@pytest.mark.parametrize('path, data, column, value, next_page', PROFILE_FORMS)
+def test_profile_answers_are_saved_for_the_signed_in_user(app, client, user_id, path, data, column, value, next_page):
+    with client.session_transaction() as session:
+        session['user_id'] = user_id
+
+    response = client.post(path, data=data)
+    assert response.status_code == 302
+    assert response.headers['Location'].endswith(next_page)
+    assert stored(app, user_id, column) == value
+
+
+@pytest.mark.parametrize('path, data, column, value, next_page', PROFILE_FORMS)
+def test_profile_answers_need_a_signed_in_user(app, client, user_id, path, data, column, value, next_page):
+    response = client.post(path, data=data)
+    assert response.status_code == 302
+    assert response.headers['Location'].endswith('/sign-in')
+    assert stored(app, user_id, column) is None
+
+
+@pytest.mark.parametrize('path, data, column, value, next_page', PROFILE_FORMS)
+def test_profile_answers_from_a_deleted_account_are_refused(app, client, user_id, path, data, column, value,
+                                                            next_page):
+    with client.session_transaction() as session:
+        session['user_id'] = user_id + 1
+
+    response = client.post(path, data=data)
+    assert response.headers['Location'].endswith('/sign-in')
+    with client.session_transaction() as session:
+        assert 'user_id' not in session
@@ -24,6 +24,15 @@ def create_app():
     db.init_app(app)
     mail.init_app(app)
     Migrate(app, db) 
+
+    from website import assets, autocomplete, caching, compression, jsonprovider, nplusone, sessions
+    jsonprovider.init_app(app)
+    sessions.init_app(app)
+    nplusone.init_app(app)
+    assets.init_app(app)
+    caching.init_app(app)
+    compression.init_app(app)
+    autocomplete.init_app(app)
     
     
     
@@ -35,6 +44,9 @@ def create_app():
     app.register_blueprint(views, url_prefix='/')
     app.register_blueprint(auth, url_prefix='/')
     app.register_blueprint(admin, url_prefix='/')
+
+    from website.commands import register_commands
+    register_commands(app)
     return app
 
 
@@ -1,12 +1,19 @@
+import io
 from functools import wraps
 from sqlalchemy.exc import IntegrityError
 
-from datetime import datetime, timedelta
-
-from flask import Blueprint, render_template, session, redirect, request, url_for, flash
-from website.forms import LoginForm, AddSkillForm, CareerForm, ProfessionalForm, CommunityForm
-from werkzeug.security import check_password_hash
-from website.models import db, Admin, User, Skill, Career, Professional, Community
+from flask import (Blueprint, render_template, session, redirect, request, url_for, flash, abort, current_app, jsonify,
+                   Response, stream_with_context)
+from sqlalchemy import or_, select
+from website.forms import LoginForm, AddSkillForm, CareerForm, ProfessionalForm, CommunityForm, ImportCatalogForm
+from website.models import db, Admin, Skill, Career, Professional, Community
+from website.metrics import user_counters
+from website.choices import career_choices
+from website.search import after_keyset, decode_cursor, encode_cursor
+from website.importer import detect_format, import_catalog
+from website.exporter import EXPORTS, FORMATS, export_chunks, export_filename
+from website import mailer, passwords, sessions
+from website.ratelimit import limit
 
 
 admin = Blueprint('admin', __name__)
@@ -26,58 +33,152 @@ def admin_required(f):
 
 
 # =============================
-#   HELPER FUNCTION FOR MODALS
+#     DASHBOARD TABLE DATA
 # =============================
-def render_dashboard_with_modal(open_modal=None, skill_form=None, career_form=None,
-                                professional_form=None, community_form=None):
-    total_users = User.query.count()
-    last_7_days = datetime.utcnow() - timedelta(days=7)
-    new_signups = User.query.filter(User.reg_date >= last_7_days).count()
-    last_24_hours = datetime.utcnow() - timedelta(days=1)
-    dau = User.query.filter(User.last_login >= last_24_hours).count()
-
-    add_skill_form = skill_form or AddSkillForm()
-    add_career_form = career_form or CareerForm()
-    add_professional_form = professional_form or ProfessionalForm()
-    add_community_form = community_form or CommunityForm()
-
-    add_professional_form.career_id.choices = [(c.career_id, c.career_name) for c in Career.query.all()]
-    add_community_form.career_id.choices = [(c.career_id, c.career_name) for c in Career.query.all()]
-
-    skills = Skill.query.all()
-    careers = Career.query.all()
-    professional = Professional.query.all()
-    communities = Community.query.all()
-
+# The dashboard tabs load their rows from /admin/data/<table>, one page at
+# a time: ?sort=<column>&order=asc|desc&q=<filter>&limit=<n>&cursor=<token>.
+# Pages are keyset queries on (sort column, primary key), so a deep page
+# costs the same as the first and the dashboard itself loads no rows.
+def _salary(value):
+    return None if value is None else str(value)
+
+
+ADMIN_TABLES = {
+    'skills': {
+        'model': Skill,
+        'sort': {'id': Skill.skill_id, 'skill_name': Skill.skill_name, 'category': Skill.category},
+        'filter': (Skill.skill_name,),
+        'row': lambda s, names: {
+            'id': s.skill_id, 'skill_name': s.skill_name, 'category': s.category,
+        },
+    },
+    'careers': {
+        'model': Career,
+        'sort': {'id': Career.career_id, 'career_name': Career.career_name, 'demand_level': Career.demand_level},
+        'filter': (Career.career_name,),
+        'row': lambda c, names: {
+            'id': c.career_id, 'career_name': c.career_name, 'description': c.description,
+            'demand_level': c.demand_level, 'average_salary': _salary(c.average_salary),
+        },
+    },
+    'professionals': {
+        'model': Professional,
+        'sort': {'id': Professional.professional_id, 'first_name': Professional.first_name,
+                 'last_name': Professional.last_name, 'email': Professional.email},
+        'filter': (Professional.first_name, Professional.last_name, Professional.email, Professional.linkedin_id),
+        'row': lambda p, names: {
+            'id': p.professional_id, 'first_name': p.first_name, 'last_name': p.last_name,
+            'email': p.email, 'linkedin_id': p.linkedin_id,
+            'career_id': p.career_id, 'career_name': names.get(p.career_id),
+        },
+    },
+    'communities': {
+        'model': Community,
+        'sort': {'id': Community.community_id, 'community_name': Community.community_name},
+        'filter': (Community.community_name,),
+        'row': lambda c, names: {
+            'id': c.community_id, 'community_name': c.community_name, 'description': c.description,
+            'community_link': c.community_link,
+            'career_id': c.career_id, 'career_name': names.get(c.career_id),
+        },
+    },
+}
+
+# Tab names used by the redirects and modals, mapped to their table
+TAB_TABLES = {
+    'skills': 'skills', 'skillsTab': 'skills', 'skill': 'skills',
+    'careers': 'careers', 'careersTab': 'careers', 'career': 'careers',
+    'professionals': 'professionals', 'professionalsTab': 'professionals', 'professional': 'professionals',
+    'communities': 'communities', 'communityTab': 'communities', 'community': 'communities',
+}
+TABLE_SECTIONS = {
+    'skills': 'skillsTab', 'careers': 'careersTab',
+    'professionals': 'professionalsTab', 'communities': 'communityTab',
+}
+
+
+def table_page(table, args):
+    """One page of an admin table: ``{'results', 'next_cursor'}``."""
+    spec = ADMIN_TABLES[table]
+    model = spec['model']
+    key = model.__mapper__.primary_key[0]
+    sort = spec['sort'].get(args.get('sort'), key)
+    descending = args.get('order') == 'desc'
+    limit = args.get('limit', current_app.config['ADMIN_PAGE_SIZE'], type=int)
+    limit = max(1, min(limit, current_app.config['SEARCH_MAX_LIMIT']))
+
+    after = decode_cursor(args.get('cursor'), (sort.type.python_type, int))    # [sort value, id]
+
+    stmt = select(model).where(after_keyset(sort, key, after, descending))
+    query = (args.get('q') or '').strip()
+    if query:
+        stmt = stmt.where(or_(*(column.ilike(f'%{query}%') for column in spec['filter'])))
+    stmt = stmt.order_by(sort.desc() if descending else sort, key).limit(limit + 1)
+
+    rows = db.session.execute(stmt).scalars().all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([getattr(rows[-1], sort.key), getattr(rows[-1], key.key)])
+
+    names = dict(career_choices())
+    return {'results': [spec['row'](row, names) for row in rows], 'next_cursor': next_cursor}
+
+
+def render_dashboard(active_tab=None, open_modal=None, **forms):
+    """The dashboard shell; only the active tab's first page is loaded."""
+    counters = user_counters()
+
+    add_skill_form = forms.get('skill_form') or AddSkillForm()
+    add_career_form = forms.get('career_form') or CareerForm()
+    add_professional_form = forms.get('professional_form') or ProfessionalForm()
+    add_community_form = forms.get('community_form') or CommunityForm()
+
+    # Career dropdowns share one cached choice list
+    add_professional_form.career_id.choices = career_choices()
+    add_community_form.career_id.choices = career_choices()
+
+    table = TAB_TABLES.get(active_tab)
     return render_template(
         'admin/admin_dashboard.html',
-        total_users=total_users,
+        total_users=counters['total_users'],
         add_skill_form=add_skill_form,
         add_career_form=add_career_form,
         professional_form=add_professional_form,
         add_community_form=add_community_form,
-        skills=skills,
-        careers=careers,
-        professional=professional,
-        communities=communities,
-        active_tab=open_modal.replace('add', '').lower() if open_modal else 'skills',
+        import_form=ImportCatalogForm(),
+        career_choices=career_choices(),
+        active_tab=TABLE_SECTIONS.get(table),
+        initial_page=table_page(table, request.args) if table else None,
+        page_size=current_app.config['ADMIN_PAGE_SIZE'],
         open_modal=open_modal,
-        new_signups=new_signups,
-        dau=dau
+        new_signups=counters['new_signups'],
+        signups_30d=counters['signups_30d'],
+        dau=counters['dau'],
+        logins_today=counters['logins_today']
     )
 
 
-# Avoid caching admin pages after logout
-@admin.after_request
-def after_request(response):
-    response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
-    return response
+# =============================
+#   HELPER FUNCTION FOR MODALS
+# =============================
+def render_dashboard_with_modal(open_modal=None, skill_form=None, career_form=None,
+                                professional_form=None, community_form=None):
+    return render_dashboard(
+        active_tab=open_modal.replace('add', '').lower() if open_modal else 'skills',
+        open_modal=open_modal,
+        skill_form=skill_form,
+        career_form=career_form,
+        professional_form=professional_form,
+        community_form=community_form,
+    )
 
 
 # =============================
 #            LOGIN
 # =============================
 @admin.route('/admin', methods=['POST', 'GET'])
+@limit('admin-login')
 def login():
     form = LoginForm()
     
@@ -87,7 +188,13 @@ def login():
 
         admin_user = Admin.query.filter(Admin.admin_email == email).first()
 
-        if admin_user and check_password_hash(admin_user.admin_password, password):
+        valid, new_hash = passwords.verify(admin_user.admin_password, password) if admin_user else (False, None)
+        if valid:
+            if new_hash:
+                # Re-hash with the current cost settings
+                admin_user.admin_password = new_hash
+                db.session.commit()
+            sessions.regenerate()
             session['admin'] = admin_user.admin_email
             return redirect(url_for('admin.dashboard'))
         else:
@@ -103,17 +210,7 @@ def login():
 @admin.route('/admin/dashboard/', methods=['GET', 'POST'])
 @admin_required
 def dashboard():
-    tab = request.args.get('tab', 'skills')
-
-    total_users = User.query.count()
-
-    # get new signups in last 7 days
-    last_7_days = datetime.utcnow() - timedelta(days=7)
-    new_signups = User.query.filter(User.reg_date >= last_7_days).count()
-
-    # get daily active users (last 24 hours)
-    last_24_hours = datetime.utcnow() - timedelta(days=1)
-    dau = User.query.filter(User.last_login >= last_24_hours).count()
+    tab = request.args.get('tab')
 
     # FORMS
     add_skill_form = AddSkillForm()
@@ -121,19 +218,9 @@ def dashboard():
     add_professional_form = ProfessionalForm()
     add_community_form = CommunityForm()  # <-- NEW FORM
 
-    add_professional_form.career_id.choices = [
-        (c.career_id, c.career_name) for c in Career.query.all()
-    ]
-
-    add_community_form.career_id.choices = [
-        (c.career_id, c.career_name) for c in Career.query.all()
-    ]
-
-    # DATA
-    skills = Skill.query.all()
-    careers = Career.query.all()
-    professional = Professional.query.all()
-    communities = Community.query.all()   # <-- COMMUNITY DATA
+    # Career dropdowns share one cached choice list
+    add_professional_form.career_id.choices = career_choices()
+    add_community_form.career_id.choices = career_choices()
 
     # Handle Skill creation
     if add_skill_form.validate_on_submit() and add_skill_form.submit.data:
@@ -205,23 +292,74 @@ def dashboard():
         db.session.commit()
         flash(f'Communities "{add_community_form.community_name.data}" added successfully!', 'msg')
 
-    return render_template(
-        'admin/admin_dashboard.html',
-        total_users=total_users,
-        add_skill_form=add_skill_form,
-        add_career_form=add_career_form,
-        professional_form=add_professional_form,
-        add_community_form=add_community_form,  # NEW
-        skills=skills,
-        careers=careers,
-        professional=professional,
-        communities=communities,  # NEW
+    return render_dashboard(
         active_tab=tab,
-        new_signups=new_signups,
-        dau=dau
+        skill_form=add_skill_form,
+        career_form=add_career_form,
+        professional_form=add_professional_form,
+        community_form=add_community_form,
     )
 
 
+@admin.get('/admin/metrics/mail')
+@admin_required
+def mail_metrics():
+    # queue depth and delivery counters of this worker process
+    return jsonify(mailer.stats())
+
+
+@admin.get('/admin/data/<table>')
+@admin_required
+def table_data(table):
+    if table not in ADMIN_TABLES:
+        abort(404)
+    return jsonify(table_page(table, request.args))
+
+
+# =============================
+#        BULK IMPORT
+# =============================
+@admin.route('/import_catalog', methods=['POST'])
+@admin_required
+def import_catalog_upload():
+    form = ImportCatalogForm()
+
+    if form.validate_on_submit():
+        upload = form.file.data
+        stream = io.TextIOWrapper(upload.stream, encoding='utf-8-sig', newline='')
+        summary = import_catalog(form.kind.data, stream, detect_format(upload.filename), form.on_duplicate.data)
+
+        flash(f"Imported {form.kind.data}: {summary['inserted']} added, {summary['updated']} updated, "
+              f"{summary['duplicates']} duplicates, {summary['invalid']} invalid rows.", 'msg')
+        for problem in summary['problems'][:10]:
+            flash(problem, 'errormsg')
+    else:
+        for field, errors in form.errors.items():
+            for error in errors:
+                flash(f"{field}: {error}", "errormsg")
+
+    return redirect(url_for('admin.dashboard', tab=TABLE_SECTIONS.get(form.kind.data, 'skillsTab')))
+
+
+# =============================
+#          EXPORT
+# =============================
+@admin.get('/admin/export/<table>')
+@admin_required
+def export_table(table):
+    fmt = request.args.get('format', 'csv')
+    if table not in EXPORTS or fmt not in FORMATS:
+        abort(404)
+    compress = request.args.get('gzip') == '1'
+
+    response = Response(
+        stream_with_context(export_chunks(table, fmt, compress)),
+        mimetype='application/gzip' if compress else FORMATS[fmt],
+    )
+    response.headers['Content-Disposition'] = f'attachment; filename="{export_filename(table, fmt, compress)}"'
+    return response
+
+
 # =============================
 #          LOGOUT
 # =============================
@@ -329,7 +467,7 @@ def delete_career(career_id):
 @admin_required
 def add_professional():
     form = ProfessionalForm()
-    form.career_id.choices = [(c.career_id, c.career_name) for c in Career.query.all()]
+    form.career_id.choices = career_choices()
 
     if form.validate_on_submit():
         linkedin_id = form.linkedin_id.data.strip()
@@ -381,6 +519,7 @@ def add_professional():
 def edit_professional_route(professional_id):
     professional = Professional.query.get_or_404(professional_id)
     form = ProfessionalForm(obj=professional)
+    form.career_id.choices = career_choices()
     
     if form.validate_on_submit():
         professional.first_name = request.form.get('first_name')
@@ -422,7 +561,7 @@ def add_community():
     form = CommunityForm()
 
     # Dynamically load career choices (required for WTForms validation)
-    form.career_id.choices = [(c.career_id, c.career_name) for c in Career.query.all()]
+    form.career_id.choices = career_choices()
 
     if form.validate_on_submit():
         # Handle empty string for community_link
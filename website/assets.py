@@ -0,0 +1,154 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import shutil
+import threading
+
+from flask import Blueprint, current_app, request, send_from_directory, url_for
+from werkzeug.exceptions import NotFound
+from werkzeug.security import safe_join
+
+try:  # brotli variants are optional; gzip is always written
+    import brotli
+except ImportError:  # pragma: no cover - depends on the deployment
+    brotli = None
+
+
+# -------------------------------------
+# FINGERPRINTED STATIC ASSETS
+# -------------------------------------
+# `flask build-assets` finds every asset_url('...') in the templates and
+# copies just those files from static/ to ASSETS_DIR under a name carrying
+# a hash of their content (bootstrap.min.3f9c0a1d2b4e.css), with .gz and
+# .br siblings for text files.  manifest.json maps each logical name to
+# its hashed one.  asset_url() emits /assets/<hashed name>; since a
+# changed file gets a new name, those responses are cached by browsers
+# for a year without revalidation, and the precompressed sibling matching
+# Accept-Encoding is sent as is.  Files missing from the manifest (no
+# build yet, or a new reference) fall back to the plain /static URL.
+
+ASSET_CALL = re.compile(r"""asset_url\(\s*['"]([^'"]+)['"]\s*\)""")
+COMPRESSIBLE = ('.css', '.js', '.svg', '.json', '.txt', '.html', '.map')
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+assets = Blueprint('assets', __name__)
+
+_state = {'manifest': None}
+_lock = threading.Lock()
+
+
+def assets_dir(app):
+    return app.config.get('ASSETS_DIR') or os.path.join(app.static_folder, 'dist')
+
+
+def referenced_assets(app):
+    """Static filenames passed to asset_url() anywhere in the templates."""
+    names = set()
+    for folder, _, files in os.walk(os.path.join(app.root_path, app.template_folder)):
+        for filename in files:
+            with open(os.path.join(folder, filename), encoding='utf-8') as template:
+                names.update(ASSET_CALL.findall(template.read()))
+    return sorted(names)
+
+
+def fingerprint(name, content):
+    root, extension = os.path.splitext(name)
+    return f'{root}.{hashlib.sha256(content).hexdigest()[:12]}{extension}'
+
+
+def build(app, clean=True):
+    """Write hashed copies (and compressed siblings) of the referenced assets.
+
+    Returns ``(manifest, sizes)``; ``sizes`` maps each logical name to its
+    byte counts: ``{'raw': n, 'gzip': n, 'br': n}``.
+    """
+    output = assets_dir(app)
+    if clean and os.path.isdir(output):
+        shutil.rmtree(output)
+    manifest, sizes = {}, {}
+    for name in referenced_assets(app):
+        source = os.path.join(app.static_folder, name)
+        if not os.path.isfile(source):
+            app.logger.warning('asset_url(%r) names a file that is not in static/', name)
+            continue
+        with open(source, 'rb') as f:
+            content = f.read()
+        hashed = fingerprint(name, content)
+        target = os.path.join(output, hashed)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'wb') as f:
+            f.write(content)
+
+        manifest[name] = hashed
+        sizes[name] = {'raw': len(content)}
+        if name.endswith(COMPRESSIBLE):
+            variants = {'gzip': gzip.compress(content, 9, mtime=0)}
+            if brotli is not None:
+                variants['br'] = brotli.compress(content, quality=11)
+            for encoding, suffix in ENCODINGS:
+                if encoding in variants:
+                    with open(target + suffix, 'wb') as f:
+                        f.write(variants[encoding])
+                    sizes[name][encoding] = len(variants[encoding])
+
+    with open(os.path.join(output, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    with _lock:
+        _state['manifest'] = manifest
+    return manifest, sizes
+
+
+def manifest():
+    if _state['manifest'] is None:
+        with _lock:
+            if _state['manifest'] is None:
+                path = os.path.join(assets_dir(current_app), 'manifest.json')
+                try:
+                    with open(path) as f:
+                        _state['manifest'] = json.load(f)
+                except FileNotFoundError:
+                    _state['manifest'] = {}
+    return _state['manifest']
+
+
+def asset_url(filename):
+    """URL of the fingerprinted copy of static/``filename`` (plain static URL if not built)."""
+    hashed = manifest().get(filename)
+    if hashed is None:
+        return url_for('static', filename=filename)
+    return url_for('assets.asset', filename=hashed)
+
+
+@assets.route('/assets/<path:filename>')
+def asset(filename):
+    directory = assets_dir(current_app)
+    path = safe_join(directory, filename)
+    if path is None or filename.endswith(('.gz', '.br')) or filename == 'manifest.json':
+        raise NotFound()
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    max_age = current_app.config.get('ASSETS_MAX_AGE', 31536000)
+
+    sent_encoding = None
+    for encoding, suffix in ENCODINGS:
+        if request.accept_encodings[encoding] and os.path.isfile(path + suffix):
+            sent_encoding = encoding
+            response = send_from_directory(directory, filename + suffix, mimetype=mimetype, max_age=max_age)
+            break
+    else:
+        response = send_from_directory(directory, filename, mimetype=mimetype, max_age=max_age)
+
+    if sent_encoding:
+        response.headers['Content-Encoding'] = sent_encoding
+    if filename.endswith(COMPRESSIBLE):
+        response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+def init_app(app):
+    app.register_blueprint(assets)
+    app.add_template_global(asset_url)
@@ -1,39 +1,53 @@
+import time
 from functools import wraps
 
-from flask import Blueprint, render_template, redirect, url_for, request, flash, session
+from flask import Blueprint, render_template, redirect, url_for, request, flash, session, current_app, g
 from flask_mail import Message
-import random
+from datetime import datetime
 from website.models import User,db, User
-from website import mail
-from werkzeug.security import generate_password_hash, check_password_hash
+from website import mailer, otp, passwords, rollup, sessions
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import load_only
 
+from website.ratelimit import limit
 from website.forms import RegistrationForm, LoginForm,ResetForm,OtpForm,ResetPasswordForm
 
 
 
 auth = Blueprint('auth', __name__)
+
+
+# The signed-in user is loaded once per request, with only the columns the
+# views use (anything else loads on first access), and kept on
+# g.current_user.  The session's identity map hands the same object to any
+# later lookup of that user in the request.
+CURRENT_USER_COLUMNS = (User.user_id, User.full_name, User.career_goal, User.strength, User.education_level)
+
+
+def load_current_user():
+    """The signed-in User, or None if signed out or the account was deleted."""
+    if 'current_user' not in g:
+        user_id = session.get('user_id')
+        g.current_user = db.session.get(
+            User, user_id, options=[load_only(*CURRENT_USER_COLUMNS)]
+        ) if user_id else None
+    return g.current_user
+
+
 def login_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if 'user_id' not in session:
+        if load_current_user() is None:
+            # Signed out, or the account is gone: drop the stale id
+            session.pop('user_id', None)
             flash("Please log in to continue.", "errormsg")
             return redirect(url_for('auth.Sign_in'))
         return f(*args, **kwargs)
     return decorated_function
 
-@auth.after_request
-def after_request(response):
-    """
-    Runs after each request.
-    Disables caching to prevent viewing protected
-    pages after logout using the back button.
-    """
-    response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
-    return response
-
 
 @auth.route("/sign-in", methods=['GET', 'POST'])
+@limit('sign-in')
 def Sign_in():
 
     form = LoginForm()
@@ -45,9 +59,20 @@ def Sign_in():
         record = User.query.filter(User.email==email).first()
 
         if record:
-            if check_password_hash(record.password_hash, password):
+            valid, new_hash = passwords.verify(record.password_hash, password)
+            if valid:
+                sessions.regenerate()
                 session['user_id'] = record.user_id
 
+                # Re-hash with the current cost settings if they changed
+                if new_hash:
+                    record.password_hash = new_hash
+
+                previous_login = record.last_login
+                record.last_login = datetime.utcnow()
+                db.session.commit()
+                rollup.record_login(previous_login, record.last_login)
+
                 # flash('Login successful!', category='msg')
                 return redirect(url_for('views.dashboard'))
 
@@ -61,6 +86,7 @@ def Sign_in():
     return render_template("signin.html", form=form)
 
 @auth.route("/sign-up", methods=['GET', 'POST'])
+@limit('sign-up')
 def Sign_up():
     # Redirect logged-in users away from signup
     if session.get('user_id'):
@@ -73,14 +99,16 @@ def Sign_up():
         user_email = form.email.data
         password = form.password.data
 
-        hashed_password = generate_password_hash(password)
+        hashed_password = passwords.hash_password(password)
 
         u = User(full_name=fullname, email=user_email, password_hash=hashed_password)
 
         try:
             db.session.add(u)
             db.session.commit()
-            
+            rollup.record_signup(u.reg_date)
+
+            sessions.regenerate()
             session['user_id'] = u.user_id
             return redirect(url_for('views.Second_question'))
         except:
@@ -94,6 +122,7 @@ def Sign_up():
 
 
 @auth.route("/reset-email", methods=['GET', 'POST'])
+@limit('reset-email')
 def Reset_email():
     form = ResetForm()
 
@@ -101,41 +130,76 @@ def Reset_email():
         email = form.email.data
         user = User.query.filter(User.email == email).first()
 
-        if user:
-    
-            otp = random.randint(100000, 999999)
-
-            # Store email and OTP in session temporarily
+        code = otp.issue(email) if user else None
+        if code:
+            # Only the email is kept in the session; the code is stored hashed
             session['reset_email'] = email
-            session['otp'] = otp
+            session.pop('otp', None)
 
-            # Send OTP to email
+            # Send OTP to email (queued; the request does not wait for SMTP)
+            minutes = current_app.config.get('OTP_TTL_SECONDS', 600) // 60
             msg = Message("Password Reset OTP", recipients=[email])
-            msg.body = f"Your OTP code is {otp}. It will expire in 10 minutes."
-            mail.send(msg)
+            msg.body = f"Your OTP code is {code}. It will expire in {minutes} minutes."
+            mailer.send(msg)
 
             flash("An OTP has been sent to your email.", "msg")
             return redirect(url_for('auth.Reset_otp'))
+        elif user:
+            flash("Too many incorrect attempts. Please try again later.", "errormsg")
         else:
             flash("No account found with that email address.", "errormsg")
 
     return render_template("reset.html", form=form)
 
 @auth.route("/resetotp", methods=['GET', 'POST'])
+@limit('reset-otp', account_field=None)
 def Reset_otp():
     form = OtpForm()
     if form.validate_on_submit():
-        return redirect(url_for('auth.Reset_password'))
-    if request.method == "POST":
-        pass
-        # flash("OTP does not match. Please check your input.", "errormsg")
+        result = otp.verify(session.get('reset_email'), form.email.data)
+        if result == otp.VALID:
+            # Good for one password change, within the lifetime of a code
+            ttl = current_app.config.get('OTP_TTL_SECONDS', 600)
+            session['reset_verified'] = {'email': session.pop('reset_email'), 'until': time.time() + ttl}
+            return redirect(url_for('auth.Reset_password'))
+        elif result == otp.INVALID:
+            flash("OTP does not match. Please check your input.", "errormsg")
+        elif result == otp.LOCKED:
+            session.pop('reset_email', None)
+            flash("Too many incorrect attempts. Please try again later.", "errormsg")
+            return redirect(url_for('auth.Reset_email'))
+        else:
+            session.pop('reset_email', None)
+            flash("This OTP has expired. Please request a new one.", "errormsg")
+            return redirect(url_for('auth.Reset_email'))
 
     return render_template("resetotp.html", form=form)
 
 
 @auth.route("/resetpassword", methods=['GET', 'POST'])
 def Reset_password():
+    verified = session.get('reset_verified')
+    if not verified or verified['until'] < time.time():
+        session.pop('reset_verified', None)
+        flash("Please verify your email with an OTP first.", "errormsg")
+        return redirect(url_for('auth.Reset_email'))
+
     form = ResetPasswordForm()
+    if form.validate_on_submit():
+        session.pop('reset_verified')
+        user = User.query.filter(User.email == verified['email']).first()
+        if user is None:
+            flash("No account found with that email address.", "errormsg")
+            return redirect(url_for('auth.Reset_email'))
+
+        user.password_hash = passwords.hash_password(form.password.data)
+        db.session.commit()
+
+        # A fresh session id, signed out: the new password is needed to sign in
+        sessions.regenerate()
+        session.pop('user_id', None)
+        flash("Your password has been reset. Please sign in.", "msg")
+        return redirect(url_for('auth.Sign_in'))
 
     return render_template("resetpassword.html", form=form)
 
@@ -0,0 +1,274 @@
+import bisect
+import heapq
+import re
+import threading
+from collections import defaultdict
+
+import click
+from sqlalchemy import select
+
+from website import catalog
+from website.models import db, Career, Community, Professional
+
+
+# -------------------------------------
+# TYPEAHEAD INDEX
+# -------------------------------------
+# The community and professional pages search on every pause in typing.
+# These indexes answer those queries from memory and the database is only
+# asked for the final page of rows.
+#
+#   * words: a sorted vocabulary (a flattened prefix trie) -- every word
+#     starting with the typed token is one bisect range away;
+#   * trigrams: for the short identifying fields (names, emails, LinkedIn
+#     ids, career names) a token of 3+ characters also matches anywhere
+#     inside the field, like the old ILIKE '%q%';
+#
+# Each query token must match; rows are ranked by how well (exact word,
+# word prefix, substring), then alphabetically.
+
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+EXACT, PREFIX, SUBSTRING = 0, 1, 2
+
+
+def _words(text):
+    return set(WORD_RE.findall(text.lower())) if text else set()
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TextIndex:
+    """Word-prefix and trigram lookup from text fields to ids."""
+
+    def __init__(self):
+        self.vocabulary = []                # sorted words, rebuilt when stale
+        self._vocabulary_stale = False
+        self.word_ids = {}                  # word -> set of ids
+        self.trigram_ids = defaultdict(set)  # trigram -> set of ids
+        self.fields = {}                    # id -> lower-cased trigram fields
+        self.entry_words = {}               # id -> words
+
+    def add(self, key, short_fields, long_fields=()):
+        """Index ``short_fields`` by words and trigrams, ``long_fields`` by words."""
+        self.remove(key)
+        fields = [field.lower() for field in short_fields if field]
+        words = set()
+        for field in list(short_fields) + list(long_fields):
+            words |= _words(field)
+
+        self.fields[key] = fields
+        self.entry_words[key] = words
+        for word in words:
+            ids = self.word_ids.get(word)
+            if ids is None:
+                ids = self.word_ids[word] = set()
+                self._vocabulary_stale = True
+            ids.add(key)
+        for field in fields:
+            for trigram in _trigrams(field):
+                self.trigram_ids[trigram].add(key)
+
+    def remove(self, key):
+        words = self.entry_words.pop(key, None)
+        if words is None:
+            return
+        for word in words:
+            ids = self.word_ids[word]
+            ids.discard(key)
+            if not ids:
+                del self.word_ids[word]
+                self._vocabulary_stale = True
+        for field in self.fields.pop(key):
+            for trigram in _trigrams(field):
+                ids = self.trigram_ids[trigram]
+                ids.discard(key)
+                if not ids:
+                    del self.trigram_ids[trigram]
+
+    def matches(self, token):
+        """Map id -> best match kind for one query token."""
+        found = {}
+        if self._vocabulary_stale:
+            self.vocabulary = sorted(self.word_ids)
+            self._vocabulary_stale = False
+
+        start = bisect.bisect_left(self.vocabulary, token)
+        for word in self.vocabulary[start:bisect.bisect_left(self.vocabulary, token + '\uffff')]:
+            kind = EXACT if word == token else PREFIX
+            for key in self.word_ids[word]:
+                if found.get(key, SUBSTRING + 1) > kind:
+                    found[key] = kind
+
+        if len(token) >= 3:
+            postings = sorted((self.trigram_ids.get(t, ()) for t in _trigrams(token)), key=len)
+            for key in postings[0] if postings else ():
+                if key not in found and any(token in field for field in self.fields[key]):
+                    found[key] = SUBSTRING
+        return found
+
+
+class DirectoryIndex:
+    """Typeahead over communities and professionals (and their careers)."""
+
+    def __init__(self):
+        self.communities = TextIndex()
+        self.professionals = TextIndex()
+        self.careers = TextIndex()
+        self.community_names = {}           # community_id -> sort key
+        self.professional_names = {}        # professional_id -> sort key
+        self.professional_career = {}       # professional_id -> career_id
+        self.career_professionals = defaultdict(set)
+        self._lock = threading.RLock()
+
+    # ---- building ----
+    def add_community(self, community_id, name, description):
+        self.communities.add(community_id, [name], [description])
+        self.community_names[community_id] = (name or '').lower()
+
+    def remove_community(self, community_id):
+        self.communities.remove(community_id)
+        self.community_names.pop(community_id, None)
+
+    def add_professional(self, professional_id, first_name, last_name, email, linkedin_id, career_id):
+        self.remove_professional(professional_id)
+        self.professionals.add(professional_id, [first_name, last_name, email, linkedin_id])
+        self.professional_names[professional_id] = f'{first_name} {last_name}'.lower()
+        self.professional_career[professional_id] = career_id
+        if career_id is not None:
+            self.career_professionals[career_id].add(professional_id)
+
+    def remove_professional(self, professional_id):
+        self.professionals.remove(professional_id)
+        self.professional_names.pop(professional_id, None)
+        career_id = self.professional_career.pop(professional_id, None)
+        if career_id is not None:
+            self.career_professionals[career_id].discard(professional_id)
+
+    def add_career(self, career_id, name):
+        self.careers.add(career_id, [name])
+
+    def remove_career(self, career_id):
+        self.careers.remove(career_id)
+
+    def load(self, communities=None, professionals=None, careers=None, session=None):
+        """(Re)load the given ids from the database; ``None`` loads everything."""
+        session = session or db.session
+        for ids, key, columns, add, remove in (
+            (careers, Career.career_id, (Career.career_name,), self.add_career, self.remove_career),
+            (communities, Community.community_id,
+             (Community.community_name, Community.description), self.add_community, self.remove_community),
+            (professionals, Professional.professional_id,
+             (Professional.first_name, Professional.last_name, Professional.email,
+              Professional.linkedin_id, Professional.career_id),
+             self.add_professional, self.remove_professional),
+        ):
+            if ids is not None and not ids:
+                continue
+            stmt = select(key, *columns)
+            if ids is not None:
+                stmt = stmt.where(key.in_(ids))
+            rows = session.execute(stmt).all()
+            with self._lock:
+                for row in rows:
+                    add(*row)
+                for missing in set(ids or ()) - {row[0] for row in rows}:
+                    remove(missing)
+
+    # ---- querying ----
+    @staticmethod
+    def _rank(token_matches, names, limit, after):
+        """``(id, [score, name, id])`` hits in rank order, starting after ``after``."""
+        if not token_matches:
+            return []
+        token_matches.sort(key=len)
+        scores = dict(token_matches[0])
+        for found in token_matches[1:]:
+            scores = {key: score + found[key] for key, score in scores.items() if key in found}
+
+        ranked = ((scores[key], names.get(key, ''), key) for key in scores)
+        if after is not None:
+            after = tuple(after)
+            ranked = (position for position in ranked if position > after)
+        ranked = sorted(ranked) if limit is None else heapq.nsmallest(limit, ranked)
+        return [(position[2], list(position)) for position in ranked]
+
+    def community_hits(self, query, limit=None, after=None):
+        tokens = WORD_RE.findall(query.lower())
+        with self._lock:
+            return self._rank([self.communities.matches(t) for t in tokens], self.community_names, limit, after)
+
+    def professional_hits(self, query, limit=None, after=None):
+        tokens = WORD_RE.findall(query.lower())
+        with self._lock:
+            token_matches = []
+            for token in tokens:
+                found = self.professionals.matches(token)
+                for career_id, kind in self.careers.matches(token).items():
+                    for professional_id in self.career_professionals.get(career_id, ()):
+                        if found.get(professional_id, SUBSTRING + 1) > kind:
+                            found[professional_id] = kind
+                token_matches.append(found)
+            return self._rank(token_matches, self.professional_names, limit, after)
+
+
+_index = None
+_lock = threading.Lock()   # held while the index is built or replaced
+
+
+def reset_index():
+    """Drop the index so that the next get_index() loads it afresh."""
+    global _index
+    with _lock:
+        _index = None
+
+
+@catalog.on_change(reset=reset_index)
+def _apply_catalog_changes(changes):
+    # Waits for a build in progress, which may have read the rows before
+    # this change.
+    with _lock:
+        if _index is not None:
+            _index.load(
+                communities=changes.get('community', set()),
+                professionals=changes.get('professional', set()),
+                careers=changes.get('career', set()),
+            )
+
+
+def get_index():
+    """Process-wide directory index, kept current with catalog deltas.
+
+    Normally built at startup (see init_app); otherwise by the first
+    caller, while the others wait for it.
+    """
+    global _index
+    catalog.sync()
+    if _index is None:
+        with _lock:
+            if _index is None:
+                index = DirectoryIndex()
+                index.load()
+                _index = index
+    return _index
+
+
+def _preload(app):
+    with app.app_context():
+        try:
+            get_index()
+        except Exception:
+            # e.g. the tables do not exist yet; the first search retries
+            app.logger.warning('Directory index preload failed', exc_info=True)
+
+
+def init_app(app):
+    """Start building the directory index in the background when it is in use."""
+    if app.config.get('SEARCH_BACKEND') != 'autocomplete' or not app.config.get('AUTOCOMPLETE_PRELOAD', True):
+        return
+    # Other flask commands (migrations, exports, ...) never search
+    ctx = click.get_current_context(silent=True)
+    if ctx is not None and ctx.info_name != 'run':
+        return
+    threading.Thread(target=_preload, args=(app,), name='autocomplete-preload', daemon=True).start()
@@ -0,0 +1,95 @@
+import os
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import current_app, make_response, request, session
+
+
+# -------------------------------------
+# HTTP CACHE POLICY
+# -------------------------------------
+# Every response is `no-store` unless its view declares a policy with
+# @cache_policy, so signed-in and admin pages are never kept by browsers
+# or proxies.  Declared policies:
+#
+#   page    public HTML; revalidated on every visit (max-age
+#           CACHE_PAGE_MAX_AGE, 0 by default) against an ETag of the body
+#           and, for pages that are pure templates, a Last-Modified of the
+#           template files -- an unchanged page costs a 304 and no body
+#   search  JSON search results; shared caches and browsers may reuse them
+#           for CACHE_SEARCH_MAX_AGE seconds, then revalidate by ETag
+#
+# Pages that read the session (base.html checks the signed-in user) get
+# Vary: Cookie from the session interface, and are marked private when
+# rendered for a signed-in visitor, so shared caches never mix them up.
+
+NO_STORE = 'no-cache, no-store, must-revalidate'
+
+POLICIES = {
+    'page': {'max_age': 'CACHE_PAGE_MAX_AGE', 'shared': False},
+    'search': {'max_age': 'CACHE_SEARCH_MAX_AGE', 'shared': True},
+}
+
+_state = {'templates_mtime': None}
+
+
+def templates_modified(app):
+    """Newest modification time of the app's templates (computed once)."""
+    if _state['templates_mtime'] is None:
+        newest = max(
+            os.path.getmtime(os.path.join(folder, name))
+            for folder, _, files in os.walk(os.path.join(app.root_path, app.template_folder))
+            for name in files
+        )
+        _state['templates_mtime'] = datetime.fromtimestamp(int(newest), timezone.utc)
+    return _state['templates_mtime']
+
+
+def apply_policy(name, response, static=False):
+    """Set ``name``'s caching headers on ``response`` and answer 304 if unchanged."""
+    if request.method not in ('GET', 'HEAD') or response.status_code != 200 or response.is_streamed:
+        return response
+    policy = POLICIES[name]
+    max_age = current_app.config.get(policy['max_age'], 0)
+
+    cache_control = response.cache_control
+    if not policy['shared'] and ('user_id' in session or 'admin' in session):
+        cache_control.private = True     # rendered for a signed-in visitor
+    else:
+        cache_control.public = True
+    cache_control.max_age = max_age
+    if not max_age:
+        cache_control.no_cache = True
+    if policy['shared']:
+        cache_control.s_maxage = max_age
+
+    response.add_etag()
+    if static:
+        response.last_modified = templates_modified(current_app)
+    return response.make_conditional(request)
+
+
+def cache_policy(name, static=False):
+    """Declare the caching policy of a view (see POLICIES).
+
+    ``static`` marks pages rendered from templates alone, which also get
+    a Last-Modified header.
+    """
+    if name not in POLICIES:
+        raise ValueError(f'Unknown cache policy {name!r}')
+
+    def decorator(view):
+        @wraps(view)
+        def cached(*args, **kwargs):
+            return apply_policy(name, make_response(view(*args, **kwargs)), static)
+        return cached
+    return decorator
+
+
+def init_app(app):
+    @app.after_request
+    def default_no_store(response):
+        # Views without a policy, and files that set none, are not stored
+        if 'Cache-Control' not in response.headers:
+            response.headers['Cache-Control'] = NO_STORE
+        return response
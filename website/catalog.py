@@ -0,0 +1,233 @@
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import delete, event, insert, select, update
+from sqlalchemy.orm import Session
+
+from website.models import db, CatalogChange, CatalogVersion, Career, CareerSkill, Community, Professional, Skill
+
+
+# -------------------------------------
+# CATALOG CHANGE TRACKING
+# -------------------------------------
+# Admin CRUD on the catalog (careers, skills, communities, professionals)
+# is recorded in the catalog_change table from a
+# session flush hook, in the same transaction as the change itself.  That
+# transaction takes the next catalog version by incrementing the one row of
+# catalog_version, and tags its change rows with it.  The UPDATE holds the
+# row's lock until the transaction ends, so writers commit in version order
+# and a rolled-back writer gives its number back: every version up to the
+# one in catalog_version is committed, and has rows unless they were
+# pruned.  (An autoincrement id would not do: ids are handed out at flush
+# but become visible at commit, so a poller could move past one that
+# commits late.)  Every process keeps the version it has applied and, at
+# most once per CATALOG_POLL_SECONDS, reads catalog_version -- one primary
+# key lookup -- and, when it moved, the changes in between.  Those deltas
+# are handed to the registered listeners (the recommendation index,
+# caches, ...) so they can patch themselves instead of rebuilding.
+#
+# When a listener fails on a delta, or some of the versions since the
+# process's version have already been pruned from the log, the listener's
+# reset hook drops what it built so that it is rebuilt from the full
+# catalog on next use; the version moves on either way.  Rows older than
+# CATALOG_CHANGE_RETENTION seconds are pruned every CATALOG_PRUNE_SECONDS
+# (or by `flask prune-catalog-changes`).
+
+_listeners = []
+_state = {'version': None, 'next_poll': 0.0, 'next_prune': 0.0}
+
+
+def on_change(listener=None, reset=None):
+    """Register ``listener(changes)``; ``changes`` maps entity -> set of ids.
+
+    ``reset()`` drops whatever the listener keeps, to be rebuilt from the
+    full catalog; it is called when the listener's deltas cannot be applied.
+    Usable as ``@on_change`` or ``@on_change(reset=...)``.
+    """
+    if listener is None:
+        return lambda listener: on_change(listener, reset)
+    _listeners.append((listener, reset))
+    return listener
+
+
+def current_version():
+    """Catalog version this process has caught up with (syncing first)."""
+    sync()
+    return _state['version']
+
+
+def _latest_version():
+    return db.session.execute(select(CatalogVersion.version).where(CatalogVersion.id == 1)).scalar() or 0
+
+
+def _reset(listener, reset):
+    if reset is None:
+        return
+    try:
+        reset()
+    except Exception:
+        current_app.logger.exception('Catalog reset hook of %s failed', listener.__qualname__)
+
+
+def sync(force=False):
+    """Apply catalog changes committed since the last poll, if it is due."""
+    now = time.monotonic()
+    config = current_app.config
+    if _state['version'] is None:
+        # Nothing has been built from the catalog yet, so there is nothing
+        # to patch: start from the current version.
+        _state['version'] = _latest_version()
+        _state['next_poll'] = now + config.get('CATALOG_POLL_SECONDS', 5)
+        return
+    if not force and now < _state['next_poll']:
+        return
+    _state['next_poll'] = now + config.get('CATALOG_POLL_SECONDS', 5)
+    _maybe_prune(now)
+
+    latest = _latest_version()
+    if latest <= _state['version']:
+        return
+    rows = db.session.execute(
+        select(CatalogChange.version, CatalogChange.entity, CatalogChange.entity_id)
+        .where(CatalogChange.version > _state['version'], CatalogChange.version <= latest)
+        .order_by(CatalogChange.version)
+    ).all()
+
+    if len({row.version for row in rows}) < latest - _state['version']:
+        # Some of the versions in between were pruned: patching would miss
+        # their changes, so rebuild everything.
+        current_app.logger.warning('Catalog changes after version %s are gone; rebuilding', _state['version'])
+        for listener, reset in _listeners:
+            _reset(listener, reset)
+    else:
+        changes = defaultdict(set)
+        for _, entity, entity_id in rows:
+            changes[entity].add(entity_id)
+        for listener, reset in _listeners:
+            try:
+                listener(changes)
+            except Exception:
+                current_app.logger.exception('Catalog listener %s failed; resetting it', listener.__qualname__)
+                _reset(listener, reset)
+    _state['version'] = latest
+
+
+def prune(retention=None):
+    """Delete change rows older than ``retention`` seconds; returns how many."""
+    if retention is None:
+        retention = current_app.config.get('CATALOG_CHANGE_RETENTION', 86400)
+    cutoff = datetime.utcnow() - timedelta(seconds=retention)
+    with db.engine.begin() as conn:
+        return conn.execute(delete(CatalogChange).where(CatalogChange.changed_at < cutoff)).rowcount
+
+
+def _maybe_prune(now):
+    if now >= _state['next_prune']:
+        _state['next_prune'] = now + current_app.config.get('CATALOG_PRUNE_SECONDS', 3600)
+        try:
+            prune()
+        except Exception:
+            current_app.logger.exception('Pruning the catalog change log failed')
+
+
+def reset():
+    """Forget the applied version (the next sync starts afresh)."""
+    _state['version'] = None
+    _state['next_poll'] = 0.0
+
+
+# -------------------------------------
+# SESSION HOOKS
+# -------------------------------------
+def _pending(session):
+    return session.info.setdefault('catalog_changes', set())
+
+
+def careers_using_skills(session, skill_ids):
+    """Ids of careers linked to any of ``skill_ids``."""
+    if not skill_ids:
+        return []
+    return session.connection().execute(
+        select(CareerSkill.career_id).where(CareerSkill.skill_id.in_(skill_ids))
+    ).scalars().all()
+
+
+def _take_version(session):
+    """The catalog version of the session's transaction, taken on its first change."""
+    version = session.info.get('catalog_version')
+    if version is None:
+        conn = session.connection()
+        bumped = conn.execute(
+            update(CatalogVersion).where(CatalogVersion.id == 1).values(version=CatalogVersion.version + 1)
+        )
+        if not bumped.rowcount:
+            # Schema built without the migration, which adds the row
+            conn.execute(insert(CatalogVersion).values(id=1, version=1))
+        version = conn.execute(select(CatalogVersion.version).where(CatalogVersion.id == 1)).scalar()
+        session.info['catalog_version'] = version
+    return version
+
+
+def record(session, changes):
+    """Log ``(entity, entity_id)`` changes in the session's transaction.
+
+    The flush hook calls this for ORM changes; bulk statements, which skip
+    the unit of work, call it themselves.
+    """
+    changes = set(changes)
+    if changes:
+        version = _take_version(session)
+        session.connection().execute(
+            CatalogChange.__table__.insert(),
+            [{'version': version, 'entity': entity, 'entity_id': entity_id} for entity, entity_id in changes],
+        )
+        session.info['catalog_committed'] = True
+
+
+@event.listens_for(Session, 'before_flush')
+def _before_flush(session, flush_context, instances):
+    # A renamed or deleted skill changes the text of every career that uses
+    # it; look those careers up while the career_skill rows still exist.
+    skills = [obj for obj in session.deleted if isinstance(obj, Skill)]
+    skills += [obj for obj in session.dirty if isinstance(obj, Skill) and session.is_modified(obj)]
+    skill_ids = [skill.skill_id for skill in skills if skill.skill_id is not None]
+    _pending(session).update(('career', career_id) for career_id in careers_using_skills(session, skill_ids))
+
+
+@event.listens_for(Session, 'after_flush')
+def _after_flush(session, flush_context):
+    pending = _pending(session)
+    changed = list(session.new) + list(session.deleted)
+    changed += [obj for obj in session.dirty if session.is_modified(obj)]
+    for obj in changed:
+        if isinstance(obj, Career):
+            pending.add(('career', obj.career_id))
+        elif isinstance(obj, CareerSkill):
+            pending.add(('career', obj.career_id))
+        elif isinstance(obj, Skill):
+            pending.add(('skill', obj.skill_id))
+        elif isinstance(obj, Community):
+            pending.add(('community', obj.community_id))
+        elif isinstance(obj, Professional):
+            pending.add(('professional', obj.professional_id))
+
+    record(session, pending)
+    pending.clear()
+
+
+@event.listens_for(Session, 'after_commit')
+def _after_commit(session):
+    # Our own change: pick it up on the next sync rather than after the
+    # poll interval.
+    session.info.pop('catalog_version', None)
+    if session.info.pop('catalog_committed', False):
+        _state['next_poll'] = 0.0
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _after_rollback(session, previous_transaction):
+    session.info.pop('catalog_changes', None)
+    session.info.pop('catalog_version', None)
+    session.info.pop('catalog_committed', None)
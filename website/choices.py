@@ -0,0 +1,48 @@
+import threading
+
+from flask import g
+from sqlalchemy import select
+
+from website import catalog
+from website.models import db, Career
+
+
+# -------------------------------------
+# CAREER CHOICES
+# -------------------------------------
+# Every admin form with a career dropdown needs the same
+# ``(career_id, career_name)`` list.  It is loaded once per process, shared
+# for the rest of the request through ``g``, and dropped when the catalog
+# log reports a career change (admin CRUD here or in another process).
+
+_cache = {'choices': None}
+_lock = threading.Lock()
+
+
+def clear_cache():
+    with _lock:
+        _cache['choices'] = None
+
+
+@catalog.on_change(reset=clear_cache)
+def _apply_catalog_changes(changes):
+    if changes.get('career'):
+        clear_cache()
+
+
+def career_choices():
+    """``[(career_id, career_name)]`` for SelectField choices."""
+    if 'career_choices' not in g:
+        catalog.sync()
+        with _lock:
+            choices = _cache['choices']
+        if choices is None:
+            choices = [
+                tuple(row) for row in
+                db.session.execute(select(Career.career_id, Career.career_name).order_by(Career.career_id))
+            ]
+            with _lock:
+                _cache['choices'] = choices
+        g.career_choices = choices
+    return g.career_choices
+
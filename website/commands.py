@@ -0,0 +1,591 @@
+import random
+import string
+import time
+from datetime import datetime
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import delete, insert, select
+
+from website.models import db, CareerRecommendation, User
+
+
+# =============================
+#   BATCH RECOMMENDATIONS
+# =============================
+@click.command('refresh-recommendations')
+@click.option('--since', type=click.DateTime(), default=None,
+              help='Only users whose last_login is on or after this time.')
+@click.option('--batch-size', default=1000, show_default=True)
+@click.option('--top-k', type=int, default=None, help='Defaults to RECOMMENDATIONS_PER_USER.')
+@click.option('--backend', type=click.Choice(['keyword', 'tfidf']), default=None,
+              help='Defaults to RECOMMENDER_BACKEND.')
+def refresh_recommendations(since, batch_size, top_k, backend):
+    """Recompute CareerRecommendation rows for every user.
+
+    Users are read in primary-key order, one batch per query, so memory
+    stays flat and no cursor stays open while batches are written.  Each
+    batch is ranked in one pass and its recommendations are replaced in a
+    single transaction.
+    """
+    from website.recommender import get_index, recommendation_rows
+
+    index = get_index(backend)
+    top_k = top_k or current_app.config.get('RECOMMENDATIONS_PER_USER', 1)
+
+    query = select(User.user_id, User.career_goal, User.strength).order_by(User.user_id).limit(batch_size)
+    if since is not None:
+        query = query.where(User.last_login >= since)
+
+    started = time.perf_counter()
+    last_id, users_done, rows_written = 0, 0, 0
+    while True:
+        users = db.session.execute(query.where(User.user_id > last_id)).all()
+        if not users:
+            break
+        last_id = users[-1].user_id
+
+        rows = recommendation_rows(index, users, top_k, datetime.utcnow())
+        # Every user of the batch, so that users who no longer get any
+        # recommendation lose their stale ones
+        db.session.execute(delete(CareerRecommendation).where(
+            CareerRecommendation.user_id.in_([user.user_id for user in users])))
+        if rows:
+            db.session.execute(insert(CareerRecommendation), rows)
+        db.session.commit()
+
+        users_done += len(users)
+        rows_written += len(rows)
+        elapsed = time.perf_counter() - started
+        click.echo(f'{users_done} users, {rows_written} rows, {rows_written / elapsed:.0f} rows/s')
+
+    click.echo(f'Done in {time.perf_counter() - started:.1f}s.')
+
+
+# =============================
+#        CATALOG IMPORT
+# =============================
+@click.command('import-catalog')
+@click.argument('kind', type=click.Choice(['careers', 'skills', 'professionals', 'communities']))
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']), default=None,
+              help='Defaults to the file extension.')
+@click.option('--on-duplicate', type=click.Choice(['skip', 'update']), default='skip', show_default=True,
+              help='What to do with rows whose name/email already exists.')
+@click.option('--chunk-size', default=1000, show_default=True)
+def import_catalog_command(kind, path, fmt, on_duplicate, chunk_size):
+    """Bulk-load catalog rows from a CSV or JSONL file."""
+    from website.importer import detect_format, import_catalog
+
+    fmt = fmt or detect_format(path)
+    if fmt is None:
+        raise click.UsageError('Cannot tell the format from the file name; pass --format.')
+
+    started = time.perf_counter()
+    with open(path, encoding='utf-8-sig', newline='') as stream:
+        summary = import_catalog(kind, stream, fmt, on_duplicate, chunk_size)
+
+    for problem in summary['problems']:
+        click.echo(problem)
+    click.echo(f"{summary['read']} rows read: {summary['inserted']} inserted, {summary['updated']} updated, "
+               f"{summary['duplicates']} duplicates, {summary['invalid']} invalid "
+               f"({time.perf_counter() - started:.1f}s).")
+
+
+@click.command('prune-catalog-changes')
+@click.option('--retention', type=int, default=None,
+              help='Keep rows younger than this many seconds. Defaults to CATALOG_CHANGE_RETENTION.')
+def prune_catalog_changes(retention):
+    """Delete old catalog change log rows (safe to run from cron)."""
+    from website.catalog import prune
+
+    click.echo(f'Removed {prune(retention)} catalog change rows.')
+
+
+# =============================
+#           EXPORT
+# =============================
+@click.command('export')
+@click.argument('table', type=click.Choice(['users', 'recommendations', 'careers', 'professionals', 'communities']))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']), default='csv', show_default=True)
+@click.option('--gzip', 'compress', is_flag=True, help='Gzip the output.')
+@click.option('--batch-size', default=1000, show_default=True)
+@click.option('-o', '--output', type=click.File('wb'), default='-', help='Defaults to stdout.')
+def export_command(table, fmt, compress, batch_size, output):
+    """Stream a table as CSV or JSONL."""
+    from website.exporter import export_chunks
+
+    for chunk in export_chunks(table, fmt, compress, batch_size):
+        output.write(chunk)
+
+
+# =============================
+#      DAILY USER STATS
+# =============================
+@click.command('backfill-user-stats')
+def backfill_user_stats():
+    """Rebuild the daily_user_stats rollup from the user table."""
+    from website.rollup import backfill
+
+    days = backfill()
+    click.echo(f'Rebuilt daily_user_stats: {days} days.')
+
+
+# =============================
+#     PASSWORD RESET CODES
+# =============================
+@click.command('sweep-otps')
+def sweep_otps():
+    """Delete expired password reset codes (safe to run from cron)."""
+    from website.otp import sweep
+
+    click.echo(f'Removed {sweep()} expired codes.')
+
+
+# =============================
+#          SESSIONS
+# =============================
+@click.command('sweep-sessions')
+def sweep_sessions():
+    """Delete expired server-side sessions in batches (safe to run from cron)."""
+    from website.sessions import sweep
+
+    click.echo(f'Removed {sweep(current_app._get_current_object())} expired sessions.')
+
+
+# =============================
+#        STATIC ASSETS
+# =============================
+@click.command('build-assets')
+def build_assets():
+    """Fingerprint and precompress the static files the templates use."""
+    from website.assets import assets_dir, build
+
+    app = current_app._get_current_object()
+    manifest, sizes = build(app)
+    for name, hashed in manifest.items():
+        counts = sizes[name]
+        compressed = ' '.join(f'{encoding} {counts[encoding]:>8d}' for encoding in ('gzip', 'br') if encoding in counts)
+        click.echo(f'{hashed:60s} {counts["raw"]:>8d} {compressed}')
+    click.echo(f'Wrote {len(manifest)} assets to {assets_dir(app)}.')
+
+
+# =============================
+#        BENCHMARKS
+# =============================
+bench = AppGroup('bench', help='Micro-benchmarks for hot code paths.')
+
+
+def _words(rng, count, vocabulary):
+    return " ".join(rng.choice(vocabulary) for _ in range(count))
+
+
+def _synthetic_catalog(rng, size):
+    vocabulary = [
+        "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 10)))
+        for _ in range(5000)
+    ]
+    rows = [
+        (
+            career_id,
+            f"{_words(rng, 2, vocabulary)} {career_id}",
+            _words(rng, 40, vocabulary),
+            [rng.choice(vocabulary) for _ in range(rng.randint(0, 6))],
+        )
+        for career_id in range(1, size + 1)
+    ]
+    return rows, vocabulary
+
+
+def _timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - start) / repeat
+
+
+@bench.command('recommend')
+@click.option('--careers', default=10000, show_default=True, help='Synthetic catalog size.')
+@click.option('--users', default=50, show_default=True, help='Keyword sets to rank.')
+@click.option('--seed', default=0, show_default=True)
+def bench_recommend(careers, users, seed):
+    """Compare the inverted index with the old full-catalog scan."""
+    from website.recommender import RecommendationIndex, career_text
+
+    rng = random.Random(seed)
+    rows, vocabulary = _synthetic_catalog(rng, careers)
+    queries = [
+        [rng.choice(vocabulary)[:rng.randint(2, 8)] for _ in range(rng.randint(1, 6))]
+        for _ in range(users)
+    ]
+
+    # The scan the dashboard used to run for every new user.
+    texts = [(row[0], career_text(row[1], row[2], row[3])) for row in rows]
+
+    def scan(keywords):
+        best_id, best_score = None, -1
+        for career_id, text in texts:
+            score = sum(word in text for word in keywords)
+            if score > best_score:
+                best_id, best_score = career_id, score
+        return best_id, best_score
+
+    _, build_time = _timed(lambda: RecommendationIndex.from_rows(rows), 1)
+    index = RecommendationIndex.from_rows(rows)
+
+    expected, scan_time = _timed(lambda: [scan(q) for q in queries], 1)
+    got, cold_time = _timed(lambda: [index.best(q) for q in queries], 1)
+    _, warm_time = _timed(lambda: [index.best(q) for q in queries], 5)
+
+    mismatches = sum(a != b for a, b in zip(expected, got))
+    click.echo(f'careers={careers} users={users}')
+    click.echo(f'index build      {build_time * 1000:10.1f} ms')
+    click.echo(f'full scan        {scan_time / users * 1000:10.3f} ms/user')
+    click.echo(f'index (cold)     {cold_time / users * 1000:10.3f} ms/user')
+    click.echo(f'index (warm)     {warm_time / users * 1000:10.3f} ms/user')
+    click.echo(f'speedup (cold)   {scan_time / cold_time:10.1f} x')
+    click.echo(f'mismatched picks {mismatches:10d}')
+
+
+@bench.command('tfidf')
+@click.option('--careers', default=50000, show_default=True, help='Synthetic catalog size.')
+@click.option('--users', default=200, show_default=True, help='Profiles to rank.')
+@click.option('--top-k', default=3, show_default=True)
+@click.option('--seed', default=0, show_default=True)
+def bench_tfidf(careers, users, top_k, seed):
+    """Time TF-IDF top-k ranking, one user at a time and in a batch."""
+    from website.recommender import TfidfIndex
+
+    rng = random.Random(seed)
+    rows, vocabulary = _synthetic_catalog(rng, careers)
+    queries = [[rng.choice(vocabulary) for _ in range(rng.randint(2, 8))] for _ in range(users)]
+
+    index, build_time = _timed(lambda: TfidfIndex.from_rows(rows), 1)
+    _, single_time = _timed(lambda: [index.top_k(q, top_k) for q in queries], 3)
+    _, batch_time = _timed(lambda: index.top_k_batch(queries, top_k), 3)
+
+    click.echo(f'careers={careers} users={users} vocabulary={len(index.vocabulary)}')
+    click.echo(f'matrix build     {build_time * 1000:10.1f} ms')
+    click.echo(f'top-{top_k} per user  {single_time / users * 1000:10.3f} ms/user')
+    click.echo(f'top-{top_k} batched   {batch_time / users * 1000:10.3f} ms/user')
+
+
+@bench.command('search')
+@click.option('--rows', default=100000, show_default=True, help='Communities and professionals to create.')
+@click.option('--queries', default=200, show_default=True)
+@click.option('--url', default='sqlite://', show_default=True,
+              help='Scratch database to fill; never point this at real data.')
+@click.option('--seed', default=0, show_default=True)
+def bench_search(rows, queries, url, seed):
+    """Compare the ILIKE scan, the dialect's full-text backend and the typeahead index."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+    from website.models import Career, Community, Professional
+    from website.search import BACKENDS, DIALECT_BACKENDS, SQLITE_FTS_DDL
+
+    rng = random.Random(seed)
+    rows_, vocabulary = _synthetic_catalog(rng, 200)
+    engine = create_engine(url)
+    db.metadata.create_all(engine, tables=[Career.__table__, Community.__table__, Professional.__table__])
+
+    with engine.begin() as conn:
+        if engine.dialect.name == 'sqlite':
+            for statement in SQLITE_FTS_DDL:
+                conn.exec_driver_sql(statement)
+        conn.execute(insert(Career), [
+            {'career_id': i, 'career_name': name, 'description': description, 'demand_level': 'High'}
+            for i, name, description, _ in rows_
+        ])
+        conn.execute(insert(Community), [
+            {'community_name': f'{_words(rng, 2, vocabulary)} {i}', 'description': _words(rng, 20, vocabulary),
+             'career_id': rng.randint(1, 200)}
+            for i in range(rows)
+        ])
+        conn.execute(insert(Professional), [
+            {'first_name': rng.choice(vocabulary), 'last_name': rng.choice(vocabulary),
+             'email': f'p{i}@example.com', 'linkedin_id': f'in-{i}', 'career_id': rng.randint(1, 200)}
+            for i in range(rows)
+        ])
+
+    terms = [rng.choice(vocabulary)[:rng.randint(3, 6)] for _ in range(queries)]
+    names = ['like', DIALECT_BACKENDS.get(engine.dialect.name, 'like')]
+    click.echo(f'{engine.dialect.name}: {rows} communities, {rows} professionals, {queries} queries')
+    with Session(engine) as session:
+        for name in dict.fromkeys(names):
+            backend = BACKENDS[name](session)
+            for kind in ('community_hits', 'professional_hits'):
+                search = getattr(backend, kind)
+                hits, elapsed = _timed(lambda: sum(len(search(term)) for term in terms), 1)
+                click.echo(f'{name:12s} {kind:17s} {elapsed / queries * 1000:9.3f} ms/query '
+                           f'{hits / queries:9.1f} hits/query')
+
+        from website.autocomplete import DirectoryIndex
+        index = DirectoryIndex()
+        _, build_time = _timed(lambda: index.load(session=session), 1)
+        click.echo(f'autocomplete index built in {build_time * 1000:.0f} ms')
+        for kind in ('community_hits', 'professional_hits'):
+            search = getattr(index, kind)
+            hits, elapsed = _timed(lambda: sum(len(search(term, 20)) for term in terms), 1)
+            click.echo(f'{"autocomplete":12s} {kind:17s} {elapsed / queries * 1000:9.3f} ms/query '
+                       f'{hits / queries:9.1f} hits/query (limit 20)')
+
+
+@bench.command('import')
+@click.option('--rows', default=100000, show_default=True, help='Careers in the synthetic file.')
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']), default='csv', show_default=True)
+@click.option('--chunk-size', default=1000, show_default=True)
+@click.option('--url', default='sqlite://', show_default=True,
+              help='Scratch database to fill; never point this at real data.')
+@click.option('--seed', default=0, show_default=True)
+def bench_import(rows, fmt, chunk_size, url, seed):
+    """Time a large careers import into an empty table, then again over it with --on-duplicate update."""
+    import csv
+    import io
+    import json
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+    from website.importer import CatalogImport, read_records
+    from website.models import Career, CareerSkill, CatalogChange, CatalogVersion, Skill
+
+    rng = random.Random(seed)
+    catalog_rows, _ = _synthetic_catalog(rng, rows)
+    records = [
+        {'career_name': name, 'description': description, 'demand_level': rng.choice(['High', 'Medium', 'Low']),
+         'average_salary': str(rng.randint(100, 5000) * 1000)}
+        for _, name, description, _ in catalog_rows
+    ]
+    # A few case variants of earlier names and a few rows the form rejects
+    for i in range(0, rows, 100):
+        records.append(dict(records[i], career_name=records[i]['career_name'].upper()))
+        records.append(dict(records[i], demand_level='Unknown'))
+
+    stream = io.StringIO()
+    if fmt == 'csv':
+        writer = csv.DictWriter(stream, fieldnames=list(records[0]))
+        writer.writeheader()
+        writer.writerows(records)
+    else:
+        stream.writelines(json.dumps(record) + '\n' for record in records)
+    text = stream.getvalue()
+
+    engine = create_engine(url)
+    db.metadata.create_all(engine, tables=[Career.__table__, Skill.__table__, CareerSkill.__table__,
+                                           CatalogChange.__table__, CatalogVersion.__table__])
+    click.echo(f'{engine.dialect.name}: {len(records)} {fmt} records, {len(text) / 1e6:.1f} MB, '
+               f'chunks of {chunk_size}')
+    with Session(engine) as session:
+        for on_duplicate in ('skip', 'update'):
+            job = CatalogImport('careers', on_duplicate, chunk_size, session=session)
+            summary, elapsed = _timed(lambda: job.run(read_records(io.StringIO(text), fmt)), 1)
+            click.echo(f'{on_duplicate:7s} {elapsed:7.2f} s {summary["read"] / elapsed:9.0f} rows/s  '
+                       f'{summary["inserted"]} inserted, {summary["updated"]} updated, '
+                       f'{summary["duplicates"]} duplicates, {summary["invalid"]} invalid')
+
+
+@bench.command('ratelimit')
+@click.option('--requests', 'count', default=200000, show_default=True)
+@click.option('--keys', default=10000, show_default=True, help='Distinct client IPs.')
+@click.option('--seed', default=0, show_default=True)
+def bench_ratelimit(count, keys, seed):
+    """Time one token-bucket check against the configured backend."""
+    from website.ratelimit import get_backend, parse_limit
+
+    rng = random.Random(seed)
+    backend = get_backend()
+    capacity, rate = parse_limit(current_app.config.get('RATELIMIT_PER_IP', '20/minute'))
+    ips = [f'bench:ip:10.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{i % 256}' for i in range(keys)]
+    sample = [rng.choice(ips) for _ in range(count)]
+
+    limited, elapsed = _timed(lambda: sum(bool(backend.hit(key, capacity, rate)) for key in sample), 1)
+    click.echo(f'{type(backend).__name__}: {count} checks over {keys} keys')
+    click.echo(f'per check        {elapsed / count * 1e6:10.2f} us')
+    click.echo(f'rejected         {limited:10d}')
+
+
+@bench.command('passwords')
+@click.option('--method', 'methods', multiple=True,
+              help='Werkzeug hash method to time; repeatable. Defaults to a range around PASSWORD_HASH_METHOD.')
+@click.option('--seconds', default=2.0, show_default=True, help='Time spent on each method.')
+def bench_passwords(methods, seconds):
+    """Report hashes per second per core for password hash settings."""
+    from website.passwords import current_method, hash_password
+
+    methods = methods or dict.fromkeys([
+        current_method(), 'scrypt:16384:8:1', 'scrypt:32768:8:1', 'scrypt:65536:8:1',
+        'pbkdf2:sha256:600000', 'pbkdf2:sha256:1000000',
+    ])
+    click.echo(f'current setting: {current_method()}')
+    for method in methods:
+        count, start = 0, time.perf_counter()
+        while time.perf_counter() - start < seconds:
+            hash_password('correct horse battery staple', method)
+            count += 1
+        per_hash = (time.perf_counter() - start) / count
+        click.echo(f'{method:24s} {per_hash * 1000:9.1f} ms/hash {1 / per_hash:9.1f} hashes/s/core')
+
+
+@bench.command('sessions')
+@click.option('--backend', 'backends', multiple=True, type=click.Choice(['cookie', 'memory', 'sqlalchemy']),
+              help='Session backend to time; repeatable. Defaults to cookie and memory.')
+@click.option('--requests', 'count', default=2000, show_default=True)
+def bench_sessions(backends, count):
+    """Cookie bytes and open+save time per dashboard-like request."""
+    from flask import Response, request
+    from flask.sessions import SecureCookieSessionInterface
+    from website.sessions import MemoryStore, ServerSessionInterface, SqlAlchemyStore
+
+    app = current_app._get_current_object()
+    stores = {'memory': MemoryStore, 'sqlalchemy': SqlAlchemyStore}
+    details = 'Based on your goals and strengths we recommend ' + 'Data Analyst. ' * 8
+    for backend in backends or ('cookie', 'memory'):
+        interface = SecureCookieSessionInterface() if backend == 'cookie' else ServerSessionInterface(stores[backend]())
+        name = interface.get_cookie_name(app)
+        cookie, sent, received, elapsed = None, 0, 0, 0.0
+        for i in range(count):
+            headers = {'Cookie': f'{name}={cookie}'} if cookie else {}
+            with app.test_request_context('/dashboard', headers=headers):
+                start = time.perf_counter()
+                session = interface.open_session(app, request)
+                if i == 0:
+                    session.update(user_id=1, csrf_token='x' * 40)
+                # views.dashboard flashes the recommendation and shows it in the same response
+                session.setdefault('_flashes', []).append(('info', details))
+                session.modified = True
+                session.pop('_flashes')
+                response = Response()
+                interface.save_session(app, session, response)
+                elapsed += time.perf_counter() - start
+            received += len(headers.get('Cookie', ''))
+            for header in response.headers.getlist('Set-Cookie'):
+                sent += len(header)
+                cookie = header.split(';', 1)[0].split('=', 1)[1]
+        click.echo(f'{backend:10s} {elapsed / count * 1e6:9.1f} us/request '
+                   f'{received / count:7.1f} B Cookie/request {sent / count:7.1f} B Set-Cookie/request')
+
+
+@bench.command('compression')
+@click.option('--seconds', default=0.5, show_default=True, help='Time spent on each payload and setting.')
+@click.option('--rows', default=5000, show_default=True, help='Rows in the synthetic JSON and CSV payloads.')
+@click.option('--seed', default=0, show_default=True)
+def bench_compression(seconds, rows, seed):
+    """CPU ms per MB and output size for each gzip level and brotli quality."""
+    import csv
+    import io
+    import json
+    import os
+
+    from website.compression import BrotliStream, GzipStream, brotli
+
+    rng = random.Random(seed)
+    vocabulary = [''.join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10))) for _ in range(2000)]
+    people = [
+        {'first_name': rng.choice(vocabulary).title(), 'last_name': rng.choice(vocabulary).title(),
+         'email': f'{rng.choice(vocabulary)}{i}@example.com', 'linkedin_id': f'in-{i}',
+         'career': ' '.join(_words(rng, 2, vocabulary)).title()}
+        for i in range(rows)
+    ]
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=list(people[0]))
+    writer.writeheader()
+    writer.writerows(people)
+    with open(os.path.join(current_app.root_path, 'templates', 'admin', 'admin_dashboard.html'), 'rb') as f:
+        html = f.read()
+    payloads = {
+        'admin html': html,
+        'search json': json.dumps({'results': people[:100], 'next_cursor': None}).encode(),
+        'export csv': buffer.getvalue().encode(),
+    }
+
+    settings = [(f'gzip -{level}', lambda level=level: GzipStream(level)) for level in (1, 3, 6, 9)]
+    if brotli is not None:
+        settings += [(f'br q{quality}', lambda quality=quality: BrotliStream(quality)) for quality in (1, 4, 6, 9, 11)]
+    else:
+        click.echo('brotli is not installed; timing gzip only.')
+
+    for name, data in payloads.items():
+        click.echo(f'{name}: {len(data)} bytes')
+        for setting, make_stream in settings:
+            count, start = 0, time.perf_counter()
+            while True:
+                stream = make_stream()
+                size = len(stream.compress(data) + stream.finish())
+                count += 1
+                elapsed = time.perf_counter() - start
+                if elapsed >= seconds:
+                    break
+            ms_per_mb = elapsed / count / (len(data) / 1e6) * 1000
+            click.echo(f'  {setting:10s} {ms_per_mb:9.1f} ms/MB {size:9d} bytes {size / len(data):7.1%}')
+
+
+@bench.command('json')
+@click.option('--rows', default=1000, show_default=True, help='Professionals in the search payload.')
+@click.option('--repeat', default=200, show_default=True)
+@click.option('--seed', default=0, show_default=True)
+def bench_json(rows, repeat, seed):
+    """Time a search_professionals-style response: ORM objects vs Row tuples, stdlib vs orjson."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+    from website import loaders
+    from website.jsonprovider import OrjsonProvider, RowJSONProvider, RowList, orjson
+    from website.models import Career, Professional
+    from website.views import PROFESSIONAL_RESULT
+
+    app = current_app._get_current_object()
+    rng = random.Random(seed)
+    vocabulary = [''.join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10))) for _ in range(2000)]
+    engine = create_engine('sqlite://')
+    db.metadata.create_all(engine, tables=[Career.__table__, Professional.__table__])
+    with engine.begin() as conn:
+        conn.execute(insert(Career), [
+            {'career_id': i, 'career_name': _words(rng, 2, vocabulary).title(), 'description': '', 'demand_level': 'High'}
+            for i in range(1, 201)
+        ])
+        conn.execute(insert(Professional), [
+            {'first_name': rng.choice(vocabulary).title(), 'last_name': rng.choice(vocabulary).title(),
+             'email': f'p{i}@example.com', 'linkedin_id': f'in-{i}', 'career_id': rng.randint(1, 200)}
+            for i in range(rows)
+        ])
+
+    def orm_dicts(session):
+        return [
+            {'first_name': p.first_name, 'last_name': p.last_name, 'email': p.email,
+             'linkedin_id': p.linkedin_id, 'career': p.career.career_name if p.career else None}
+            for p in session.scalars(select(Professional).options(*loaders.options('professional_directory')))
+        ]
+
+    def row_tuples(session):
+        return RowList(session.execute(PROFESSIONAL_RESULT))
+
+    paths = [('orm + dicts', orm_dicts, RowJSONProvider), ('rows', row_tuples, RowJSONProvider)]
+    if orjson is not None:
+        paths.append(('rows', row_tuples, OrjsonProvider))
+    else:
+        click.echo('orjson is not installed; timing the stdlib provider only.')
+
+    click.echo(f'{rows} rows, {repeat} responses per path')
+    bodies = set()
+    with Session(engine) as session:
+        for name, fetch, provider_class in paths:
+            provider = provider_class(app)
+            label = f'{name} / {"orjson" if provider_class is OrjsonProvider else "stdlib"}'
+            results, fetch_time = _timed(lambda: fetch(session), repeat)
+            response, encode_time = _timed(
+                lambda: provider.response({'results': results, 'next_cursor': None}), repeat)
+            bodies.add(response.get_data())
+            click.echo(f'{label:24s} fetch {fetch_time * 1000:8.2f} ms  encode {encode_time * 1000:8.2f} ms  '
+                       f'total {(fetch_time + encode_time) * 1000:8.2f} ms  {len(response.get_data())} bytes')
+    if len(bodies) != 1:
+        click.echo('warning: the paths produced different JSON bodies')
+
+
+def register_commands(app):
+    app.cli.add_command(refresh_recommendations)
+    app.cli.add_command(import_catalog_command)
+    app.cli.add_command(prune_catalog_changes)
+    app.cli.add_command(export_command)
+    app.cli.add_command(backfill_user_stats)
+    app.cli.add_command(sweep_otps)
+    app.cli.add_command(sweep_sessions)
+    app.cli.add_command(build_assets)
+    app.cli.add_command(bench)
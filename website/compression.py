@@ -0,0 +1,151 @@
+import zlib
+
+from werkzeug.datastructures import Headers
+from werkzeug.http import parse_accept_header
+
+try:  # brotli is optional; gzip is always available
+    import brotli
+except ImportError:  # pragma: no cover - depends on the deployment
+    brotli = None
+
+
+# -------------------------------------
+# RESPONSE COMPRESSION
+# -------------------------------------
+# WSGI middleware around the Flask app.  Text responses (HTML, JSON, CSS,
+# JS, CSV, JSONL) are compressed with brotli or gzip, whichever the
+# client prefers -- brotli on a tie.  Responses with a Content-Length
+# below COMPRESS_MIN_SIZE are sent as they are.  Buffered responses are
+# compressed in one go and keep an exact Content-Length; streamed ones
+# (no Content-Length, e.g. the admin exports) are compressed chunk by
+# chunk and flushed after each, so nothing is held back.  Responses that
+# already have a Content-Encoding (the precompressed /assets files) or
+# say no-transform are left alone.  Every compressible response carries
+# Vary: Accept-Encoding, compressed or not, and a compressed response's
+# ETag is made weak, since its bytes differ from the uncompressed one.
+
+DEFAULT_MIMETYPES = (
+    'text/html', 'text/css', 'text/plain', 'text/csv', 'text/javascript',
+    'application/javascript', 'application/json', 'application/x-ndjson', 'image/svg+xml',
+)
+
+
+class GzipStream:
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)   # wbits 31: gzip container
+
+    def compress(self, data):
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class BrotliStream:
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class CompressionMiddleware:
+    def __init__(self, app, min_size=500, gzip_level=6, brotli_quality=4, mimetypes=DEFAULT_MIMETYPES):
+        self.app = app
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.mimetypes = frozenset(mimetypes)
+
+    def choose_encoding(self, environ):
+        accepted = parse_accept_header(environ.get('HTTP_ACCEPT_ENCODING', ''))
+        candidates = [('br', accepted['br'])] if brotli is not None else []
+        candidates.append(('gzip', accepted['gzip']))
+        encoding, quality = max(candidates, key=lambda candidate: candidate[1])
+        return encoding if quality > 0 else None
+
+    def stream(self, encoding):
+        return BrotliStream(self.brotli_quality) if encoding == 'br' else GzipStream(self.gzip_level)
+
+    def __call__(self, environ, start_response):
+        captured = {}
+
+        def capture(status, headers, exc_info=None):
+            captured.update(status=status, headers=headers, exc_info=exc_info)
+            return self._write
+
+        # Flask calls start_response before returning its body iterable
+        # and never uses the legacy write() callable.
+        body = self.app(environ, capture)
+        status, headers = captured['status'], Headers(captured['headers'])
+
+        compressible = (
+            headers.get('Content-Type', '').split(';')[0].strip().lower() in self.mimetypes
+            and 'Content-Encoding' not in headers
+            and 'no-transform' not in headers.get('Cache-Control', '')
+            and not status.startswith(('204', '206', '304'))
+        )
+        # A 304 stands in for a 200 that may have been compressed
+        if compressible or status.startswith('304'):
+            vary = headers.get('Vary', '')
+            if 'accept-encoding' not in vary.lower():
+                headers['Vary'] = f'{vary}, Accept-Encoding' if vary else 'Accept-Encoding'
+
+        length = headers.get('Content-Length', type=int)
+        encoding = self.choose_encoding(environ) if compressible else None
+        if encoding is None or environ.get('REQUEST_METHOD') == 'HEAD' or (length is not None and length < self.min_size):
+            start_response(status, headers.to_wsgi_list(), captured['exc_info'])
+            return body
+
+        headers['Content-Encoding'] = encoding
+        etag = headers.get('ETag')
+        if etag and not etag.startswith('W/'):
+            headers['ETag'] = f'W/{etag}'
+        stream = self.stream(encoding)
+
+        if length is not None:
+            # Buffered response: already in memory, compress it whole
+            try:
+                data = b''.join(body)
+            finally:
+                if hasattr(body, 'close'):
+                    body.close()
+            compressed = stream.compress(data) + stream.finish()
+            headers['Content-Length'] = str(len(compressed))
+            start_response(status, headers.to_wsgi_list(), captured['exc_info'])
+            return [compressed]
+
+        start_response(status, headers.to_wsgi_list(), captured['exc_info'])
+        return self._compress_stream(stream, body)
+
+    @staticmethod
+    def _write(data):
+        raise NotImplementedError('CompressionMiddleware does not support write()')
+
+    @staticmethod
+    def _compress_stream(stream, body):
+        try:
+            for chunk in body:
+                if chunk:
+                    data = stream.compress(chunk)
+                    if data:
+                        yield data
+            yield stream.finish()
+        finally:
+            if hasattr(body, 'close'):
+                body.close()
+
+
+def init_app(app):
+    config = app.config
+    if not config.get('COMPRESS_ENABLED', True):
+        return
+    app.wsgi_app = CompressionMiddleware(
+        app.wsgi_app,
+        min_size=config.get('COMPRESS_MIN_SIZE', 500),
+        gzip_level=config.get('COMPRESS_LEVEL', 6),
+        brotli_quality=config.get('COMPRESS_BROTLI_QUALITY', 4),
+    )
@@ -5,6 +5,118 @@ class GeneralConfig:
     ADMIN_EMAIL = os.environ.get('ADMIN_EMAIL', 'admin@pathway.com')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Career recommendations: 'keyword' (substring index) or 'tfidf'
+    # (cosine similarity, needs numpy and scipy installed)
+    RECOMMENDER_BACKEND = os.environ.get('RECOMMENDER_BACKEND', 'keyword')
+    RECOMMENDATIONS_PER_USER = int(os.environ.get('RECOMMENDATIONS_PER_USER', 3))
+
+    # How often each worker checks catalog_change for admin edits
+    CATALOG_POLL_SECONDS = float(os.environ.get('CATALOG_POLL_SECONDS', 5))
+
+    # catalog_change rows older than CATALOG_CHANGE_RETENTION seconds are
+    # pruned every CATALOG_PRUNE_SECONDS; a worker idle for longer rebuilds
+    CATALOG_CHANGE_RETENTION = int(os.environ.get('CATALOG_CHANGE_RETENTION', 86400))
+    CATALOG_PRUNE_SECONDS = float(os.environ.get('CATALOG_PRUNE_SECONDS', 3600))
+
+    # Directory search: 'autocomplete' (in-memory typeahead index), 'auto'
+    # (FULLTEXT on MySQL, FTS5 on SQLite), or force 'fulltext', 'fts5', 'like'
+    SEARCH_BACKEND = os.environ.get('SEARCH_BACKEND', 'autocomplete')
+    # Build the typeahead index in the background at startup rather than
+    # in the first search request
+    AUTOCOMPLETE_PRELOAD = os.environ.get('AUTOCOMPLETE_PRELOAD', '1') == '1'
+    SEARCH_RESULT_LIMIT = int(os.environ.get('SEARCH_RESULT_LIMIT', 20))
+    SEARCH_MAX_LIMIT = int(os.environ.get('SEARCH_MAX_LIMIT', 100))
+
+    # Rows per page on /community and /professional (more load on scroll)
+    DIRECTORY_PAGE_SIZE = int(os.environ.get('DIRECTORY_PAGE_SIZE', 24))
+
+    # Rows per page in the admin dashboard tables
+    ADMIN_PAGE_SIZE = int(os.environ.get('ADMIN_PAGE_SIZE', 50))
+
+    # Seconds the admin dashboard user counters are cached per process
+    ADMIN_METRICS_TTL = float(os.environ.get('ADMIN_METRICS_TTL', 60))
+
+    # Daily user stats buffer: flush after this many events or seconds
+    ROLLUP_FLUSH_SIZE = int(os.environ.get('ROLLUP_FLUSH_SIZE', 100))
+    ROLLUP_FLUSH_SECONDS = float(os.environ.get('ROLLUP_FLUSH_SECONDS', 30))
+
+    # Outgoing mail queue: worker threads, messages per SMTP connection,
+    # attempts per message and the first retry delay in seconds.
+    # MAIL_QUEUE_SYNC=1 sends inline instead (e.g. for debugging)
+    MAIL_QUEUE_WORKERS = int(os.environ.get('MAIL_QUEUE_WORKERS', 1))
+    MAIL_QUEUE_BATCH = int(os.environ.get('MAIL_QUEUE_BATCH', 20))
+    MAIL_QUEUE_RETRIES = int(os.environ.get('MAIL_QUEUE_RETRIES', 3))
+    MAIL_QUEUE_BACKOFF = float(os.environ.get('MAIL_QUEUE_BACKOFF', 2))
+    MAIL_QUEUE_SYNC = os.environ.get('MAIL_QUEUE_SYNC') == '1'
+
+    # Password reset codes: lifetime, wrong guesses allowed, and how often
+    # expired codes are swept from the table
+    OTP_TTL_SECONDS = int(os.environ.get('OTP_TTL_SECONDS', 600))
+    OTP_MAX_ATTEMPTS = int(os.environ.get('OTP_MAX_ATTEMPTS', 5))
+    OTP_SWEEP_SECONDS = float(os.environ.get('OTP_SWEEP_SECONDS', 300))
+
+
+    # Sign-in, sign-up, reset and admin login POSTs per client IP and per
+    # account email ("N/second|minute|hour|day").  'memory://' keeps the
+    # buckets per process; a redis:// URL shares them between workers
+    RATELIMIT_ENABLED = os.environ.get('RATELIMIT_ENABLED', '1') == '1'
+    RATELIMIT_PER_IP = os.environ.get('RATELIMIT_PER_IP', '20/minute')
+    RATELIMIT_PER_ACCOUNT = os.environ.get('RATELIMIT_PER_ACCOUNT', '5/minute')
+    RATELIMIT_STORAGE_URL = os.environ.get('RATELIMIT_STORAGE_URL', 'memory://')
+
+
+    # Password hashing in Werkzeug's syntax, e.g. 'scrypt:32768:8:1' or
+    # 'pbkdf2:sha256:600000'; older hashes are upgraded at login.  Use
+    # `flask bench passwords` to pick a cost for this hardware
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+
+    # Where session data lives: 'sqlalchemy' (web_session table), 'memory'
+    # (per-process LRU, single worker only) or 'cookie' (Flask's signed
+    # cookie).  Expired sessions are deleted in batches of SESSION_SWEEP_BATCH
+    SESSION_BACKEND = os.environ.get('SESSION_BACKEND', 'sqlalchemy')
+    SESSION_MEMORY_MAX_ENTRIES = int(os.environ.get('SESSION_MEMORY_MAX_ENTRIES', 10000))
+    # Sessions read from the sqlalchemy store are reused by this process for
+    # up to SESSION_CACHE_SECONDS while unchanged (0 reads the table always)
+    SESSION_CACHE_SECONDS = float(os.environ.get('SESSION_CACHE_SECONDS', 60))
+    SESSION_CACHE_MAX_ENTRIES = int(os.environ.get('SESSION_CACHE_MAX_ENTRIES', 10000))
+    SESSION_SWEEP_SECONDS = float(os.environ.get('SESSION_SWEEP_SECONDS', 300))
+    SESSION_SWEEP_BATCH = int(os.environ.get('SESSION_SWEEP_BATCH', 1000))
+
+    # Log requests that run one SQL statement more than NPLUSONE_THRESHOLD
+    # times (likely N+1 lazy loads).  Always on in debug mode
+    NPLUSONE_DETECT = os.environ.get('NPLUSONE_DETECT') == '1'
+    NPLUSONE_THRESHOLD = int(os.environ.get('NPLUSONE_THRESHOLD', 5))
+
+    # Output of `flask build-assets` (default: static/dist) and how long
+    # browsers may cache the fingerprinted files, in seconds
+    ASSETS_DIR = os.environ.get('ASSETS_DIR')
+    ASSETS_MAX_AGE = int(os.environ.get('ASSETS_MAX_AGE', 31536000))
+
+    # Seconds browsers may reuse public pages before revalidating them (0:
+    # always revalidate, a 304 when unchanged) and seconds browsers and
+    # shared caches may reuse search results.  Everything else is no-store
+    CACHE_PAGE_MAX_AGE = int(os.environ.get('CACHE_PAGE_MAX_AGE', 0))
+    CACHE_SEARCH_MAX_AGE = int(os.environ.get('CACHE_SEARCH_MAX_AGE', 60))
+
+    # Rendered public pages: 'memory://' keeps up to PAGE_CACHE_MAX_BYTES
+    # per process; a redis:// URL shares them between workers
+    PAGE_CACHE_ENABLED = os.environ.get('PAGE_CACHE_ENABLED', '1') == '1'
+    PAGE_CACHE_URL = os.environ.get('PAGE_CACHE_URL', 'memory://')
+    PAGE_CACHE_MAX_BYTES = int(os.environ.get('PAGE_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+    PAGE_CACHE_TTL = int(os.environ.get('PAGE_CACHE_TTL', 300))
+
+    # Compress text responses of at least COMPRESS_MIN_SIZE bytes with gzip
+    # (level 1-9) or brotli (quality 0-11, needs the brotli package).  Use
+    # `flask bench compression` to weigh CPU per MB against size
+    COMPRESS_ENABLED = os.environ.get('COMPRESS_ENABLED', '1') == '1'
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 500))
+    COMPRESS_LEVEL = int(os.environ.get('COMPRESS_LEVEL', 6))
+    COMPRESS_BROTLI_QUALITY = int(os.environ.get('COMPRESS_BROTLI_QUALITY', 4))
+
+    # JSON encoder: 'auto' uses orjson when installed, else the stdlib;
+    # 'orjson' requires it, 'stdlib' never uses it
+    JSON_PROVIDER = os.environ.get('JSON_PROVIDER', 'auto')
+
 
 class TestConfig(GeneralConfig):
 #     # SQLALCHEMY_DATABASE_URI = "mysql+pymysql://root@localhost/path_db"
@@ -0,0 +1,96 @@
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+
+from sqlalchemy import select
+
+from website.models import db, Career, CareerRecommendation, Community, Professional, User
+
+
+# -------------------------------------
+# STREAMING EXPORT
+# -------------------------------------
+# Tables are read in primary-key order, one bounded keyset query per batch
+# on a connection that is returned to the pool straight afterwards.  Only
+# one batch is ever in memory, and no transaction stays open while the
+# client downloads, so writers are never blocked by an export however long
+# it runs.  Each batch is encoded (CSV or JSONL) and, optionally, gzipped
+# before it is yielded.
+
+EXPORTS = {
+    'users': (User, [c for c in User.__table__.c if c.key != 'password_hash']),
+    'recommendations': (CareerRecommendation, list(CareerRecommendation.__table__.c)),
+    'careers': (Career, list(Career.__table__.c)),
+    'professionals': (Professional, list(Professional.__table__.c)),
+    'communities': (Community, list(Community.__table__.c)),
+}
+FORMATS = {'csv': 'text/csv', 'jsonl': 'application/x-ndjson'}
+
+
+def _json_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def batches(table, batch_size=1000):
+    """Yield lists of row tuples of ``table``, ``batch_size`` rows at a time."""
+    model, columns = EXPORTS[table]
+    key = list(model.__table__.primary_key)[0]
+    position = next(i for i, column in enumerate(columns) if column is key)
+    last = None
+    while True:
+        stmt = select(*columns).order_by(key).limit(batch_size)
+        if last is not None:
+            stmt = stmt.where(key > last)
+        with db.engine.connect() as conn:
+            rows = conn.execute(stmt).all()
+        if not rows:
+            return
+        yield rows
+        last = rows[-1][position]
+
+
+def encode(table, fmt, batch_size=1000):
+    """Yield the export of ``table`` as ``fmt`` text, one chunk per batch."""
+    names = [column.key for column in EXPORTS[table][1]]
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(names)
+        for rows in batches(table, batch_size):
+            writer.writerows(rows)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+    else:
+        for rows in batches(table, batch_size):
+            yield ''.join(
+                json.dumps(dict(zip(names, row)), default=_json_value, ensure_ascii=False) + '\n'
+                for row in rows
+            )
+
+
+def export_chunks(table, fmt, compress=False, batch_size=1000):
+    """Yield the encoded export as bytes, gzipped on the fly if ``compress``."""
+    if not compress:
+        for chunk in encode(table, fmt, batch_size):
+            yield chunk.encode('utf-8')
+        return
+    gzip = zlib.compressobj(6, zlib.DEFLATED, 31)   # wbits 31: gzip container
+    for chunk in encode(table, fmt, batch_size):
+        data = gzip.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield gzip.flush()
+
+
+def export_filename(table, fmt, compress=False):
+    return f"{table}.{fmt}{'.gz' if compress else ''}"
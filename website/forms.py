@@ -1,4 +1,5 @@
 from flask_wtf import FlaskForm
+from flask_wtf.file import FileAllowed, FileField, FileRequired
 from wtforms import StringField,SubmitField,PasswordField,BooleanField, SelectField, TextAreaField, DecimalField
 from wtforms.validators import Email, EqualTo, Length, DataRequired, NumberRange, Optional, URL
 
@@ -56,7 +57,6 @@ class OtpForm(FlaskForm):
     submit = SubmitField('Submit')
 
 class ResetPasswordForm(FlaskForm):
-    email = StringField('OTP',  validators=[DataRequired()])
     password = PasswordField('Password',validators=[DataRequired(message="Please create a password."),Length(min=6, message="Password must be at least 6 characters long.")])
     confirm_password = PasswordField('Confirm Password',validators=[DataRequired(message="Please confirm your password."),EqualTo('password', message="Passwords do not match.")])
     submit = SubmitField('Submit')
@@ -158,4 +158,20 @@ class CommunityForm(FlaskForm):
     submit = SubmitField('Add Community')
 
 
+class ImportCatalogForm(FlaskForm):
+    kind = SelectField(
+        'Import',
+        choices=[('careers', 'Careers'), ('skills', 'Skills'), ('professionals', 'Professionals'), ('communities', 'Communities')]
+    )
+
+    on_duplicate = SelectField(
+        'Existing rows',
+        choices=[('skip', 'Skip and report'), ('update', 'Update')]
+    )
+
+    file = FileField(
+        'CSV or JSONL file',
+        validators=[FileRequired(), FileAllowed(['csv', 'jsonl', 'ndjson'], message="Upload a .csv or .jsonl file.")]
+    )
 
+    submit = SubmitField('Import')
@@ -0,0 +1,237 @@
+import csv
+import json
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from werkzeug.datastructures import MultiDict
+
+from website import catalog
+from website.choices import career_choices
+from website.forms import AddSkillForm, CareerForm, CommunityForm, ProfessionalForm
+from website.models import db, Career, Community, Professional, Skill
+
+
+# -------------------------------------
+# BULK CATALOG IMPORT
+# -------------------------------------
+# CSV and JSONL files are read one record at a time.  Records are checked
+# with the admin forms' WTForms rules -- one form per import, re-processed
+# for every record -- and written in chunks as executemany INSERTs (and
+# UPDATEs by primary key when existing rows are to be overwritten), one
+# transaction per chunk.  A record whose unique name / email / linkedin_id
+# is already taken, in the database or earlier in the file, is skipped and
+# reported as a duplicate.  Unique values are compared lower-cased on both
+# sides, so "Data" in the table and "data" in the file clash on SQLite and
+# PostgreSQL just as they do under MySQL's case-insensitive collation.
+
+FORMATS = ('csv', 'jsonl')
+MAX_REPORTED = 50
+
+
+def _strip(value):
+    return value.strip() if isinstance(value, str) else value
+
+
+def _clean_professional(values):
+    values['first_name'] = values['first_name'].strip()
+    values['last_name'] = values['last_name'].strip()
+    values['email'] = values['email'].strip().lower()
+    values['linkedin_id'] = values['linkedin_id'].strip()
+    return values
+
+
+def _clean_community(values):
+    values['community_name'] = values['community_name'].strip()
+    values['description'] = _strip(values['description']) or None
+    values['community_link'] = _strip(values['community_link']) or None
+    return values
+
+
+KINDS = {
+    'skills': {
+        'model': Skill, 'form': AddSkillForm, 'entity': 'skill',
+        'unique': ('skill_name',), 'clean': None,
+    },
+    'careers': {
+        'model': Career, 'form': CareerForm, 'entity': 'career',
+        'unique': ('career_name',), 'clean': None,
+    },
+    'professionals': {
+        'model': Professional, 'form': ProfessionalForm, 'entity': 'professional',
+        'unique': ('email', 'linkedin_id'), 'clean': _clean_professional,
+    },
+    'communities': {
+        'model': Community, 'form': CommunityForm, 'entity': 'community',
+        'unique': ('community_name',), 'clean': _clean_community,
+    },
+}
+
+
+def detect_format(filename):
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    return {'csv': 'csv', 'jsonl': 'jsonl', 'ndjson': 'jsonl'}.get(extension)
+
+
+def read_records(stream, fmt):
+    """Yield ``(line, record)`` from a text stream; ``record`` is None if unparseable."""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+    else:
+        for line, text in enumerate(stream, 1):
+            if not text.strip():
+                continue
+            try:
+                record = json.loads(text)
+            except ValueError:
+                record = None
+            yield line, record if isinstance(record, dict) else None
+
+
+class CatalogImport:
+    """Validate and write one file's worth of ``kind`` records."""
+
+    def __init__(self, kind, on_duplicate='skip', chunk_size=1000, session=None):
+        self.spec = KINDS[kind]
+        self.session = session or db.session
+        self.kind = kind
+        self.on_duplicate = on_duplicate
+        self.chunk_size = chunk_size
+
+        self.model = self.spec['model']
+        self.key = self.model.__mapper__.primary_key[0]
+        self.form = self.spec['form'](formdata=None, meta={'csrf': False})
+        self.fields = [field.name for field in self.form if field.name not in ('submit', 'csrf_token')]
+        self.career_ids = {}
+        if 'career_id' in self.fields:
+            self.form.career_id.choices = career_choices()
+            self.career_ids = {name.casefold(): career_id for career_id, name in career_choices()}
+
+        self.seen = {column: set() for column in self.spec['unique']}
+        self.summary = {
+            'kind': kind, 'read': 0, 'inserted': 0, 'updated': 0,
+            'duplicates': 0, 'invalid': 0, 'problems': [],
+        }
+
+    def _problem(self, line, message):
+        if len(self.summary['problems']) < MAX_REPORTED:
+            self.summary['problems'].append(f'line {line}: {message}')
+
+    def validate(self, record):
+        """Model values for ``record``, or ``None`` with the errors reported."""
+        values = {name: '' if value is None else str(value) for name, value in record.items() if name}
+        # Files may name the career instead of giving its id.
+        if self.career_ids and not values.get('career_id') and values.get('career_name'):
+            values['career_id'] = str(self.career_ids.get(values['career_name'].strip().casefold(), ''))
+
+        self.form.process(formdata=MultiDict(values))
+        if not self.form.validate():
+            errors = '; '.join(f'{name}: {", ".join(messages)}' for name, messages in self.form.errors.items())
+            return None, errors
+
+        values = {name: self.form[name].data for name in self.fields}
+        clean = self.spec['clean']
+        return (clean(values) if clean else values), None
+
+    def run(self, records):
+        chunk = []
+        for line, record in records:
+            self.summary['read'] += 1
+            if record is None:
+                self.summary['invalid'] += 1
+                self._problem(line, 'could not be parsed')
+                continue
+            values, errors = self.validate(record)
+            if values is None:
+                self.summary['invalid'] += 1
+                self._problem(line, errors)
+                continue
+            chunk.append((line, values))
+            if len(chunk) >= self.chunk_size:
+                self._write(chunk)
+                chunk = []
+        if chunk:
+            self._write(chunk)
+        return self.summary
+
+    def _existing(self, rows):
+        """For each unique column: lower-cased value -> primary key of the row holding it."""
+        existing = {}
+        for column in self.spec['unique']:
+            attribute = getattr(self.model, column)
+            values = list({values[column].lower() for _, values in rows if values.get(column)})
+            found = self.session.execute(
+                select(attribute, self.key).where(func.lower(attribute).in_(values))
+            ) if values else []
+            existing[column] = {value.lower(): key for value, key in found}
+        return existing
+
+    def _write(self, chunk):
+        unique = self.spec['unique']
+        rows = []
+        for line, values in chunk:
+            clash = next((c for c in unique if values.get(c) and values[c].lower() in self.seen[c]), None)
+            if clash:
+                self.summary['duplicates'] += 1
+                self._problem(line, f'duplicate {clash} {values[clash]!r} earlier in the file')
+                continue
+            for column in unique:
+                if values.get(column):
+                    self.seen[column].add(values[column].lower())
+            rows.append((line, values))
+
+        existing = self._existing(rows)
+        natural_key = unique[0]
+        inserts, updates = [], []
+        for line, values in rows:
+            row_key = existing[natural_key].get(values[natural_key].lower())
+            clash = next((
+                c for c in unique[1:]
+                if values.get(c) and existing[c].get(values[c].lower(), row_key) != row_key
+            ), None)
+            if clash is None and row_key is not None and self.on_duplicate != 'update':
+                clash = natural_key
+            if clash:
+                self.summary['duplicates'] += 1
+                self._problem(line, f'{clash} {values[clash]!r} already exists')
+            elif row_key is not None:
+                updates.append({self.key.key: row_key, **values})
+            else:
+                inserts.append(values)
+
+        entity = self.spec['entity']
+        try:
+            if inserts:
+                self.session.execute(insert(self.model), inserts)
+                attribute = getattr(self.model, natural_key)
+                new_ids = self.session.execute(
+                    select(self.key).where(attribute.in_([values[natural_key] for values in inserts]))
+                ).scalars().all()
+            else:
+                new_ids = []
+            if updates:
+                self.session.execute(update(self.model), updates)
+
+            changed = [(entity, key) for key in new_ids]
+            changed += [(entity, values[self.key.key]) for values in updates]
+            if self.kind == 'skills' and updates:
+                # Renamed skills change the text of the careers using them.
+                skill_ids = [values[self.key.key] for values in updates]
+                changed += [('career', key) for key in catalog.careers_using_skills(self.session, skill_ids)]
+            catalog.record(self.session, changed)
+            self.session.commit()
+        except IntegrityError as e:
+            # Lost a race with another writer; report the chunk and go on.
+            self.session.rollback()
+            self.summary['duplicates'] += len(inserts) + len(updates)
+            self._problem(chunk[0][0], f'chunk rejected: {e.orig}')
+            return
+
+        self.summary['inserted'] += len(inserts)
+        self.summary['updated'] += len(updates)
+
+
+def import_catalog(kind, stream, fmt, on_duplicate='skip', chunk_size=1000):
+    """Import ``kind`` records from a text ``stream``; returns the summary dict."""
+    return CatalogImport(kind, on_duplicate, chunk_size).run(read_records(stream, fmt))
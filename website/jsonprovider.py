@@ -0,0 +1,95 @@
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy.engine import Row
+
+try:  # orjson is optional; the stdlib json module is the fallback
+    import orjson
+except ImportError:  # pragma: no cover - depends on the deployment
+    orjson = None
+
+
+# -------------------------------------
+# JSON PROVIDER
+# -------------------------------------
+# jsonify() and every JSON response go through app.json.  This provider
+# uses orjson when it is installed -- several times faster than the
+# stdlib encoder, and it writes bytes, so the response body is not
+# encoded twice -- and falls back to Flask's default encoder otherwise.
+# Either way, query results serialize as objects keyed by their column
+# labels, so the search APIs hand over rows as they are: a RowList names
+# its columns once for the whole result (Row._asdict() would look them up
+# again for every row), and a lone Row is handled as well.
+# Responses carry the same JSON as with the default provider -- sorted
+# keys, compact unless pretty-printing, HTTP dates for datetimes -- except
+# that non-ASCII text is sent as UTF-8 rather than \u escapes.
+
+
+class RowList:
+    """The rows of a query result, serialized as a list of objects."""
+
+    __slots__ = ('keys', 'rows')
+
+    def __init__(self, result):
+        self.keys = tuple(result.keys())
+        self.rows = result.all()
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, index):
+        return self.rows[index]
+
+    def records(self):
+        keys = self.keys
+        return [dict(zip(keys, row)) for row in self.rows]
+
+
+class RowJSONProvider(DefaultJSONProvider):
+    """Flask's JSON provider, plus query result support."""
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, RowList):
+            return o.records()
+        if isinstance(o, Row):
+            return o._asdict()
+        return DefaultJSONProvider.default(o)
+
+
+class OrjsonProvider(RowJSONProvider):
+    """orjson with the default provider's output conventions."""
+
+    def _options(self, pretty=False):
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if pretty:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            # Options orjson does not have (e.g. a custom cls); use stdlib
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._options()).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = self.compact is False or (self.compact is None and self._app.debug)
+        body = orjson.dumps(obj, default=self.default, option=self._options(pretty) | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def init_app(app):
+    provider = app.config.get('JSON_PROVIDER', 'auto')
+    if provider == 'orjson' and orjson is None:
+        raise RuntimeError("JSON_PROVIDER 'orjson' requires the 'orjson' package.")
+    use_orjson = orjson is not None and provider in ('auto', 'orjson')
+    app.json = (OrjsonProvider if use_orjson else RowJSONProvider)(app)
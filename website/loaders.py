@@ -0,0 +1,29 @@
+from sqlalchemy.orm import joinedload
+
+from website.models import Career, CareerRecommendation, Professional
+
+
+# -------------------------------------
+# LOADER PRESETS
+# -------------------------------------
+# Named eager-loading options for queries whose rows are rendered with
+# their related rows.  Lazy loading would issue one more query per row
+# (N+1); with these the number of queries stays the same however many
+# rows come back.  Many-to-one relationships are joined into the query
+# (collections would use selectinload: one SELECT ... IN per page).
+
+LOADERS = {
+    # Directory cards show each professional's career
+    'professional_directory': (
+        joinedload(Professional.career).load_only(Career.career_id, Career.career_name),
+    ),
+    # The dashboard shows the career a recommendation points to
+    'recommendation_career': (
+        joinedload(CareerRecommendation.career).load_only(Career.career_id, Career.career_name),
+    ),
+}
+
+
+def options(name):
+    """The loader options registered as ``name``."""
+    return LOADERS[name]
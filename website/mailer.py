@@ -0,0 +1,168 @@
+import atexit
+import heapq
+import itertools
+import queue
+import threading
+import time
+
+from flask import current_app
+
+from website import mail
+
+
+# -------------------------------------
+# BACKGROUND MAIL QUEUE
+# -------------------------------------
+# Views hand messages to send() and return at once.  Worker threads take
+# whatever is waiting (up to MAIL_QUEUE_BATCH messages), send it over one
+# SMTP connection and close it, so a burst of resets costs one handshake
+# instead of one per message.  A message the relay refuses is set aside
+# with a due time after an exponential backoff, and the rest of the batch
+# goes on over a fresh connection; if the relay cannot be reached at all,
+# the whole batch is set aside.  Workers take due retries before new mail
+# and never sleep on a backoff, so one failing message or relay does not
+# hold up the queue.  A message that fails MAIL_QUEUE_RETRIES times is
+# logged and dropped.
+
+
+class MailQueue:
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._retries = []          # heap of (due, seq, message, attempts)
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._workers = []
+        self._app = None
+        self.counters = {'queued': 0, 'sent': 0, 'retried': 0, 'failed': 0, 'connections': 0}
+
+    def send(self, message):
+        """Queue a Flask-Mail ``message`` for delivery."""
+        self._start(current_app._get_current_object())
+        self._count('queued')
+        self._queue.put((message, 0))
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats['delayed'] = len(self._retries)
+        stats['depth'] = self._queue.qsize()
+        stats['workers'] = sum(worker.is_alive() for worker in self._workers)
+        return stats
+
+    def join(self, timeout=None):
+        """Wait until everything queued so far is sent or dropped."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def _start(self, app):
+        with self._lock:
+            self._app = app
+            self._workers = [worker for worker in self._workers if worker.is_alive()]
+            for _ in range(app.config.get('MAIL_QUEUE_WORKERS', 1) - len(self._workers)):
+                worker = threading.Thread(target=self._work, name='mail-queue', daemon=True)
+                worker.start()
+                self._workers.append(worker)
+
+    def _take_batch(self, size):
+        """Up to ``size`` messages: retries that are due, then new mail."""
+        while True:
+            batch = []
+            with self._lock:
+                now = time.monotonic()
+                while self._retries and self._retries[0][0] <= now and len(batch) < size:
+                    _, _, message, attempts = heapq.heappop(self._retries)
+                    batch.append((message, attempts))
+                wait = self._retries[0][0] - now if self._retries else None
+            if not batch:
+                try:
+                    batch.append(self._queue.get(timeout=wait))
+                except queue.Empty:
+                    continue    # a retry has come due
+            while len(batch) < size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            return batch
+
+    def _retry_later(self, app, messages):
+        backoff = app.config.get('MAIL_QUEUE_BACKOFF', 2.0)
+        now = time.monotonic()
+        with self._lock:
+            for message, attempts in messages:
+                heapq.heappush(self._retries, (now + backoff * 2 ** (attempts - 1), next(self._seq), message, attempts))
+
+    def _work(self):
+        while True:
+            app = self._app
+            batch = self._take_batch(app.config.get('MAIL_QUEUE_BATCH', 20))
+            again = []
+            try:
+                with app.app_context():
+                    again = self._deliver(app, batch)
+            except Exception:
+                app.logger.exception('Mail queue worker error')
+            finally:
+                # A message waiting for a retry is still an unfinished task
+                self._retry_later(app, again)
+                for _ in range(len(batch) - len(again)):
+                    self._queue.task_done()
+
+    def _deliver(self, app, batch):
+        """Send ``batch``; returns the ``(message, attempts)`` to try again later."""
+        retries = app.config.get('MAIL_QUEUE_RETRIES', 3)
+        pending, again = list(batch), []
+        while pending:
+            connected = False
+            try:
+                with mail.connect() as connection:
+                    connected = True
+                    self._count('connections')
+                    while pending:
+                        connection.send(pending[0][0])
+                        pending.pop(0)
+                        self._count('sent')
+            except Exception:
+                if not pending:
+                    break       # everything went out; only closing the connection failed
+                # No relay: the whole batch waits.  A refused message: only it does.
+                failed, pending = (pending, []) if not connected else (pending[:1], pending[1:])
+                for message, attempts in failed:
+                    attempts += 1
+                    if attempts >= retries:
+                        self._count('failed')
+                        app.logger.exception('Dropping mail to %s after %d attempts', message.recipients, attempts)
+                    else:
+                        self._count('retried')
+                        again.append((message, attempts))
+        return again
+
+
+_mail_queue = MailQueue()
+
+
+def send(message):
+    """Send ``message`` in the background (synchronously when MAIL_QUEUE_SYNC is set)."""
+    if current_app.config.get('MAIL_QUEUE_SYNC'):
+        mail.send(message)
+    else:
+        _mail_queue.send(message)
+
+
+def stats():
+    """Queue depth and delivery counters for this process."""
+    return _mail_queue.stats()
+
+
+@atexit.register
+def _drain_at_exit():
+    # Give queued mail a moment to go out before the process exits.
+    _mail_queue.join(timeout=5)
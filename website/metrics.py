@@ -0,0 +1,48 @@
+import threading
+import time
+
+from flask import current_app
+
+from website import rollup
+
+
+# -------------------------------------
+# ADMIN DASHBOARD COUNTERS
+# -------------------------------------
+# The dashboard header shows total users, sign-ups over the last 7 and 30
+# UTC dates, users active in the last 24 hours and logins today.  Only
+# the 7- and 30-day sign-ups and logins_today come from the daily_user_stats
+# rollup (one row per day, see website.rollup); the user total and the
+# rolling-24h active count are live COUNTs on the user table's indexes.
+# All come back from one statement and are kept for ADMIN_METRICS_TTL
+# seconds per process.  If this process's buffered rollup counts cannot be
+# written, the numbers are shown from the rollup as stored.
+
+_cache = {'expires': 0.0, 'value': None}
+_lock = threading.Lock()
+
+
+def user_counters():
+    """``{'total_users', 'new_signups', 'signups_30d', 'dau', 'logins_today'}``, cached for ADMIN_METRICS_TTL seconds."""
+    now = time.monotonic()
+    with _lock:
+        if _cache['value'] is not None and now < _cache['expires']:
+            return _cache['value']
+
+    # Include this process's buffered sign-ups and logins.
+    try:
+        rollup.flush()
+    except Exception:
+        # The counts stay buffered for the next flush.
+        current_app.logger.exception('Could not flush daily user stats')
+    value = rollup.window_totals()
+    with _lock:
+        _cache['value'] = value
+        _cache['expires'] = now + current_app.config.get('ADMIN_METRICS_TTL', 60)
+    return value
+
+
+def clear_cache():
+    with _lock:
+        _cache['value'] = None
+        _cache['expires'] = 0.0
@@ -25,8 +25,8 @@ class User(db.Model):
     current_role = db.Column(db.String(255), nullable=True)
     current_level = db.Column(db.String(255), nullable=True)
     strength = db.Column(db.String(255), nullable=True)
-    reg_date = db.Column(db.DateTime, default=datetime.utcnow)
-    last_login = db.Column(db.DateTime, nullable=True)
+    reg_date = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    last_login = db.Column(db.DateTime, nullable=True, index=True)
 
     # relationships
     skills = db.relationship('UserSkill', back_populates='user', cascade='all, delete-orphan')
@@ -36,6 +36,9 @@ class User(db.Model):
 
 class Career(db.Model):
     __tablename__ = 'career'
+    __table_args__ = (
+        db.Index('ft_career_name', 'career_name', mysql_prefix='FULLTEXT').ddl_if(dialect=('mysql', 'mariadb')),
+    )
 
     career_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     career_name = db.Column(db.String(100), unique=True, nullable=False)
@@ -113,6 +116,10 @@ class CareerRecommendation(db.Model):
 
 class Professional(db.Model):
     __tablename__ = 'professional'
+    __table_args__ = (
+        db.Index('ft_professional_search', 'first_name', 'last_name', 'email', 'linkedin_id',
+                 mysql_prefix='FULLTEXT').ddl_if(dialect=('mysql', 'mariadb')),
+    )
 
     professional_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     first_name = db.Column(db.String(45), nullable=False)
@@ -135,6 +142,10 @@ class EducationLevel(db.Model):
 # -------------------- Community --------------------
 class Community(db.Model):
     __tablename__ = 'community'
+    __table_args__ = (
+        db.Index('ft_community_search', 'community_name', 'description',
+                 mysql_prefix='FULLTEXT').ddl_if(dialect=('mysql', 'mariadb')),
+    )
 
     community_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     community_name = db.Column(db.String(100), unique=True, nullable=False)
@@ -157,4 +168,58 @@ class UserCommunity(db.Model):
 
     # relationships
     user = db.relationship('User', back_populates='communities')
-    community = db.relationship('Community', back_populates='users')
\ No newline at end of file
+    community = db.relationship('Community', back_populates='users')
+
+
+# -------------------- CatalogChange --------------------
+# One row per changed catalog entity, tagged with the catalog version its
+# transaction took from catalog_version.
+class CatalogChange(db.Model):
+    __tablename__ = 'catalog_change'
+
+    change_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    version = db.Column(db.Integer, nullable=False, index=True)
+    entity = db.Column(db.String(20), nullable=False)
+    entity_id = db.Column(db.Integer, nullable=False)
+    changed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+# -------------------- CatalogVersion --------------------
+# A single row (id 1) holding the newest catalog version.
+class CatalogVersion(db.Model):
+    __tablename__ = 'catalog_version'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+
+# -------------------- DailyUserStats --------------------
+# Per-day user activity rollup, maintained by website.rollup.
+class DailyUserStats(db.Model):
+    __tablename__ = 'daily_user_stats'
+
+    stat_date = db.Column(db.Date, primary_key=True)
+    signups = db.Column(db.Integer, nullable=False, default=0)
+    active_users = db.Column(db.Integer, nullable=False, default=0)
+    logins = db.Column(db.Integer, nullable=False, default=0)
+
+
+# -------------------- PasswordResetOtp --------------------
+# At most one live reset code per email; the code itself is stored hashed.
+class PasswordResetOtp(db.Model):
+    __tablename__ = 'password_reset_otp'
+
+    email = db.Column(db.String(100), primary_key=True)
+    otp_hash = db.Column(db.String(64), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+
+
+# -------------------- WebSession --------------------
+# Server-side session data; the cookie only carries session_id.
+class WebSession(db.Model):
+    __tablename__ = 'web_session'
+
+    session_id = db.Column(db.String(64), primary_key=True)
+    data = db.Column(db.Text, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
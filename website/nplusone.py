@@ -0,0 +1,48 @@
+from collections import Counter
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+# -------------------------------------
+# N+1 QUERY DETECTOR
+# -------------------------------------
+# In debug mode (or with NPLUSONE_DETECT=1) every SQL statement a request
+# runs is counted by its text -- parameters are bound separately, so the
+# same lazy load for different rows is the same text.  A statement run
+# more than NPLUSONE_THRESHOLD times in one request is logged as a likely
+# N+1 with the endpoint, so a missing loader preset (website.loaders)
+# shows up in development instead of in production latency.
+
+_state = {'listening': False}
+
+
+def _count(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'query_counts' in g:
+        g.query_counts[statement] += 1
+
+
+def init_app(app):
+    if not (app.debug or app.config.get('NPLUSONE_DETECT')):
+        return
+    if not _state['listening']:
+        event.listen(Engine, 'before_cursor_execute', _count)
+        _state['listening'] = True
+
+    @app.before_request
+    def start_counting():
+        g.query_counts = Counter()
+
+    @app.teardown_request
+    def report(exc):
+        counts = g.pop('query_counts', None)
+        if not counts:
+            return
+        threshold = app.config.get('NPLUSONE_THRESHOLD', 5)
+        for statement, count in counts.most_common():
+            if count <= threshold:
+                break
+            app.logger.warning('Possible N+1 on %s %s (%s): %d x %s',
+                               request.method, request.path, request.endpoint, count,
+                               ' '.join(statement.split())[:300])
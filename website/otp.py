@@ -0,0 +1,114 @@
+import hashlib
+import hmac
+import secrets
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import delete, select, update
+
+from website.models import db, PasswordResetOtp
+
+
+# -------------------------------------
+# PASSWORD RESET CODES
+# -------------------------------------
+# Reset codes live in password_reset_otp, keyed by email: issuing a new
+# code replaces the old one, so the table never holds more rows than there
+# are users asking for resets, however often they ask.  Only an HMAC of
+# the code is stored.  Checking a code is one primary-key lookup.
+#
+# The wrong-guess count belongs to the email, not to the code: a new code
+# keeps it, so asking for codes again does not buy more guesses.  After
+# OTP_MAX_ATTEMPTS wrong guesses the email is locked -- no code is issued
+# or accepted -- until its last code expires.  The count goes back to
+# zero only when a code is used or its row expires.  Wrong guesses are
+# counted with an UPDATE in the database, not on the loaded row, so
+# concurrent guesses cannot overwrite each other's count.  Expired rows
+# left behind are deleted in bulk by sweep(), run at most every
+# OTP_SWEEP_SECONDS from issue() and by `flask sweep-otps`.
+
+VALID, INVALID, EXPIRED, LOCKED = 'valid', 'invalid', 'expired', 'locked'
+
+_state = {'next_sweep': 0.0}
+
+
+def _hash(email, code):
+    key = current_app.config['SECRET_KEY']
+    key = key.encode() if isinstance(key, str) else key
+    return hmac.new(key, f'{email}:{code}'.encode(), hashlib.sha256).hexdigest()
+
+
+def issue(email):
+    """Create (or replace) the reset code for ``email`` and return it; None while locked."""
+    code = f'{secrets.randbelow(1_000_000):06d}'
+    issued_at = datetime.utcnow()
+    expires_at = issued_at + timedelta(seconds=current_app.config.get('OTP_TTL_SECONDS', 600))
+    max_attempts = current_app.config.get('OTP_MAX_ATTEMPTS', 5)
+
+    # A live row keeps its wrong-guess count; a locked one keeps its expiry
+    live = (PasswordResetOtp.email == email, PasswordResetOtp.expires_at >= issued_at)
+    replaced = db.session.execute(
+        update(PasswordResetOtp).where(*live, PasswordResetOtp.attempts < max_attempts)
+        .values(otp_hash=_hash(email, code), expires_at=expires_at),
+        execution_options={'synchronize_session': False},
+    ).rowcount
+    if not replaced:
+        if db.session.execute(select(PasswordResetOtp.email).where(*live)).first() is not None:
+            db.session.commit()
+            return None
+        db.session.merge(PasswordResetOtp(email=email, otp_hash=_hash(email, code), expires_at=expires_at,
+                                          attempts=0))
+    db.session.commit()
+
+    now = time.monotonic()
+    if now >= _state['next_sweep']:
+        _state['next_sweep'] = now + current_app.config.get('OTP_SWEEP_SECONDS', 300)
+        sweep()
+    return code
+
+
+def verify(email, code):
+    """Check ``code`` for ``email``: VALID (and used up), INVALID, EXPIRED or LOCKED."""
+    record = db.session.get(PasswordResetOtp, email) if email else None
+    if record is None:
+        return EXPIRED
+    if record.expires_at < datetime.utcnow():
+        db.session.delete(record)
+        db.session.commit()
+        return EXPIRED
+
+    max_attempts = current_app.config.get('OTP_MAX_ATTEMPTS', 5)
+    if record.attempts >= max_attempts:
+        return LOCKED
+
+    if hmac.compare_digest(record.otp_hash, _hash(email, (code or '').strip())):
+        # Only the code that was checked, and only while it is not locked
+        used = db.session.execute(delete(PasswordResetOtp).where(
+            PasswordResetOtp.email == email,
+            PasswordResetOtp.otp_hash == record.otp_hash,
+            PasswordResetOtp.attempts < max_attempts,
+        )).rowcount
+        db.session.commit()
+        return VALID if used else EXPIRED
+
+    # The UPDATE locks the row until commit: a concurrent guess waits for
+    # it, and the count read back in this transaction includes every guess
+    db.session.execute(
+        update(PasswordResetOtp).where(PasswordResetOtp.email == email)
+        .values(attempts=PasswordResetOtp.attempts + 1),
+        execution_options={'synchronize_session': False},
+    )
+    attempts = db.session.execute(select(PasswordResetOtp.attempts).where(PasswordResetOtp.email == email)).scalar()
+    db.session.commit()
+    if attempts is None:
+        # Used by another request meanwhile
+        return EXPIRED
+    return LOCKED if attempts >= max_attempts else INVALID
+
+
+def sweep():
+    """Delete every expired code; returns how many were removed."""
+    result = db.session.execute(delete(PasswordResetOtp).where(PasswordResetOtp.expires_at < datetime.utcnow()))
+    db.session.commit()
+    return result.rowcount
@@ -0,0 +1,149 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, make_response, request, session
+
+from website import catalog
+
+try:  # the shared backend is optional
+    import redis
+except ImportError:  # pragma: no cover - depends on the deployment
+    redis = None
+
+
+# -------------------------------------
+# RENDERED PAGE CACHE
+# -------------------------------------
+# Public pages are the same for every visitor except for the navigation
+# bar, which depends only on whether someone is signed in.  @cached_page
+# keeps the rendered body per URL and per guest/signed-in variant, so a
+# hit is answered without running the view, its queries or Jinja (the
+# variant comes from the session, which sessions.py caches).  Pages
+# built from the catalog put the catalog version in their key: admin
+# edits to communities and careers record a catalog change, the version
+# moves on, and the next request renders afresh.
+#
+#   memory  LRU in this process, capped at PAGE_CACHE_MAX_BYTES of bodies
+#   redis   shared by every worker (PAGE_CACHE_URL), entries expire after
+#           PAGE_CACHE_TTL seconds
+
+class MemoryBackend:
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] < time.monotonic():
+                self._discard(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key, value, ttl):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self.size += len(value)
+            while self.size > self.max_bytes:
+                self._discard(next(iter(self._entries)))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry[0])
+
+
+class RedisBackend:
+    def __init__(self, url):
+        if redis is None:
+            raise RuntimeError("The redis page cache backend requires the 'redis' package.")
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key):
+        return self._client.get(f'page:{key}')
+
+    def set(self, key, value, ttl):
+        self._client.set(f'page:{key}', value, ex=max(1, int(ttl)))
+
+    def clear(self):
+        # Entries of older catalog versions are never read again and expire.
+        pass
+
+
+_backend = {'instance': None}
+_lock = threading.Lock()
+
+
+def get_backend():
+    if _backend['instance'] is None:
+        with _lock:
+            if _backend['instance'] is None:
+                config = current_app.config
+                url = config.get('PAGE_CACHE_URL', 'memory://')
+                _backend['instance'] = (
+                    MemoryBackend(config.get('PAGE_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+                    if url.startswith('memory') else RedisBackend(url)
+                )
+    return _backend['instance']
+
+
+def _clear():
+    if _backend['instance'] is not None:
+        _backend['instance'].clear()
+
+
+@catalog.on_change(reset=_clear)
+def _catalog_changed(changes):
+    # Pages of the old version can no longer be hit; free the memory now.
+    if 'community' in changes or 'career' in changes:
+        _clear()
+
+
+def page_key(uses_catalog):
+    variant = 'user' if 'user_id' in session else 'guest'
+    version = catalog.current_version() if uses_catalog else '-'
+    return f'{version}:{variant}:{request.full_path}'
+
+
+def cached_page(uses_catalog=False):
+    """Serve the view's rendered body from the page cache.
+
+    ``uses_catalog`` marks pages that show catalog rows, so that they are
+    re-rendered when the catalog changes.
+    """
+    def decorator(view):
+        @wraps(view)
+        def cached(*args, **kwargs):
+            config = current_app.config
+            if not config.get('PAGE_CACHE_ENABLED', True) or request.method != 'GET' or '_flashes' in session:
+                return view(*args, **kwargs)
+
+            backend = get_backend()
+            key = page_key(uses_catalog)
+            entry = backend.get(key)
+            if entry is not None:
+                content_type, _, body = entry.partition(b'\n')
+                return current_app.response_class(body, content_type=content_type.decode())
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200 and not response.is_streamed:
+                backend.set(key, response.content_type.encode() + b'\n' + response.get_data(),
+                            config.get('PAGE_CACHE_TTL', 300))
+            return response
+        return cached
+    return decorator
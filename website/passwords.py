@@ -0,0 +1,48 @@
+from functools import lru_cache
+
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+# -------------------------------------
+# PASSWORD HASHING
+# -------------------------------------
+# All password hashing goes through here so the algorithm and work factor
+# are one setting, PASSWORD_HASH_METHOD, in Werkzeug's method syntax:
+# "scrypt:N:r:p" or "pbkdf2:sha256:iterations".  Stored hashes begin with
+# the method they were made with; when that differs from the setting, a
+# successful login returns a fresh hash for the caller to save, so old
+# hashes migrate as users sign in.  `flask bench passwords` measures each
+# setting on this machine.
+
+DEFAULT_METHOD = 'scrypt:32768:8:1'
+
+
+@lru_cache(maxsize=None)
+def _normalized(method):
+    if method.count(':') == (3 if method.startswith('scrypt') else 2):
+        return method
+    # "scrypt", "pbkdf2", "pbkdf2:sha256" leave parameters to Werkzeug's
+    # defaults; hash once to see them spelled out.
+    return generate_password_hash('', method=method).split('$', 1)[0]
+
+
+def current_method():
+    return current_app.config.get('PASSWORD_HASH_METHOD') or DEFAULT_METHOD
+
+
+def hash_password(password, method=None):
+    return generate_password_hash(password, method=method or current_method())
+
+
+def needs_rehash(stored_hash):
+    """True if ``stored_hash`` was made with other parameters than the current setting."""
+    return stored_hash.split('$', 1)[0] != _normalized(current_method())
+
+
+def verify(stored_hash, password):
+    """``(ok, new_hash)``; ``new_hash`` is set when the password checks out but
+    ``stored_hash`` should be replaced with it."""
+    if not stored_hash or not check_password_hash(stored_hash, password):
+        return False, None
+    return True, hash_password(password) if needs_rehash(stored_hash) else None
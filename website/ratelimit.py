@@ -0,0 +1,137 @@
+import threading
+import time
+import zlib
+from functools import lru_cache, wraps
+
+from flask import current_app, request
+from werkzeug.exceptions import TooManyRequests
+
+try:  # the shared backend is optional
+    import redis
+except ImportError:  # pragma: no cover - depends on the deployment
+    redis = None
+
+
+# -------------------------------------
+# RATE LIMITING
+# -------------------------------------
+# Sign-in, sign-up, password reset and admin login each hash a password or
+# send mail, so a burst of requests is a CPU (or SMTP) burst.  @limit puts
+# a token bucket in front of such a view, per client IP and per account
+# (the email posted in the form), and answers 429 with Retry-After before
+# the view runs.  A limit such as "5/minute" is a bucket of 5 tokens that
+# refills at 5 per minute.
+#
+#   memory  buckets in this process, spread over lock-striped shards
+#   redis   buckets in Redis (RATELIMIT_STORAGE_URL), shared by every worker
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+
+@lru_cache(maxsize=None)
+def parse_limit(text):
+    """``"5/minute"`` -> ``(capacity, tokens per second)``."""
+    count, _, period = text.partition('/')
+    count = int(count)
+    return count, count / PERIODS[period.strip().rstrip('s')]
+
+
+class MemoryBackend:
+    """Token buckets in process memory.
+
+    Keys hash to one of ``shards`` dicts, each with its own lock, so
+    concurrent requests rarely wait on each other.  A shard that grows past
+    its share of ``max_keys`` drops the buckets that have refilled, which
+    carry no state, so memory stays bounded under spoofed-key floods.
+    """
+
+    def __init__(self, shards=64, max_keys=100_000):
+        self._shards = [(threading.Lock(), {}) for _ in range(shards)]
+        self._shard_keys = max(1, max_keys // shards)
+
+    def hit(self, key, capacity, rate):
+        """Take a token from ``key``'s bucket; 0 if allowed, else seconds to wait."""
+        lock, buckets = self._shards[zlib.crc32(key.encode()) % len(self._shards)]
+        now = time.monotonic()
+        with lock:
+            bucket = buckets.get(key)
+            tokens = capacity if bucket is None else min(capacity, bucket[0] + (now - bucket[1]) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            buckets[key] = (tokens, now, now + (capacity - tokens) / rate)
+            if len(buckets) > self._shard_keys:
+                for stale in [k for k, (_, _, full_at) in buckets.items() if full_at <= now]:
+                    del buckets[stale]
+        return 0.0 if allowed else (1 - tokens) / rate
+
+
+class RedisBackend:
+    """Token buckets in Redis, updated atomically by a Lua script."""
+
+    SCRIPT = """
+    local capacity, rate, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+    local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'stamp')
+    local tokens = capacity
+    if bucket[1] then
+        tokens = math.min(capacity, tonumber(bucket[1]) + (now - tonumber(bucket[2])) * rate)
+    end
+    local wait = 0
+    if tokens >= 1 then tokens = tokens - 1 else wait = (1 - tokens) / rate end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'stamp', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate) + 1)
+    return tostring(wait)
+    """
+
+    def __init__(self, url):
+        if redis is None:
+            raise RuntimeError("The redis rate-limit backend requires the 'redis' package.")
+        self._client = redis.Redis.from_url(url)
+        self._script = self._client.register_script(self.SCRIPT)
+
+    def hit(self, key, capacity, rate):
+        return float(self._script(keys=[f'ratelimit:{key}'], args=[capacity, rate, time.time()]))
+
+
+_backend = {'instance': None}
+_lock = threading.Lock()
+
+
+def get_backend():
+    if _backend['instance'] is None:
+        with _lock:
+            if _backend['instance'] is None:
+                url = current_app.config.get('RATELIMIT_STORAGE_URL', 'memory://')
+                _backend['instance'] = MemoryBackend() if url.startswith('memory') else RedisBackend(url)
+    return _backend['instance']
+
+
+def client_ip():
+    return request.remote_addr or 'unknown'
+
+
+def limit(scope, account_field='email'):
+    """Rate-limit POSTs to the decorated view per IP and per account.
+
+    Limits come from RATELIMIT_PER_IP and RATELIMIT_PER_ACCOUNT; ``scope``
+    keeps each view's buckets separate.  ``account_field=None`` limits per
+    IP only.
+    """
+    def decorator(view):
+        @wraps(view)
+        def limited(*args, **kwargs):
+            config = current_app.config
+            if request.method == 'POST' and config.get('RATELIMIT_ENABLED', True):
+                backend = get_backend()
+                checks = [(f'{scope}:ip:{client_ip()}', config.get('RATELIMIT_PER_IP', '20/minute'))]
+                account = (request.form.get(account_field) or '').strip().lower() if account_field else ''
+                if account:
+                    checks.append((f'{scope}:account:{account}', config.get('RATELIMIT_PER_ACCOUNT', '5/minute')))
+                for key, rule in checks:
+                    wait = backend.hit(key, *parse_limit(rule))
+                    if wait:
+                        raise TooManyRequests('Too many attempts. Please wait a moment and try again.',
+                                              retry_after=max(1, round(wait)))
+            return view(*args, **kwargs)
+        return limited
+    return decorator
@@ -0,0 +1,445 @@
+import bisect
+import heapq
+import re
+import threading
+from collections import Counter, defaultdict
+
+from flask import current_app
+
+from website import catalog
+from website.models import db, Career, CareerSkill, Skill
+
+try:  # the TF-IDF backend is optional
+    import numpy as np
+    from scipy import sparse
+except ImportError:  # pragma: no cover - depends on the deployment
+    np = sparse = None
+
+
+# -------------------------------------
+# CAREER RECOMMENDATION INDEX
+# -------------------------------------
+# The dashboard used to rank careers by loading every Career (and, lazily,
+# every career's skills) and checking each user keyword with a substring
+# test against "name description skills".  The index below gives the same
+# answer without rescanning the catalog:
+#
+#   * every career's text is split on whitespace into terms, and each term
+#     keeps a posting set of the careers that contain it;
+#   * a keyword never contains whitespace, so "keyword in text" is true
+#     exactly when the keyword is a substring of one of the text's terms;
+#   * terms are reachable through their short substrings (grams), so the
+#     terms containing a keyword are found by intersecting gram postings
+#     instead of scanning the vocabulary.
+
+GRAM_SIZE = 3
+MAX_CACHED_KEYWORDS = 10000
+
+
+def career_text(name, description, skill_names):
+    """Lower-cased text the dashboard scored a career against."""
+    text = f"{name} {description}"
+    if skill_names:
+        text += " " + " ".join(skill_names)
+    return text.lower()
+
+
+def user_keywords(user):
+    """Keywords taken from a user's career goal and strengths."""
+    keywords = []
+    if user.career_goal:
+        keywords += user.career_goal.lower().split()
+    if user.strength:
+        keywords += user.strength.lower().split()
+    return keywords
+
+
+def recommendation_rows(index, users, k, generated_at):
+    """CareerRecommendation mappings for ``users``, best first per user.
+
+    ``users`` only needs ``user_id``, ``career_goal`` and ``strength``; users
+    without profile keywords are skipped.  Every user is ranked in one
+    ``top_k_batch`` call (a single matrix product with the TF-IDF backend).
+    """
+    users = [(user.user_id, user_keywords(user)) for user in users]
+    users = [(user_id, keywords) for user_id, keywords in users if keywords]
+    ranked = index.top_k_batch([keywords for _, keywords in users], k)
+
+    return [
+        {
+            'user_id': user_id,
+            'career_id': career_id,
+            'recommendation_details': recommendation_message(index.career_names[career_id], rank),
+            'date_generated': generated_at,
+        }
+        for (user_id, _), careers in zip(users, ranked)
+        for rank, (career_id, score) in enumerate(careers)
+    ]
+
+
+def recommendation_message(career_name, rank=0):
+    """Text stored in CareerRecommendation.recommendation_details."""
+    if rank:
+        return f"Also consider: {career_name}."
+    return (
+        f"Recommended Career: {career_name}. "
+        "You can edit your profile to change this recommendation anytime. This recommendation is just to  get you started, to get more personalized recommendation; kindly update your profile"
+    )
+
+
+def _grams(term):
+    """Every substring of ``term`` that is at most GRAM_SIZE long."""
+    grams = set()
+    for size in range(1, GRAM_SIZE + 1):
+        for start in range(len(term) - size + 1):
+            grams.add(term[start:start + size])
+    return grams
+
+
+class RecommendationIndex:
+    """In-memory inverted index over the career catalog."""
+
+    def __init__(self):
+        self.career_ids = []        # position -> career_id, in catalog order
+        self.positions = {}         # career_id -> position
+        self.career_names = {}      # career_id -> career_name
+        self.career_terms = {}      # career_id -> terms in its text
+        self.postings = {}          # term -> set of career_ids
+        self.gram_terms = defaultdict(set)  # gram -> set of terms
+        self._matches = {}          # keyword -> set of career_ids
+        self._lock = threading.RLock()  # apply() mutates in place
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build an index from ``(career_id, name, description, skill_names)`` rows."""
+        index = cls()
+        for career_id, name, description, skill_names in rows:
+            index.positions[career_id] = len(index.career_ids)
+            index.career_ids.append(career_id)
+            index._index_career(career_id, name, description, skill_names)
+        return index
+
+    def __len__(self):
+        return len(self.career_ids)
+
+    def _index_career(self, career_id, name, description, skill_names):
+        terms = set(career_text(name, description, skill_names).split())
+        self.career_names[career_id] = name
+        self.career_terms[career_id] = terms
+        for term in terms:
+            posting = self.postings.get(term)
+            if posting is None:
+                posting = self.postings[term] = set()
+                for gram in _grams(term):
+                    self.gram_terms[gram].add(term)
+            posting.add(career_id)
+
+    def _unindex_career(self, career_id):
+        del self.career_names[career_id]
+        for term in self.career_terms.pop(career_id):
+            posting = self.postings[term]
+            posting.discard(career_id)
+            if not posting:
+                del self.postings[term]
+                for gram in _grams(term):
+                    self.gram_terms[gram].discard(term)
+                    if not self.gram_terms[gram]:
+                        del self.gram_terms[gram]
+
+    def apply(self, rows, removed_ids=()):
+        """Re-index the careers in ``rows`` and drop ``removed_ids``; returns the index."""
+        with self._lock:
+            self._apply(rows, removed_ids)
+        return self
+
+    def _apply(self, rows, removed_ids):
+        for career_id in removed_ids:
+            if career_id in self.career_terms:
+                self._unindex_career(career_id)
+                self.career_ids.remove(career_id)
+        for career_id, name, description, skill_names in rows:
+            if career_id in self.career_terms:
+                self._unindex_career(career_id)
+            else:
+                bisect.insort(self.career_ids, career_id)
+            self._index_career(career_id, name, description, skill_names)
+        self.positions = {career_id: i for i, career_id in enumerate(self.career_ids)}
+        self._matches.clear()
+
+    def _terms_containing(self, keyword):
+        if len(keyword) <= GRAM_SIZE:
+            return self.gram_terms.get(keyword, ())
+
+        # Every window of the keyword must occur in a matching term; start
+        # from the rarest window and confirm the survivors directly.
+        windows = {keyword[i:i + GRAM_SIZE] for i in range(len(keyword) - GRAM_SIZE + 1)}
+        candidates = sorted((self.gram_terms.get(w, set()) for w in windows), key=len)
+        if not candidates[0]:
+            return ()
+        return [term for term in candidates[0] if keyword in term]
+
+    def careers_matching(self, keyword):
+        """Ids of the careers whose text contains ``keyword``."""
+        matches = self._matches.get(keyword)
+        if matches is None:
+            matches = set()
+            for term in self._terms_containing(keyword):
+                matches |= self.postings[term]
+            if len(self._matches) >= MAX_CACHED_KEYWORDS:
+                self._matches.clear()
+            self._matches[keyword] = matches
+        return matches
+
+    def scores(self, keywords):
+        """Map career_id -> number of keywords found in that career's text."""
+        scores = defaultdict(int)
+        with self._lock:
+            for keyword in keywords:
+                for career_id in self.careers_matching(keyword):
+                    scores[career_id] += 1
+        return scores
+
+    def top_k(self, keywords, k=1):
+        """Return up to ``k`` ``(career_id, score)`` pairs, best first."""
+        with self._lock:
+            if not self.career_ids:
+                return []
+
+            scores = self.scores(keywords)
+            if not scores:
+                return [(self.career_ids[0], 0)]
+            position = self.positions
+            return heapq.nsmallest(k, scores.items(), key=lambda item: (-item[1], position[item[0]]))
+
+    def top_k_batch(self, keyword_lists, k=1):
+        """Rank several users; one list of ``(career_id, score)`` per user.
+
+        Users are scored one by one (only TfidfIndex scores a batch in one
+        product); they share the cached per-keyword matches.
+        """
+        with self._lock:
+            return [self.top_k(keywords, k) for keywords in keyword_lists]
+
+    def best(self, keywords):
+        """Return ``(career_id, score)`` for the highest scoring career.
+
+        Ties go to the career that comes first in catalog order and, like the
+        original scan, the first career is returned when nothing matches.
+        Returns ``None`` for an empty catalog.
+        """
+        with self._lock:
+            if not self.career_ids:
+                return None
+
+            scores = self.scores(keywords)
+            position = self.positions
+            best_id, best_score = self.career_ids[0], scores.get(self.career_ids[0], 0)
+            for career_id, score in scores.items():
+                if score > best_score or (score == best_score and position[career_id] < position[best_id]):
+                    best_id, best_score = career_id, score
+            return best_id, best_score
+
+
+class TfidfIndex:
+    """Cosine similarity between TF-IDF career vectors and a user's profile.
+
+    Careers are rows of a sparse, L2-normalised TF-IDF matrix.  A user's
+    keywords become a query vector over the same vocabulary, so ranking the
+    whole catalog is a single sparse matrix-vector product.
+    """
+
+    TOKEN_RE = re.compile(r"[a-z0-9+#]+")
+
+    def __init__(self, career_ids, career_names, vocabulary, idf, matrix, tf):
+        self.career_ids = career_ids
+        self.positions = {career_id: i for i, career_id in enumerate(career_ids)}
+        self.career_names = career_names
+        self.vocabulary = vocabulary    # term -> column
+        self.idf = idf
+        self.matrix = matrix            # careers x terms (CSR)
+        self.tf = tf                    # raw term counts, re-weighed by apply()
+        self._by_term = matrix.T.tocsr()  # terms x careers, rows touched by a query
+
+    @classmethod
+    def tokenize(cls, text):
+        return cls.TOKEN_RE.findall(text.lower())
+
+    @classmethod
+    def _count_terms(cls, rows, vocabulary):
+        """Raw term counts for ``rows`` as a CSR matrix, growing ``vocabulary``."""
+        career_ids, career_names = [], {}
+        indptr, indices, counts = [0], [], []
+        for career_id, name, description, skill_names in rows:
+            career_ids.append(career_id)
+            career_names[career_id] = name
+            for term, count in Counter(cls.tokenize(career_text(name, description, skill_names))).items():
+                indices.append(vocabulary.setdefault(term, len(vocabulary)))
+                counts.append(count)
+            indptr.append(len(indices))
+
+        tf = sparse.csr_matrix(
+            (np.asarray(counts, dtype=np.float32), np.asarray(indices, dtype=np.int32), np.asarray(indptr)),
+            shape=(len(career_ids), len(vocabulary)),
+        )
+        return career_ids, career_names, tf
+
+    @classmethod
+    def _weigh(cls, career_ids, career_names, vocabulary, tf):
+        rows = tf.shape[0]
+        document_frequency = np.bincount(tf.indices, minlength=tf.shape[1])
+        idf = (np.log((1 + rows) / (1 + document_frequency)) + 1).astype(np.float32)
+        # Terms left behind by removed careers must not weigh on the query norm.
+        idf[document_frequency == 0] = 0
+
+        matrix = tf.multiply(idf).tocsr()
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1
+        matrix = sparse.diags(1 / norms).dot(matrix).tocsr().astype(np.float32)
+
+        return cls(career_ids, career_names, vocabulary, idf, matrix, tf)
+
+    @classmethod
+    def from_rows(cls, rows):
+        if np is None:
+            raise RuntimeError("The 'tfidf' recommender backend requires numpy and scipy.")
+
+        vocabulary = {}
+        career_ids, career_names, tf = cls._count_terms(rows, vocabulary)
+        return cls._weigh(career_ids, career_names, vocabulary, tf)
+
+    def apply(self, rows, removed_ids=()):
+        """Return an index with the careers in ``rows`` replaced and ``removed_ids`` dropped.
+
+        Only the changed careers are re-tokenised.  Every weight depends on
+        the catalog-wide IDF, so the matrix is re-weighted from the kept term
+        counts in a few vectorised operations.
+        """
+        replaced = set(removed_ids) | {row[0] for row in rows}
+        keep = ~np.isin(np.asarray(self.career_ids), list(replaced))
+
+        vocabulary = dict(self.vocabulary)
+        new_ids, new_names, new_tf = self._count_terms(rows, vocabulary)
+        kept_tf = self.tf[keep]
+        kept_tf.resize((kept_tf.shape[0], len(vocabulary)))
+
+        career_ids = [career_id for career_id, kept in zip(self.career_ids, keep) if kept] + new_ids
+        career_names = {career_id: self.career_names[career_id] for career_id in career_ids if career_id not in new_names}
+        career_names.update(new_names)
+        return self._weigh(career_ids, career_names, vocabulary, sparse.vstack([kept_tf, new_tf]).tocsr())
+
+    def __len__(self):
+        return len(self.career_ids)
+
+    def query_matrix(self, keyword_lists):
+        """One normalised TF-IDF row per keyword list."""
+        indptr, indices, weights = [0], [], []
+        for keywords in keyword_lists:
+            counts = Counter(
+                self.vocabulary[term]
+                for term in self.tokenize(" ".join(keywords))
+                if term in self.vocabulary
+            )
+            row = np.fromiter(counts.values(), dtype=np.float32, count=len(counts)) * self.idf[list(counts)]
+            norm = np.linalg.norm(row)
+            indices.extend(counts)
+            weights.extend(row / norm if norm else row)
+            indptr.append(len(indices))
+        return sparse.csr_matrix(
+            (np.asarray(weights, dtype=np.float32), np.asarray(indices, dtype=np.int32), np.asarray(indptr)),
+            shape=(len(keyword_lists), len(self.vocabulary)),
+        )
+
+    def _top_k_row(self, columns, scores, k):
+        if not len(scores):
+            return []
+        if len(scores) > k:
+            # Keep everything tied with the k-th score so the tie break below
+            # sees every candidate, not whichever argpartition happened to pick.
+            kth = scores[np.argpartition(-scores, k - 1)[k - 1]]
+            keep = scores >= kth
+            columns, scores = columns[keep], scores[keep]
+        # Highest score first; equal scores keep catalog order.
+        order = np.lexsort((columns, -scores))[:k]
+        return [(self.career_ids[columns[i]], float(scores[i])) for i in order]
+
+    def top_k_batch(self, keyword_lists, k=1):
+        """Rank several users at once: one product against the whole catalog."""
+        if not self.career_ids:
+            return [[] for _ in keyword_lists]
+        scores = (self.query_matrix(keyword_lists) @ self._by_term).tocsr()
+        scores.eliminate_zeros()
+        return [
+            self._top_k_row(
+                scores.indices[scores.indptr[row]:scores.indptr[row + 1]],
+                scores.data[scores.indptr[row]:scores.indptr[row + 1]],
+                k,
+            )
+            for row in range(scores.shape[0])
+        ]
+
+    def top_k(self, keywords, k=1):
+        """Return up to ``k`` ``(career_id, cosine)`` pairs, best first."""
+        return self.top_k_batch([keywords], k)[0]
+
+
+BACKENDS = {
+    'keyword': RecommendationIndex,
+    'tfidf': TfidfIndex,
+}
+
+
+def load_catalog_rows(career_ids=None):
+    """Fetch careers (all, or just ``career_ids``) with their skill names in two queries."""
+    skills = defaultdict(list)
+    skill_rows = db.session.query(CareerSkill.career_id, Skill.skill_name).join(
+        Skill, Skill.skill_id == CareerSkill.skill_id
+    )
+    careers = db.session.query(
+        Career.career_id, Career.career_name, Career.description
+    ).order_by(Career.career_id)
+    if career_ids is not None:
+        skill_rows = skill_rows.filter(CareerSkill.career_id.in_(career_ids))
+        careers = careers.filter(Career.career_id.in_(career_ids))
+
+    for career_id, skill_name in skill_rows:
+        skills[career_id].append(skill_name)
+
+    return [
+        (career_id, name, description, skills.get(career_id, []))
+        for career_id, name, description in careers
+    ]
+
+
+_indexes = {}
+
+
+def reset_index():
+    """Drop the cached indexes so the next call to get_index() rebuilds them."""
+    _indexes.clear()
+
+
+@catalog.on_change(reset=reset_index)
+def _apply_catalog_changes(changes):
+    """Patch the built indexes with the careers touched by admin CRUD."""
+    career_ids = changes.get('career')
+    if not career_ids or not _indexes:
+        return
+
+    rows = load_catalog_rows(career_ids)
+    removed_ids = set(career_ids) - {row[0] for row in rows}
+    for backend, index in list(_indexes.items()):
+        _indexes[backend] = index.apply(rows, removed_ids)
+
+
+def get_index(backend=None):
+    """Process-wide index for ``backend`` (default: RECOMMENDER_BACKEND).
+
+    Built on first use, then kept current with catalog deltas.
+    """
+    backend = backend or current_app.config.get('RECOMMENDER_BACKEND', 'keyword')
+    catalog.sync()
+    index = _indexes.get(backend)
+    if index is None:
+        index = _indexes[backend] = BACKENDS[backend].from_rows(load_catalog_rows())
+    return index
+
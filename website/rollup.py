@@ -0,0 +1,185 @@
+import atexit
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import case, delete, func, insert, select, update
+
+from website.models import db, DailyUserStats, User
+
+
+# -------------------------------------
+# DAILY USER STATS ROLLUP
+# -------------------------------------
+# Sign-ups and sign-ins add to an in-process counter buffer keyed by UTC
+# date.  The buffer is written to daily_user_stats as one batch of additive
+# upserts once it holds ROLLUP_FLUSH_SIZE events or ROLLUP_FLUSH_SECONDS
+# have passed (and when the process exits), so the hot paths never touch
+# the rollup table themselves.
+
+COLUMNS = ('signups', 'active_users', 'logins')
+
+_buffer = defaultdict(Counter)      # date -> Counter(column -> increment)
+_state = {'events': 0, 'last_flush': time.monotonic(), 'app': None}
+_lock = threading.Lock()
+
+
+def record_signup(when=None):
+    _record((when or datetime.utcnow()).date(), signups=1)
+
+
+def record_login(previous_login, when=None):
+    """Count a login; the user is newly active today unless they already logged in today."""
+    today = (when or datetime.utcnow()).date()
+    first_today = previous_login is None or previous_login.date() < today
+    _record(today, logins=1, active_users=int(first_today))
+
+
+def _record(day, **increments):
+    app = current_app._get_current_object()
+    with _lock:
+        _buffer[day].update(increments)
+        _state['events'] += 1
+        _state['app'] = app
+        due = (
+            _state['events'] >= app.config.get('ROLLUP_FLUSH_SIZE', 100)
+            or time.monotonic() - _state['last_flush'] >= app.config.get('ROLLUP_FLUSH_SECONDS', 30)
+        )
+    if due:
+        try:
+            flush()
+        except Exception:
+            # Kept in the buffer; a failed rollup write must not fail the request.
+            app.logger.exception('Could not flush daily user stats')
+
+
+def _take():
+    with _lock:
+        pending = {day: counts for day, counts in _buffer.items() if counts}
+        _buffer.clear()
+        _state['events'] = 0
+        _state['last_flush'] = time.monotonic()
+    return pending
+
+
+def _upsert(conn, rows):
+    table = DailyUserStats.__table__
+    dialect = conn.dialect.name
+    if dialect in ('mysql', 'mariadb'):
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+        stmt = mysql_insert(table)
+        stmt = stmt.on_duplicate_key_update({c: table.c[c] + stmt.inserted[c] for c in COLUMNS})
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+        stmt = sqlite_insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.stat_date],
+            set_={c: table.c[c] + stmt.excluded[c] for c in COLUMNS},
+        )
+    else:
+        for row in rows:
+            updated = conn.execute(
+                update(table).where(table.c.stat_date == row['stat_date'])
+                .values({c: table.c[c] + row[c] for c in COLUMNS})
+            )
+            if not updated.rowcount:
+                conn.execute(insert(table), row)
+        return
+    conn.execute(stmt, rows)
+
+
+def flush():
+    """Write the buffered counters to daily_user_stats in one transaction."""
+    pending = _take()
+    if not pending:
+        return
+    rows = [
+        {'stat_date': day, **{c: counts.get(c, 0) for c in COLUMNS}}
+        for day, counts in sorted(pending.items())
+    ]
+    try:
+        with db.engine.begin() as conn:
+            _upsert(conn, rows)
+    except Exception:
+        # Put the counts back so the next flush retries them.
+        with _lock:
+            for day, counts in pending.items():
+                _buffer[day].update(counts)
+        raise
+
+
+@atexit.register
+def _flush_at_exit():
+    app = _state['app']
+    if app is not None and _buffer:
+        with app.app_context():
+            flush()
+
+
+def _as_date(day):
+    # DATE() comes back as a string on SQLite.
+    return datetime.strptime(day, '%Y-%m-%d').date() if isinstance(day, str) else day
+
+
+def backfill():
+    """Rebuild daily_user_stats from the user table; returns the number of days written.
+
+    Sign-ups come from user.reg_date.  Past logins are not stored, so each
+    user's last_login counts as one active day and one login -- a lower
+    bound for history, exact from then on.
+    """
+    _take()
+    signup_day = func.date(User.reg_date)
+    login_day = func.date(User.last_login)
+    signups = dict(db.session.execute(
+        select(signup_day, func.count()).where(User.reg_date.isnot(None)).group_by(signup_day)
+    ).all())
+    logins = dict(db.session.execute(
+        select(login_day, func.count()).where(User.last_login.isnot(None)).group_by(login_day)
+    ).all())
+
+    signups = {_as_date(day): count for day, count in signups.items()}
+    logins = {_as_date(day): count for day, count in logins.items()}
+    days = sorted(set(signups) | set(logins))
+
+    db.session.execute(delete(DailyUserStats))
+    if days:
+        db.session.execute(insert(DailyUserStats), [
+            {'stat_date': day, 'signups': signups.get(day, 0),
+             'active_users': logins.get(day, 0), 'logins': logins.get(day, 0)}
+            for day in days
+        ])
+    db.session.commit()
+    return len(days)
+
+
+def window_totals(now=None):
+    """Totals for the admin dashboard, in one statement.
+
+    Total users and users active in the last 24 hours are index range
+    counts on the user table, so they are exact and drop when users are
+    deleted.  Sign-ups over 7 and 30 days and today's logins come from
+    the rollup and cover whole UTC dates, today included.
+    """
+    now = now or datetime.utcnow()
+    today = now.date()
+    count = lambda *where: select(func.count()).select_from(User).where(*where).scalar_subquery()
+    in_window = lambda column, days: func.coalesce(func.sum(
+        case((DailyUserStats.stat_date > today - timedelta(days=days), column), else_=0)
+    ), 0)
+    total, last_7, last_30, active_24h, logins_today = db.session.execute(select(
+        count(),
+        in_window(DailyUserStats.signups, 7),
+        in_window(DailyUserStats.signups, 30),
+        count(User.last_login >= now - timedelta(days=1)),
+        in_window(DailyUserStats.logins, 1),
+    ).select_from(DailyUserStats)).one()
+    return {
+        'total_users': total,
+        'new_signups': last_7,
+        'signups_30d': last_30,
+        'dau': active_24h,
+        'logins_today': logins_today,
+    }
@@ -0,0 +1,346 @@
+import base64
+import json
+import math
+import re
+
+from flask import abort, current_app
+from sqlalchemy import and_, case, func, or_, select, text, true as sa_true, union_all
+from sqlalchemy.dialects.mysql import match
+
+from website import autocomplete
+from website.jsonprovider import RowList
+from website.models import db, Career, Community, Professional
+
+
+# -------------------------------------
+# SEARCH BACKENDS
+# -------------------------------------
+# The directory searches used "ILIKE '%q%'" on every column, which no index
+# can serve.  A backend turns the typed query into ranked ids of matching
+# rows; the views load those rows by primary key.
+#
+#   fulltext  MySQL FULLTEXT indexes, MATCH ... AGAINST in boolean mode
+#   fts5      SQLite FTS5 tables kept in sync by triggers (local and tests)
+#   like      the original substring scan, kept as a fallback/benchmark
+#   autocomplete  the in-memory typeahead index (website.autocomplete)
+#
+# Every word of the query must match the start of a word in the row, so
+# "ada lov" finds "Ada Lovelace".
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def query_tokens(query):
+    return TOKEN_RE.findall(query.lower())
+
+
+# Backends return ``(id, key)`` hits in ranked order.  ``key`` is the row's
+# position in that order (a list, so it can go into a cursor); passing the
+# last key back as ``after`` continues from the next row, so every page is
+# a bounded keyset query however deep it is.  A backend's ``cursor_key``
+# gives the types of its key, which decode_cursor() checks.
+
+NUMBER = (int, float)
+LISTING_KEY = (int,)            # [id], see listing_hits()
+
+
+def after_keyset(score, key, after, descending=False):
+    """WHERE clause for rows that come after ``after`` = [score, id]."""
+    if after is None:
+        return sa_true()
+    beyond = score < after[0] if descending else score > after[0]
+    return or_(beyond, and_(score == after[0], key > after[1]))
+
+
+class LikeSearch:
+    """Substring matching, exactly as the endpoints used to do it."""
+
+    name = 'like'
+    cursor_key = (int,)                 # [id]
+
+    def __init__(self, session):
+        self.session = session
+
+    def community_hits(self, query, limit=None, after=None):
+        pattern = f'%{query}%'
+        stmt = select(Community.community_id).where(
+            Community.community_name.ilike(pattern) | Community.description.ilike(pattern)
+        )
+        if after is not None:
+            stmt = stmt.where(Community.community_id > after[0])
+        stmt = stmt.order_by(Community.community_id).limit(limit)
+        return [(i, [i]) for i in self.session.execute(stmt).scalars()]
+
+    def professional_hits(self, query, limit=None, after=None):
+        pattern = f'%{query}%'
+        stmt = select(Professional.professional_id).join(Career).where(
+            db.or_(
+                Professional.first_name.ilike(pattern),
+                Professional.last_name.ilike(pattern),
+                Professional.email.ilike(pattern),
+                Professional.linkedin_id.ilike(pattern),
+                Career.career_name.ilike(pattern),
+            )
+        )
+        if after is not None:
+            stmt = stmt.where(Professional.professional_id > after[0])
+        stmt = stmt.order_by(Professional.professional_id).limit(limit)
+        return [(i, [i]) for i in self.session.execute(stmt).scalars()]
+
+
+class MySQLFulltextSearch:
+    """Ranked MATCH ... AGAINST over the FULLTEXT indexes."""
+
+    name = 'fulltext'
+    cursor_key = (NUMBER, int)          # [score, id]
+
+    def __init__(self, session):
+        self.session = session
+
+    @staticmethod
+    def boolean_query(query):
+        # Operators are dropped by tokenising; "+word*" = required prefix.
+        return " ".join(f"+{token}*" for token in query_tokens(query))
+
+    def _page(self, hits, limit, after):
+        stmt = select(hits.c.id, hits.c.score).where(
+            after_keyset(hits.c.score, hits.c.id, after, descending=True)
+        ).order_by(hits.c.score.desc(), hits.c.id).limit(limit)
+        return [(i, [score, i]) for i, score in self.session.execute(stmt)]
+
+    def community_hits(self, query, limit=None, after=None):
+        against = self.boolean_query(query)
+        if not against:
+            return []
+        score = match(Community.community_name, Community.description, against=against).in_boolean_mode()
+        hits = select(Community.community_id.label('id'), score.label('score')).where(score > 0).subquery()
+        return self._page(hits, limit, after)
+
+    def professional_hits(self, query, limit=None, after=None):
+        against = self.boolean_query(query)
+        if not against:
+            return []
+        person_score = match(
+            Professional.first_name, Professional.last_name, Professional.email, Professional.linkedin_id,
+            against=against,
+        ).in_boolean_mode()
+        career_score = match(Career.career_name, against=against).in_boolean_mode()
+
+        matches = union_all(
+            select(Professional.professional_id.label('id'), person_score.label('score'))
+            .where(person_score > 0),
+            select(Professional.professional_id.label('id'), career_score.label('score'))
+            .join(Career, Career.career_id == Professional.career_id)
+            .where(career_score > 0),
+        ).subquery()
+        hits = select(matches.c.id, func.sum(matches.c.score).label('score')).group_by(matches.c.id).subquery()
+        return self._page(hits, limit, after)
+
+
+class SqliteFtsSearch:
+    """Ranked FTS5 matching; bm25 ``rank`` is lower for better matches."""
+
+    name = 'fts5'
+    cursor_key = (NUMBER, int)          # [score, id]
+
+    COMMUNITY_HITS = (
+        "SELECT rowid AS id, rank AS score FROM community_fts WHERE community_fts MATCH :q"
+    )
+    PROFESSIONAL_HITS = (
+        "SELECT id, SUM(score) AS score FROM ("
+        "  SELECT rowid AS id, rank AS score FROM professional_fts WHERE professional_fts MATCH :q"
+        "  UNION ALL"
+        "  SELECT p.professional_id, c.rank FROM career_fts AS c"
+        "  JOIN professional AS p ON p.career_id = c.rowid WHERE career_fts MATCH :q"
+        ") GROUP BY id"
+    )
+
+    def __init__(self, session):
+        self.session = session
+
+    @staticmethod
+    def match_query(query):
+        return " ".join(f'"{token}"*' for token in query_tokens(query))
+
+    def _page(self, hits_sql, query, limit, after):
+        fts = self.match_query(query)
+        if not fts:
+            return []
+        stmt = text(
+            f"SELECT id, score FROM ({hits_sql}) "
+            "WHERE :after_score IS NULL OR score > :after_score OR (score = :after_score AND id > :after_id) "
+            "ORDER BY score, id LIMIT :limit"
+        )
+        params = {
+            'q': fts,
+            'limit': -1 if limit is None else limit,
+            'after_score': after[0] if after else None,
+            'after_id': after[1] if after else None,
+        }
+        return [(i, [score, i]) for i, score in self.session.execute(stmt, params)]
+
+    def community_hits(self, query, limit=None, after=None):
+        return self._page(self.COMMUNITY_HITS, query, limit, after)
+
+    def professional_hits(self, query, limit=None, after=None):
+        return self._page(self.PROFESSIONAL_HITS, query, limit, after)
+
+
+class AutocompleteSearch:
+    """Typeahead answered from the in-process directory index."""
+
+    name = 'autocomplete'
+    cursor_key = (int, str, int)        # [score, name, id]
+
+    def __init__(self, session):
+        self.session = session
+
+    def community_hits(self, query, limit=None, after=None):
+        return autocomplete.get_index().community_hits(query, limit, after)
+
+    def professional_hits(self, query, limit=None, after=None):
+        return autocomplete.get_index().professional_hits(query, limit, after)
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (LikeSearch, MySQLFulltextSearch, SqliteFtsSearch, AutocompleteSearch)
+}
+DIALECT_BACKENDS = {'mysql': 'fulltext', 'mariadb': 'fulltext', 'sqlite': 'fts5'}
+
+
+def get_backend(session=None):
+    """The SEARCH_BACKEND in use; 'auto' picks one from the database dialect."""
+    session = session or db.session
+    name = current_app.config.get('SEARCH_BACKEND', 'auto')
+    if name == 'auto':
+        name = DIALECT_BACKENDS.get(session.get_bind().dialect.name, 'like')
+    return BACKENDS[name](session)
+
+
+def hydrate(model, ids, options=()):
+    """Load ``model`` rows for ``ids`` in one query, keeping the ranked order.
+
+    ``options`` are loader options (see website.loaders) for the
+    relationships the caller is about to touch.
+    """
+    if not ids:
+        return []
+    key = model.__mapper__.primary_key[0]
+    rows = {getattr(row, key.key): row for row in model.query.options(*options).filter(key.in_(ids))}
+    return [rows[i] for i in ids if i in rows]
+
+
+def hydrate_rows(stmt, key, ids):
+    """Run ``stmt`` (a select of output columns) for ``ids``, keeping the ranked order.
+
+    Returns a RowList of plain ``Row`` tuples -- no ORM objects are built --
+    ready to be passed to jsonify() as it is.
+    """
+    if not ids:
+        return []
+    order = case({i: position for position, i in enumerate(ids)}, value=key)
+    return RowList(db.session.execute(stmt.where(key.in_(ids)).order_by(order)))
+
+
+def listing_hits(model, limit=None, after=None):
+    """Every ``model`` row in primary-key order, as ``(id, key)`` hits."""
+    key = model.__mapper__.primary_key[0]
+    stmt = select(key)
+    if after is not None:
+        stmt = stmt.where(key > after[0])
+    stmt = stmt.order_by(key).limit(limit)
+    return [(i, [i]) for i in db.session.execute(stmt).scalars()]
+
+
+# -------------------------------------
+# CURSORS
+# -------------------------------------
+def encode_cursor(key):
+    return base64.urlsafe_b64encode(json.dumps(key, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def _key_part(value, types):
+    if isinstance(value, bool) or not isinstance(value, types):
+        return False
+    if isinstance(value, int):
+        return -2 ** 63 <= value < 2 ** 63      # fits a BIGINT parameter
+    if isinstance(value, float):
+        return math.isfinite(value)
+    return True
+
+
+def decode_cursor(cursor, shape):
+    """The keyset position in ``cursor``; ``None`` for the first page, 400 if malformed.
+
+    ``shape`` holds the type (or tuple of types) of each element of the
+    key, e.g. a backend's ``cursor_key``.
+    """
+    if not cursor:
+        return None
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        abort(400, description='Invalid cursor.')
+    if not isinstance(key, list) or len(key) != len(shape) or not all(map(_key_part, key, shape)):
+        abort(400, description='Invalid cursor.')
+    return key
+
+
+def page(model, hits, limit, options=()):
+    """Hydrate the first ``limit`` of ``hits`` (fetched with limit + 1).
+
+    Returns ``(rows, next_cursor)``; ``next_cursor`` is ``None`` on the last page.
+    """
+    more = len(hits) > limit
+    hits = hits[:limit]
+    next_cursor = encode_cursor(hits[-1][1]) if more else None
+    return hydrate(model, [i for i, _ in hits], options), next_cursor
+
+
+def page_rows(stmt, key, hits, limit):
+    """Like page(), but returns the ``Row`` results of ``stmt`` (see hydrate_rows)."""
+    more = len(hits) > limit
+    hits = hits[:limit]
+    next_cursor = encode_cursor(hits[-1][1]) if more else None
+    return hydrate_rows(stmt, key, [i for i, _ in hits]), next_cursor
+
+
+# -------------------------------------
+# SQLITE FTS5 SCHEMA
+# -------------------------------------
+# External-content FTS5 tables mirror the searchable columns; triggers keep
+# them in step with the base tables.  This is the one copy of the DDL: the
+# full text search migration (3f1d7b2c9a64) runs it on real databases and
+# benchmarks run it on schemas built with create_all().  Changing it means
+# writing a new migration that drops and recreates the tables.
+FTS_TABLES = {
+    'community_fts': ('community', 'community_id', ('community_name', 'description')),
+    'professional_fts': ('professional', 'professional_id', ('first_name', 'last_name', 'email', 'linkedin_id')),
+    'career_fts': ('career', 'career_id', ('career_name',)),
+}
+
+
+def _fts_ddl(fts, table, key, columns):
+    cols = ", ".join(columns)
+    new = ", ".join(f"new.{c}" for c in columns)
+    old = ", ".join(f"old.{c}" for c in columns)
+    return (
+        f"CREATE VIRTUAL TABLE {fts} USING fts5({cols}, content='{table}', content_rowid='{key}')",
+        f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.{key}, {new}); END",
+        f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.{key}, {old}); END",
+        f"CREATE TRIGGER {fts}_au AFTER UPDATE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.{key}, {old}); "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.{key}, {new}); END",
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    )
+
+
+SQLITE_FTS_DDL = tuple(
+    statement
+    for fts, (table, key, columns) in FTS_TABLES.items()
+    for statement in _fts_ddl(fts, table, key, columns)
+)
+
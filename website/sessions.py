@@ -0,0 +1,375 @@
+import hashlib
+import re
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from functools import wraps
+
+from flask import has_app_context, session
+from flask.sessions import SessionInterface, SessionMixin, session_json_serializer
+from sqlalchemy import delete, insert, select, update
+from werkzeug.datastructures import CallbackDict
+
+from website.models import db, WebSession
+
+
+# -------------------------------------
+# SERVER-SIDE SESSIONS
+# -------------------------------------
+# Session data (user_id, admin, reset_email, CSRF token, flashed messages)
+# is kept on the server and the cookie carries only a random session id,
+# so every response no longer re-serializes and re-signs the whole session
+# into a cookie.  The cookie is set once, when the id is issued; the store
+# is written only when the data actually changed (a flash that is shown in
+# the same request leaves nothing behind to save) or when an idle session
+# is past half its lifetime and needs its expiry pushed back.
+#
+#   sqlalchemy  web_session table, shared by every worker
+#   memory      LRU dict in this process (single worker / development)
+#   cookie      Flask's signed cookie session, unchanged
+#
+# The store is read lazily, on the first use of the session in a request,
+# so requests that never look at it (JSON search, assets) cost nothing.
+# With the sqlalchemy store, sessions read in this process are also kept
+# for up to SESSION_CACHE_SECONDS, keyed by id and a version of their data
+# that the cookie carries (``<id>.<version>``).  Every write hands out a
+# cookie with the new version, so a session that another worker changed or
+# emptied misses the cache and is read afresh: signed-in visitors are
+# served from memory -- page cache hits included -- without going stale.
+#
+# Expired sessions are deleted SESSION_SWEEP_BATCH rows at a time: one
+# batch at most every SESSION_SWEEP_SECONDS from the request path, and all
+# of them by `flask sweep-sessions`.
+
+SID_PATTERN = re.compile(r'[A-Za-z0-9_-]{43}')
+
+# Static files never use the session; skip the store lookup for them.
+# (The session is opened before the URL is matched, so go by path.)
+SESSIONLESS_PREFIXES = ('/assets/',)
+
+_state = {'next_sweep': 0.0}
+
+
+def data_version(payload):
+    return hashlib.blake2b(payload.encode(), digest_size=8).hexdigest()
+
+
+class ServerSession(CallbackDict, SessionMixin):
+    def __init__(self, sid=None, version=None, loader=None):
+        def on_update(self):
+            self.modified = True
+
+        super().__init__(None, on_update)
+        self.sid = sid
+        self.version = version      # of the data, as named by the cookie
+        self.payload = None
+        self.expires_at = None
+        self.new = sid is None
+        self.modified = False
+        self.accessed = False       # read in this request (Vary: Cookie)
+        self.rotate_sid = False
+        self._loader = loader
+
+    @property
+    def loaded(self):
+        return self._loader is None
+
+    def load(self):
+        """Fetch the data from the store, once, on first use."""
+        loader, self._loader = self._loader, None
+        self.accessed = True
+        if loader is None:
+            return
+        found = loader()
+        if found is None:
+            # Expired or deleted: start a new session
+            self.sid, self.version, self.new = None, None, True
+            return
+        data, self.payload, self.expires_at = found
+        dict.update(self, data)
+
+    def regenerate(self):
+        """Move the data to a new id when the response is saved (e.g. at login)."""
+        self.load()
+        self.rotate_sid = True
+        self.modified = True
+
+
+def _loads_first(method):
+    @wraps(method)
+    def loading(self, *args, **kwargs):
+        if self._loader is not None or not self.accessed:
+            self.load()
+        return method(self, *args, **kwargs)
+    return loading
+
+
+# Every way of reading or changing the data loads it first
+for _name in ('__getitem__', '__setitem__', '__delitem__', '__contains__', '__iter__', '__reversed__',
+              '__len__', '__eq__', '__ne__', '__repr__', '__or__', '__ior__', 'get', 'keys', 'values',
+              'items', 'copy', 'pop', 'popitem', 'setdefault', 'update', 'clear'):
+    setattr(ServerSession, _name, _loads_first(getattr(CallbackDict, _name)))
+
+
+class SessionCache:
+    """Sessions read by this process, by id and data version, for ``ttl`` seconds."""
+
+    def __init__(self, max_entries=10000, ttl=60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, sid, version):
+        """``(payload, expires_at)`` if this version of ``sid`` is cached and live."""
+        with self._lock:
+            entry = self._entries.get(sid)
+            if entry is None or entry[0] != version:
+                return None
+            if entry[3] < time.monotonic() or entry[2] < datetime.utcnow():
+                # Past its time here; the store may know a later expiry
+                del self._entries[sid]
+                return None
+            self._entries.move_to_end(sid)
+            return entry[1], entry[2]
+
+    def put(self, sid, version, payload, expires_at):
+        with self._lock:
+            self._entries[sid] = (version, payload, expires_at, time.monotonic() + self.ttl)
+            self._entries.move_to_end(sid)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, sid):
+        with self._lock:
+            self._entries.pop(sid, None)
+
+
+class SqlAlchemyStore:
+    def load(self, sid):
+        """``(payload, expires_at)`` for a live session, else None."""
+        with db.engine.connect() as conn:
+            row = conn.execute(
+                select(WebSession.data, WebSession.expires_at).where(WebSession.session_id == sid)
+            ).first()
+        if row is None or row.expires_at < datetime.utcnow():
+            return None
+        return row.data, row.expires_at
+
+    def save(self, sid, payload, expires_at):
+        with db.engine.begin() as conn:
+            updated = conn.execute(
+                update(WebSession).where(WebSession.session_id == sid)
+                .values(data=payload, expires_at=expires_at)
+            )
+            if not updated.rowcount:
+                conn.execute(insert(WebSession).values(session_id=sid, data=payload, expires_at=expires_at))
+
+    def delete(self, sid):
+        with db.engine.begin() as conn:
+            conn.execute(delete(WebSession).where(WebSession.session_id == sid))
+
+    def sweep(self, batch_size=1000, max_batches=None):
+        """Delete expired sessions ``batch_size`` rows per transaction; returns how many."""
+        removed, batches = 0, 0
+        while max_batches is None or batches < max_batches:
+            with db.engine.begin() as conn:
+                ids = conn.execute(
+                    select(WebSession.session_id)
+                    .where(WebSession.expires_at < datetime.utcnow())
+                    .limit(batch_size)
+                ).scalars().all()
+                if ids:
+                    conn.execute(delete(WebSession).where(WebSession.session_id.in_(ids)))
+            removed += len(ids)
+            batches += 1
+            if len(ids) < batch_size:
+                break
+        return removed
+
+
+class MemoryStore:
+    """Sessions in this process, least recently used dropped past ``max_entries``."""
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(self, sid):
+        with self._lock:
+            entry = self._sessions.get(sid)
+            if entry is None:
+                return None
+            if entry[1] < datetime.utcnow():
+                del self._sessions[sid]
+                return None
+            self._sessions.move_to_end(sid)
+            return entry
+
+    def save(self, sid, payload, expires_at):
+        with self._lock:
+            self._sessions[sid] = (payload, expires_at)
+            self._sessions.move_to_end(sid)
+            while len(self._sessions) > self.max_entries:
+                self._sessions.popitem(last=False)
+
+    def delete(self, sid):
+        with self._lock:
+            self._sessions.pop(sid, None)
+
+    def sweep(self, batch_size=1000, max_batches=None):
+        removed, batches = 0, 0
+        while max_batches is None or batches < max_batches:
+            now = datetime.utcnow()
+            with self._lock:
+                expired = [sid for sid, (_, expires_at) in self._sessions.items() if expires_at < now][:batch_size]
+                for sid in expired:
+                    del self._sessions[sid]
+            removed += len(expired)
+            batches += 1
+            if len(expired) < batch_size:
+                break
+        return removed
+
+
+class ServerSessionInterface(SessionInterface):
+    serializer = session_json_serializer
+
+    def __init__(self, store, cache=None):
+        self.store = store
+        self.cache = cache
+
+    def open_session(self, app, request):
+        if request.path.startswith((f'{app.static_url_path}/',) + SESSIONLESS_PREFIXES):
+            return self.make_null_session(app)
+        sid, _, version = (request.cookies.get(self.get_cookie_name(app)) or '').partition('.')
+        if not SID_PATTERN.fullmatch(sid):
+            return ServerSession()
+        return ServerSession(sid, version, loader=lambda: self._load(app, sid, version))
+
+    def _load(self, app, sid, version):
+        """``(data, payload, expires_at)`` of a live session, else None."""
+        if not has_app_context():
+            # Read after the request ended, as in a test client's session_transaction()
+            with app.app_context():
+                return self._load(app, sid, version)
+        found = self.cache.get(sid, version) if self.cache is not None else None
+        if found is None:
+            found = self.store.load(sid)
+            if found is None:
+                return None
+            if self.cache is not None:
+                self.cache.put(sid, data_version(found[0]), *found)
+        payload, expires_at = found
+        return self.serializer.loads(payload), payload, expires_at
+
+    def _save(self, sid, version, payload, expires_at):
+        self.store.save(sid, payload, expires_at)
+        if self.cache is not None:
+            self.cache.put(sid, version, payload, expires_at)
+
+    def _delete(self, sid):
+        self.store.delete(sid)
+        if self.cache is not None:
+            self.cache.discard(sid)
+
+    def save_session(self, app, session, response):
+        if not session.loaded:
+            return      # not read or changed in this request
+
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if session.accessed:
+            response.vary.add('Cookie')
+
+        if not session:
+            if session.sid is not None:
+                self._delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path,
+                                       secure=self.get_cookie_secure(app),
+                                       httponly=self.get_cookie_httponly(app),
+                                       samesite=self.get_cookie_samesite(app))
+            return
+
+        payload = self.serializer.dumps(dict(session)) if session.modified or session.new else session.payload
+        version = data_version(payload)
+        lifetime = app.permanent_session_lifetime
+        now = datetime.utcnow()
+        old_sid = session.sid
+        if session.new or session.rotate_sid:
+            session.sid = secrets.token_urlsafe(32)
+        expiring = session.expires_at is not None and session.expires_at - now < lifetime / 2
+
+        if session.sid != old_sid or payload != session.payload or expiring:
+            self._save(session.sid, version, payload, now + lifetime)
+            if old_sid is not None and old_sid != session.sid:
+                self._delete(old_sid)
+            self._maybe_sweep(app)
+
+        # The cookie names the id and the version of the data, so it is
+        # re-sent only when either changes, and for permanent sessions (to
+        # move its expiry along).
+        if (session.sid != old_sid or version != session.version
+                or (session.permanent and self.should_set_cookie(app, session))):
+            response.set_cookie(
+                name, f'{session.sid}.{version}',
+                expires=self.get_expiration_time(app, session),
+                httponly=self.get_cookie_httponly(app),
+                domain=domain,
+                path=path,
+                secure=self.get_cookie_secure(app),
+                samesite=self.get_cookie_samesite(app),
+                partitioned=self.get_cookie_partitioned(app),
+            )
+
+    def _maybe_sweep(self, app):
+        now = time.monotonic()
+        if now >= _state['next_sweep']:
+            _state['next_sweep'] = now + app.config.get('SESSION_SWEEP_SECONDS', 300)
+            try:
+                self.store.sweep(app.config.get('SESSION_SWEEP_BATCH', 1000), max_batches=1)
+            except Exception:
+                # Left for the next sweep; never fail a response over it.
+                app.logger.exception('Could not sweep expired sessions')
+
+
+def make_store(app):
+    backend = app.config.get('SESSION_BACKEND', 'sqlalchemy')
+    if backend == 'sqlalchemy':
+        return SqlAlchemyStore()
+    if backend == 'memory':
+        return MemoryStore(app.config.get('SESSION_MEMORY_MAX_ENTRIES', 10000))
+    raise RuntimeError(f'Unknown SESSION_BACKEND {backend!r}')
+
+
+def make_cache(app):
+    # The memory store is in this process already
+    ttl = app.config.get('SESSION_CACHE_SECONDS', 60)
+    if app.config.get('SESSION_BACKEND', 'sqlalchemy') != 'sqlalchemy' or not ttl:
+        return None
+    return SessionCache(app.config.get('SESSION_CACHE_MAX_ENTRIES', 10000), ttl)
+
+
+def init_app(app):
+    """Install the SESSION_BACKEND session interface ('cookie' keeps Flask's)."""
+    if app.config.get('SESSION_BACKEND', 'sqlalchemy') != 'cookie':
+        app.session_interface = ServerSessionInterface(make_store(app), make_cache(app))
+
+
+def sweep(app, max_batches=None):
+    """Delete expired server-side sessions; returns how many were removed."""
+    interface = app.session_interface
+    if not isinstance(interface, ServerSessionInterface):
+        return 0
+    return interface.store.sweep(app.config.get('SESSION_SWEEP_BATCH', 1000), max_batches)
+
+
+def regenerate():
+    """Give the current session a fresh id (at login), if it is server-side."""
+    if isinstance(session._get_current_object(), ServerSession):
+        session.regenerate()
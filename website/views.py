@@ -1,30 +1,36 @@
-from flask import Blueprint, render_template, redirect, url_for, request, flash, session, jsonify
+from flask import Blueprint, current_app, render_template, redirect, url_for, request, flash, jsonify, g
 from website.auth import login_required
 from website.models import User, db, User, Professional, Career, CareerRecommendation,Community
 from website.forms import Question4, Question2
+from website.search import LISTING_KEY, decode_cursor, get_backend as get_search_backend, listing_hits, page, page_rows
+from website.recommender import get_index, recommendation_message, user_keywords
+from website import loaders
+from website.caching import cache_policy
+from website.pagecache import cached_page
 from datetime import datetime
+from sqlalchemy import select
 
 
 views = Blueprint('views', __name__)
 
 
-@views.after_request
-def after_request(response):
-    response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
-    return response
-
-
 @views.route("/")
+@cache_policy('page', static=True)
+@cached_page()
 def home():
     return render_template("home.html")
 
 
 @views.route('/about')
+@cache_policy('page', static=True)
+@cached_page()
 def about():
     return render_template('detailed_about_section.html')
 
 
 @views.route("/contact")
+@cache_policy('page', static=True)
+@cached_page()
 def contact():
     return render_template("contact.html")
 
@@ -32,17 +38,14 @@ def contact():
 
 
 @views.route("/question2", methods=['GET', 'POST'])
+@login_required
 def Second_question():
     form = Question2()
 
     if form.validate_on_submit():
-        user_id = session.get('user_id')
-        user = User.query.get(user_id)
-
-        if user:
-            user.education_level = form.currentlevel.data
-            db.session.commit()
-            return redirect(url_for('views.Third_question'))
+        g.current_user.education_level = form.currentlevel.data
+        db.session.commit()
+        return redirect(url_for('views.Third_question'))
 
     return render_template("question2.html", form=form)
 
@@ -53,17 +56,14 @@ def Third_question():
 
 
 @views.route("/question4", methods=['GET', 'POST'])
+@login_required
 def Fourth_question():
     form = Question4()
 
     if form.validate_on_submit():
-        user_id = session.get('user_id')
-        user = User.query.get(user_id)
-
-        if user:
-            user.career_goal = form.careergoal.data
-            db.session.commit()
-            return redirect(url_for('views.Fifth_question'))
+        g.current_user.career_goal = form.careergoal.data
+        db.session.commit()
+        return redirect(url_for('views.Fifth_question'))
 
     return render_template("question4.html", form=form)
 
@@ -74,20 +74,10 @@ def Fifth_question():
 
 
 @views.route("/save-strengths", methods=['POST'])
+@login_required
 def save_strengths():
-    if 'user_id' not in session:
-        # flash('Please log in to continue.', 'errormsg')
-        return redirect(url_for('auth.Sign_in'))
-
-    strengths = request.form.get('strengths', '')
-
-    user = User.query.get(session['user_id'])
-    if user:
-        user.strength = strengths
-        db.session.commit()
-        # flash('Strengths saved successfully!', 'msg')
-    # else:
-    #     flash('User not found.', 'errormsg')
+    g.current_user.strength = request.form.get('strengths', '')
+    db.session.commit()
 
     return redirect(url_for('views.dashboard'))
 
@@ -95,33 +85,22 @@ def save_strengths():
 # -------------------------------------
 # AI-LIKE CAREER RECOMMENDATION LOGIC
 # -------------------------------------
-def score_career(career, user_keywords):
-    """Assigns a score based on keyword matches."""
-    score = 0
-    career_keywords = (career.career_name or "").lower().split()
-
-    for keyword in user_keywords:
-        if keyword in career_keywords:
-            score += 5  # strong match
-
-        for ck in career_keywords:
-            if keyword in ck:
-                score += 2  # partial match
-
-    return score
+# Scoring lives in website.recommender; RECOMMENDER_BACKEND selects the
+# keyword index or the TF-IDF/cosine ranking.
 
 
 @views.route('/dashboard')
 @login_required
 def dashboard():
-    user_id = session.get('user_id')
-    if not user_id:
-        return redirect(url_for('auth.Sign_in'))
-
-    user = User.query.get(user_id)
+    user = g.current_user
+    user_id = user.user_id
 
     # Check if a recommendation already exists
-    existing = CareerRecommendation.query.filter_by(user_id=user_id).first()
+    existing = CareerRecommendation.query.options(
+        *loaders.options('recommendation_career')
+    ).filter_by(user_id=user_id).order_by(
+        CareerRecommendation.recommendation_id
+    ).first()
     if existing:
         recommended_career = existing.career.career_name if existing.career else ""
         flash(existing.recommendation_details, "info")
@@ -132,67 +111,47 @@ def dashboard():
         )
 
     # Build user keywords
-    keywords = []
-    if user.career_goal:
-        keywords += user.career_goal.lower().split()
-    if user.strength:
-        keywords += user.strength.lower().split()
+    keywords = user_keywords(user)
 
     # If no profile data, prompt user to update
     if not keywords:
         flash("Complete your profile (career goal & strengths) to get personalized recommendations.", "warning")
         return render_template("dashboard.html", user=user, recommended_career="")
 
-    # Fetch all careers
-    careers = Career.query.all()
-    if not careers:
+    # Score careers against the in-memory catalog index
+    index = get_index()
+    if not len(index):
         flash("No careers available for recommendation.", "warning")
         return render_template("dashboard.html", user=user, recommended_career="")
 
-    # Function to score careers based on keyword match
-    def score_career(career, keywords):
-        text = f"{career.career_name} {career.description}"
-        # Include skills if CareerSkill model exists
-        if hasattr(career, "skills") and career.skills:
-            text += " " + " ".join([skill.skill_name for skill in career.skills])
-        text = text.lower()
-        return sum(word in text for word in keywords)
-
-    # Find the best matching career
-    best_career = None
-    best_score = -1
-    for career in careers:
-        score = score_career(career, keywords)
-        if score > best_score:
-            best_score = score
-            best_career = career
-
-    if not best_career:
+    ranked = index.top_k(keywords, current_app.config.get('RECOMMENDATIONS_PER_USER', 1))
+
+    if not ranked:
         flash("No matching career found based on your profile.", "warning")
         return render_template("dashboard.html", user=user, recommended_career="")
 
-    # Save recommendation
-    reco_msg = (
-        f"Recommended Career: {best_career.career_name}. "
-        "You can edit your profile to change this recommendation anytime. This recommendation is just to  get you started, to get more personalized recommendation; kindly update your profile"
-    )
-
-    new_reco = CareerRecommendation(
-        user_id=user.user_id,
-        career_id=best_career.career_id,
-        recommendation_details=reco_msg,
-        date_generated=datetime.utcnow()
-    )
+    # Save recommendations, best first, so the lowest id is the top pick
+    now = datetime.utcnow()
+    new_recos = [
+        CareerRecommendation(
+            user_id=user.user_id,
+            career_id=career_id,
+            recommendation_details=recommendation_message(index.career_names[career_id], rank),
+            date_generated=now
+        )
+        for rank, (career_id, score) in enumerate(ranked)
+    ]
 
-    db.session.add(new_reco)
+    db.session.add_all(new_recos)
     db.session.commit()
 
-    flash(reco_msg, "success")
+    best = new_recos[0]
+    flash(best.recommendation_details, "success")
 
     return render_template(
         "dashboard.html",
         user=user,
-        recommended_career=best_career.career_name
+        recommended_career=index.career_names[best.career_id]
     )
 
 
@@ -200,11 +159,7 @@ def dashboard():
 @views.route('/profile/update', methods=['GET', 'POST'])
 @login_required
 def update_profile():
-    user_id = session.get('user_id')
-    if not user_id:
-        return redirect(url_for('auth.Sign_in'))
-
-    user = User.query.get(user_id)
+    user = g.current_user
 
     if request.method == "POST":
         full_name = request.form.get("full_name", "").strip()
@@ -241,74 +196,78 @@ def update_profile():
 
 
 # community and search route
+#
+# The listing pages render the first page; the JSON endpoints serve the
+# rest (no `q`: everything in id order, with `q`: ranked matches) as
+# {"results": [...], "next_cursor": ...} pages of at most `limit` rows.
+
+def search_limit():
+    """The `limit` query parameter, clamped to 1..SEARCH_MAX_LIMIT."""
+    limit = request.args.get('limit', current_app.config['SEARCH_RESULT_LIMIT'], type=int)
+    return max(1, min(limit, current_app.config['SEARCH_MAX_LIMIT']))
+
 
 @views.route("/community")
+@cache_policy('page')
+@cached_page(uses_catalog=True)
 def community():
-    communities=Community.query.limit(24).all()
-    return render_template("community.html", communities=communities)
+    page_size = current_app.config['DIRECTORY_PAGE_SIZE']
+    communities, next_cursor = page(Community, listing_hits(Community, page_size + 1), page_size)
+    return render_template("community.html", communities=communities, next_cursor=next_cursor, page_size=page_size)
 
 
 
+# Columns of a search result; the rows go to jsonify as they are
+COMMUNITY_RESULT = select(Community.community_name, Community.description, Community.community_link)
+
 @views.route('/search_communities')
+@cache_policy('search')
 def search_communities():
     query = request.args.get('q', '').strip()
-    
-    if not query:
-        return jsonify([])  # return empty if no query
-
-    # search in name or description
-    results = Community.query.filter(
-        (Community.community_name.ilike(f'%{query}%')) |
-        (Community.description.ilike(f'%{query}%'))
-    ).all()
-
-    communities = [
-        {
-            'community_name': c.community_name,
-            'description': c.description,
-            'community_link': c.community_link,
-            
-        } for c in results
-    ]
-    
-    return jsonify(communities)
+    limit = search_limit()
+    backend = get_search_backend()
+    after = decode_cursor(request.args.get('cursor'), backend.cursor_key if query else LISTING_KEY)
+
+    if query:
+        # ranked match on name and description
+        hits = backend.community_hits(query, limit + 1, after)
+    else:
+        hits = listing_hits(Community, limit + 1, after)
+    communities, next_cursor = page_rows(COMMUNITY_RESULT, Community.community_id, hits, limit)
+    return jsonify({'results': communities, 'next_cursor': next_cursor})
 
 
 
 
 # professional and search professional route
 @views.route("/professional")
+@cache_policy('page')
+@cached_page(uses_catalog=True)
 def professional():
-    pro = Professional.query.all()
-    return render_template("professional.html", pro=pro)
+    page_size = current_app.config['DIRECTORY_PAGE_SIZE']
+    pro, next_cursor = page(Professional, listing_hits(Professional, page_size + 1), page_size,
+                            loaders.options('professional_directory'))
+    return render_template("professional.html", pro=pro, next_cursor=next_cursor, page_size=page_size)
+
+
+PROFESSIONAL_RESULT = (
+    select(Professional.first_name, Professional.last_name, Professional.email, Professional.linkedin_id,
+           Career.career_name.label('career'))
+    .outerjoin(Professional.career)
+)
 
 @views.route('/search_professionals')
+@cache_policy('search')
 def search_professionals():
     query = request.args.get('q', '').strip()
-    
-    if not query:
-        return jsonify([])
-
-    # Join Career so we can search by career name
-    results = Professional.query.join(Career).filter(
-        db.or_(
-            Professional.first_name.ilike(f'%{query}%'),
-            Professional.last_name.ilike(f'%{query}%'),
-            Professional.email.ilike(f'%{query}%'),
-            Professional.linkedin_id.ilike(f'%{query}%'),
-            Career.career_name.ilike(f'%{query}%')
-        )
-    ).all()
-
-    professionals = [
-        {
-            'first_name': p.first_name,
-            'last_name': p.last_name,
-            'email': p.email,
-            'linkedin_id': p.linkedin_id,
-            'career': p.career.career_name if p.career else None
-        }
-        for p in results
-    ]
-    
-    return jsonify(professionals)
\ No newline at end of file
+    limit = search_limit()
+    backend = get_search_backend()
+    after = decode_cursor(request.args.get('cursor'), backend.cursor_key if query else LISTING_KEY)
+
+    if query:
+        # Ranked match on names, email, LinkedIn and career name
+        hits = backend.professional_hits(query, limit + 1, after)
+    else:
+        hits = listing_hits(Professional, limit + 1, after)
+    professionals, next_cursor = page_rows(PROFESSIONAL_RESULT, Professional.professional_id, hits, limit)
+    return jsonify({'results': professionals, 'next_cursor': next_cursor})